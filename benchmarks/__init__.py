@@ -0,0 +1,7 @@
+""" Benchmarks for the Waves Configurator
+
+Each module can be run from the repository root, e.g.:
+
+        $ python -m benchmarks.bench_workflow
+
+"""
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+""" Startup Benchmark
+
+Measure what a new server process (or a new worker) pays before it can answer:
+    - the cumulative import time of each module, each one imported in a fresh interpreter
+    - the time to the first response, from the start of the interpreter to the end of a
+      first request on "/", "/static" and "/project-space"
+    - the heavy modules (rdflib, validators, docker) imported once the first response is sent,
+      none of them should be imported by these requests
+
+To run the benchmark:
+
+        $ python -m benchmarks.bench_startup
+
+Each measure is run REPEAT times in a fresh interpreter and the median is reported.
+The project space folder is created in a temporary home directory.
+
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODULES = ['flask', 'services.model', 'services.utils', 'main', 'rdflib', 'validators', 'docker']
+HEAVY_MODULES = ['rdflib', 'validators', 'docker']
+URLS = ['/', '/static/js/bootstrap.min.js', '/project-space']
+REPEAT = 5
+
+FIRST_RESPONSE = """
+import time
+start = time.perf_counter()
+import json, sys
+import main
+app = main.create_app()
+client = app.test_client()
+status = client.get(sys.argv[1]).status_code
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'status': status,
+                  'heavy': [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def run_python(args, home):
+    """ Run python in a fresh interpreter from the repository root """
+    env = dict(os.environ, HOME=home)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable] + args, cwd=root, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+def import_time(module, home):
+    """ Cumulative import time of a module in milli seconds, see python -X importtime """
+    result = run_python(['-X', 'importtime', '-c', 'import ' + module], home)
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return 0.0
+
+
+def first_response(url, home):
+    """ Time from the start of the interpreter to the end of the first request on `url` """
+    result = run_python(['-c', FIRST_RESPONSE, url] + HEAVY_MODULES, home)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as home:
+        os.makedirs(os.path.join(home, 'Documents', 'waves_project_spaces'))
+
+        print('{:<20}{:>16}'.format('module', 'import (ms)'))
+        for module in MODULES:
+            ms = statistics.median(import_time(module, home) for _ in range(REPEAT))
+            print('{:<20}{:>16.1f}'.format(module, ms))
+
+        print()
+        print('{:<32}{:>10}{:>22}{:>24}'.format('first response', 'status', 'from start (ms)', 'heavy modules'))
+        for url in URLS:
+            runs = [first_response(url, home) for _ in range(REPEAT)]
+            ms = statistics.median(run['seconds'] for run in runs) * 1000
+            heavy = sorted(set(m for run in runs for m in run['heavy']))
+            print('{:<32}{:>10}{:>22.1f}{:>24}'.format(url, runs[0]['status'], ms, ', '.join(heavy) or '-'))
+
+
+if __name__ == '__main__':
+    main()
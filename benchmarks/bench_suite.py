@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+""" Model and Serialization Benchmark Suite
+
+Measure the model and the serialization on synthetic projects of growing size, see
+benchmarks.synthetic (each stream feeds up to 3 filters, with a window on each link):
+    - workflow_build        : add the components and the links of the workflow
+    - workflow_mutations    : per-operation latency of the editor operations on the built
+                              workflow: move, save settings, add / remove link, add / remove component
+    - to_dict               : Project.to_dict
+    - parse_from_dict       : Project.parse_from_dict of the dictionary of to_dict
+    - parse_trig_native     : Project.parse_trig with the native engine
+    - parse_trig_rdflib     : Project.parse_trig with rdflib, up to RDFLIB_MAX components
+    - setup_project_folder  : FileHandler.setup_project_folder, in a temporary home directory
+    - get_project           : FileHandler.get_project of the saved project
+
+To run the suite and write the results as json:
+
+        $ python -m benchmarks.bench_suite --output results.json
+
+To compare two runs, i.e. the results of two commits:
+
+        $ python -m benchmarks.bench_suite --compare before.json after.json
+
+Each case is run REPEAT times and the median is reported, the json also keeps each run:
+
+        {"commit": "...", "python": "3.11.7", "sizes": [10, ...], "repeat": 5,
+         "results": [{"case": "to_dict", "size": 10, "links": 14, "median": 0.0001,
+                      "min": 0.0001, "runs": [...], "unit": "s"}, ...]}
+
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import build_project, build_workflow
+
+SIZES = [10, 100, 1000, 10000]
+REPEAT = 5
+RDFLIB_MAX = 1000
+
+# Number of operations of each kind timed by workflow_mutations
+MUTATIONS = 200
+
+
+def time_once(func):
+    """ Time a single call of func
+
+    :return: (result of func, seconds)
+    """
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def time_mutations(workflow):
+    """ Time the editor operations on a workflow, the workflow is the same at the end
+
+    :return: median seconds per operation
+    """
+    cmpts = workflow.cmpt_list
+    step = max(1, len(cmpts) // MUTATIONS)
+    ids = [cmpt.id for cmpt in cmpts[::step]][:MUTATIONS]
+    links = workflow.link_list[:MUTATIONS]
+
+    timings = []
+    for cmptId in ids:
+        timings.append(time_once(lambda: workflow.update_component_location(cmptId, '10px', '20px'))[1])
+        settings = dict(workflow.get_cmpt_by_id(cmptId).settings)
+        timings.append(time_once(lambda: workflow.save_component_settings(cmptId, settings))[1])
+    for link in links:
+        timings.append(time_once(lambda: workflow.del_link(link))[1])
+        timings.append(time_once(lambda: workflow.add_link(link))[1])
+    for cmptId in ids:
+        cmpt = workflow.get_cmpt_by_id(cmptId)
+        cmptLinks = workflow.get_links_from(cmptId) + workflow.get_links_to(cmptId)
+        timings.append(time_once(lambda: workflow.del_cmpt_by_id(cmptId))[1])
+        timings.append(time_once(lambda: workflow.add_cmpt(cmpt))[1])
+        for link in cmptLinks:
+            workflow.add_link(link)
+    return statistics.median(timings)
+
+
+def run_size(size, repeat, home):
+    """ Run each case on a project of `size` components
+
+    :param home: temporary home directory of the FileHandler
+    :return: case -> list of seconds, one per run
+    """
+    from services.model import Project
+    from services.utils import FileHandler
+
+    project = build_project(size, name='bench_' + str(size))
+    info = project.to_dict()
+    handler = FileHandler()
+    assert handler.directory.startswith(home)
+
+    cases = {
+        'workflow_build':     lambda: build_workflow(size),
+        'workflow_mutations': lambda: time_mutations(project.workflow),
+        'to_dict':            lambda: project.to_dict(),
+        'parse_from_dict':    lambda: Project().parse_from_dict(info),
+        'parse_trig_native':  lambda: project.parse_trig(engine='native'),
+    }
+    if size <= RDFLIB_MAX:
+        cases['parse_trig_rdflib'] = lambda: project.parse_trig(engine='rdflib')
+
+    runs = {}
+    for case, func in cases.items():
+        runs[case] = []
+        for _ in range(repeat):
+            result, seconds = time_once(func)
+            # workflow_mutations returns the latency of one operation
+            runs[case].append(result if case == 'workflow_mutations' else seconds)
+
+    runs['setup_project_folder'] = []
+    runs['get_project'] = []
+    for _ in range(repeat):
+        # The template folder is moved into the project folder by each setup
+        os.makedirs(handler.tmpDir + '/instance/Configuration/TriG', exist_ok=True)
+        runs['setup_project_folder'].append(time_once(lambda: handler.setup_project_folder(project))[1])
+        loaded, seconds = time_once(lambda: handler.get_project(project.projectInfo.name))
+        runs['get_project'].append(seconds)
+    assert len(loaded.workflow.cmpt_list) == size
+
+    return runs, len(project.workflow.link_list)
+
+
+def run(sizes, repeat):
+    """ Run the suite in a temporary home directory
+
+    :return: dictionary of the results, see the module documentation
+    """
+    home = tempfile.mkdtemp(prefix='waves_bench_')
+    old_home = os.environ.get('HOME')
+    os.environ['HOME'] = home
+
+    results = []
+    try:
+        for size in sizes:
+            # Workflow methods print a line per operation, keep them out of the timings
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                runs, links = run_size(size, repeat, home)
+            for case, seconds in runs.items():
+                results.append({'case': case, 'size': size, 'links': links, 'unit': 's',
+                                'median': statistics.median(seconds), 'min': min(seconds), 'runs': seconds})
+            print_results([r for r in results if r['size'] == size], header=(size == sizes[0]))
+    finally:
+        if old_home is None:
+            del os.environ['HOME']
+        else:
+            os.environ['HOME'] = old_home
+        shutil.rmtree(home, ignore_errors=True)
+
+    return {'commit': git_commit(), 'date': datetime.now().isoformat(), 'python': platform.python_version(),
+            'platform': platform.platform(), 'sizes': sizes, 'repeat': repeat, 'results': results}
+
+
+def git_commit():
+    """ Commit of the working tree, None outside of a git repository """
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return output.stdout.strip() or None
+
+
+def print_results(results, header=True):
+    """ Print the results while they are measured, on stderr to keep stdout for the json """
+    if header:
+        print('{:<22}{:>8}{:>8}{:>14}{:>14}'.format('case', 'cmpts', 'links', 'median (ms)', 'min (ms)'),
+              file=sys.stderr)
+    for r in results:
+        print('{:<22}{:>8}{:>8}{:>14.3f}{:>14.3f}'.format(
+            r['case'], r['size'], r['links'], r['median'] * 1000, r['min'] * 1000), file=sys.stderr)
+
+
+def compare(before, after):
+    """ Print the ratio after / before of the median of each case run in both """
+    medians = {(r['case'], r['size']): r['median'] for r in before['results']}
+    print('{} -> {}'.format((before.get('commit') or '?')[:10], (after.get('commit') or '?')[:10]))
+    print('{:<22}{:>8}{:>14}{:>14}{:>10}'.format('case', 'cmpts', 'before (ms)', 'after (ms)', 'ratio'))
+    for r in after['results']:
+        old = medians.get((r['case'], r['size']))
+        if old is None:
+            continue
+        print('{:<22}{:>8}{:>14.3f}{:>14.3f}{:>9.2f}x'.format(
+            r['case'], r['size'], old * 1000, r['median'] * 1000, r['median'] / old if old else float('inf')))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the model and the serialization of the projects')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=SIZES, help='numbers of components')
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT, help='runs of each case')
+    parser.add_argument('-o', '--output', help='json file of the results')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two json files of results')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    results = run(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+""" TriG Benchmark
+
+Measure the time and the peak memory taken by each TriG engine (see TrigSetting) to write the
+TriG of synthetic projects of growing size, and check that both engines write the same graph.
+
+To run the benchmark:
+
+        $ python -m benchmarks.bench_trig
+
+The graphs are compared with rdflib.compare.isomorphic up to VERIFY_MAX components, the
+comparison itself takes much longer than the generation on larger workflows (there is a blank
+node per feed, store and window, about 80 seconds for 1000 components). Above it, only the
+number of triples and the triples without blank nodes are compared, the "check" column says
+which comparison was made:
+    - isomorphic  : the graphs are the same
+    - ground only : same number of triples and same triples without blank nodes, the triples
+                    of the blank nodes are not compared
+    - DIFFERENT   : the engines wrote different graphs
+The full comparison on every kind of blank node is done by tests/test_trig_writer.py.
+
+"""
+
+import contextlib
+import io
+import os
+import time
+import tracemalloc
+
+from rdflib import BNode, ConjunctiveGraph
+from rdflib.compare import isomorphic
+
+from benchmarks.synthetic import build_project
+
+SIZES = [10, 100, 1000, 10000]
+ENGINES = ['rdflib', 'native']
+VERIFY_MAX = 100
+
+
+def time_engine(project, engine):
+    """ Write the TriG of the project with an engine, the memory is traced in a second run
+    as tracing slows down the generation
+
+    :return: (TriG string, seconds, peak memory in MB)
+    """
+    start = time.perf_counter()
+    stream = io.StringIO()
+    project.write_trig(stream, engine=engine)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    project.write_trig(io.StringIO(), engine=engine)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return stream.getvalue(), seconds, peak
+
+
+def load(trig):
+    """ Parse a TriG string -> rdflib graph """
+    graph = ConjunctiveGraph()
+    graph.parse(data=trig, format='trig')
+    return graph
+
+
+def same_graph(graph_a, graph_b):
+    """ Check that two graphs are the same """
+    return len(graph_a) == len(graph_b) and isomorphic(graph_a, graph_b)
+
+
+def same_ground_triples(graph_a, graph_b):
+    """ Check that two graphs have as many triples and the same triples without blank nodes """
+    ground = lambda graph: set(t for t in graph if not any(isinstance(term, BNode) for term in t))
+    return len(graph_a) == len(graph_b) and ground(graph_a) == ground(graph_b)
+
+
+def main():
+    print('{:>8}{:>10}{:>14}{:>14}{:>10}{:>14}'.format(
+        'cmpts', 'triples', 'rdflib (s)', 'native (s)', 'speedup', 'check'))
+
+    for size in SIZES:
+        # Workflow methods print a line per operation, keep them out of the timings
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            project = build_project(size)
+            results = {engine: time_engine(project, engine) for engine in ENGINES}
+
+        graph_rdflib = load(results['rdflib'][0])
+        graph = load(results['native'][0])
+        if size <= VERIFY_MAX:
+            verified = 'isomorphic' if same_graph(graph_rdflib, graph) else 'DIFFERENT'
+        else:
+            verified = 'ground only' if same_ground_triples(graph_rdflib, graph) else 'DIFFERENT'
+
+        print('{:>8}{:>10}{:>14.3f}{:>14.3f}{:>9.1f}x{:>14}'.format(
+            size, len(graph), results['rdflib'][1], results['native'][1],
+            results['rdflib'][1] / results['native'][1], verified))
+        print('{:>8}{:>10}{:>11.1f} MB{:>11.1f} MB'.format('', 'peak', results['rdflib'][2], results['native'][2]))
+
+    print('ground only: the blank nodes are not compared above ' + str(VERIFY_MAX) + ' components')
+
+
+if __name__ == '__main__':
+    main()
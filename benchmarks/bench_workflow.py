@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+""" Workflow Benchmark
+
+Measure the per-operation latency of the Workflow methods called by the editor
+(drag, save settings, link lookup, remove component) while the workflow grows.
+With the id-keyed indexes of Workflow the latency should stay flat.
+
+To run the benchmark:
+
+        $ python -m benchmarks.bench_workflow
+
+"""
+
+import contextlib
+import os
+import time
+
+from services.model import Workflow, Component
+
+SIZES = [10, 100, 1000, 5000]
+REPEAT = 200
+
+
+def build_workflow(size):
+    """ Build a chain workflow of `size` components where each component links to the next one
+
+    :param size: number of components
+    :return: Workflow
+    """
+    workflow = Workflow()
+    for i in range(size):
+        workflow.add_cmpt(Component(id='cmpt_' + str(i), cmptType='Filter', settings={'id': str(i + 1)}))
+    for i in range(size - 1):
+        workflow.add_link_with_cmpt_ids('cmpt_' + str(i), 'cmpt_' + str(i + 1))
+    return workflow
+
+
+def time_op(op, repeat=REPEAT):
+    """ Run `op(i)` `repeat` times and return the mean latency in micro seconds """
+    start = time.perf_counter()
+    for i in range(repeat):
+        op(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench(size):
+    """ Time the editor operations on a workflow of `size` components
+
+    :param size: number of components
+    :return: dictionary of operation name -> mean latency in micro seconds
+    """
+    workflow = build_workflow(size)
+    last = 'cmpt_' + str(size - 1)
+    prev = 'cmpt_' + str(size - 2)
+
+    results = {}
+    results['get_cmpt_by_id'] = time_op(lambda i: workflow.get_cmpt_by_id(last))
+    results['update_component_location'] = time_op(
+        lambda i: workflow.update_component_location(last, str(i) + 'px', str(i) + 'px'))
+    results['save_component_settings'] = time_op(
+        lambda i: workflow.save_component_settings(last, {'id': str(size)}))
+    results['get_link_by_cmpt_ids'] = time_op(lambda i: workflow.get_link_by_cmpt_ids(prev, last))
+    results['save_link_settings_by_cmpt_ids'] = time_op(
+        lambda i: workflow.save_link_settings_by_cmpt_ids(prev, last, {'windowSpan': 'PT5S'}))
+
+    def add_and_remove(i):
+        cmpt_id = 'extra_' + str(i)
+        workflow.add_cmpt(Component(id=cmpt_id, cmptType='Stream', settings={'id': cmpt_id}))
+        workflow.add_link_with_cmpt_ids(last, cmpt_id)
+        workflow.del_all_links(cmpt_id)
+        workflow.del_cmpt_by_id(cmpt_id)
+    results['add_link_remove_component'] = time_op(add_and_remove)
+
+    return results
+
+
+def main():
+    rows = []
+    # Workflow methods print a line per operation, keep them out of the timings
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for size in SIZES:
+            rows.append((size, bench(size)))
+
+    ops = list(rows[0][1].keys())
+    print('{:<32}'.format('operation (us/op)') + ''.join('{:>12}'.format(size) for size, _ in rows))
+    for op in ops:
+        print('{:<32}'.format(op) + ''.join('{:>12.2f}'.format(results[op]) for _, results in rows))
+
+
+if __name__ == '__main__':
+    main()
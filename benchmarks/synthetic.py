@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+""" Synthetic projects for the benchmarks
+
+The workflow is made of groups of components like the ones drawn in the editor:
+
+        SparqlFeed --> Filter --> Sink --> RdfStore
+                         ^
+        Stream ----------+--> Strider
+           |
+           +--> Filter of the next group
+
+so each stream is consumed by up to 3 filters, with a window on each of these links.
+
+"""
+
+from services.model import Project, ProjectInfo, ClusterInfo, Workflow, Component, Metrics, Clock
+
+GROUP_SIZE = 6
+
+
+def build_workflow(size):
+    """ Build a workflow of `size` components
+
+    :param size: number of components
+    :return: Workflow
+    """
+    workflow = Workflow()
+    groups = (size + GROUP_SIZE - 1) // GROUP_SIZE
+    count = 0
+
+    for g in range(groups):
+        for cmptType, settings in _group(g):
+            if count == size:
+                break
+            workflow.add_cmpt(Component(id=_cmpt_id(cmptType, g), cmptType=cmptType, settings=settings,
+                                        ui_left=str(100 * g) + 'px', ui_top=str(count % GROUP_SIZE * 80) + 'px'))
+            count += 1
+
+    def link(src, trg, settings=None):
+        if workflow.get_cmpt_by_id(src) is not None and workflow.get_cmpt_by_id(trg) is not None:
+            workflow.add_link_with_cmpt_ids(src, trg)
+            if settings:
+                workflow.save_link_settings_by_cmpt_ids(src, trg, settings)
+
+    for g in range(groups):
+        window = {'windowSpan': 'PT' + str(5 + g % 10) + 'S'}
+        link(_cmpt_id('Stream', g), _cmpt_id('Filter', g), window)
+        link(_cmpt_id('Stream', g), _cmpt_id('Strider', g), window)
+        link(_cmpt_id('Stream', g), _cmpt_id('Filter', g + 1), window)
+        link(_cmpt_id('SparqlFeed', g), _cmpt_id('Filter', g))
+        link(_cmpt_id('Filter', g), _cmpt_id('Sink', g))
+        link(_cmpt_id('Sink', g), _cmpt_id('RdfStore', g))
+
+    return workflow
+
+
+def build_project(size, name='bench'):
+    """ Build a project whose workflow has `size` components, see build_workflow """
+    projectInfo = ProjectInfo(name=name, description='Synthetic project', license='MIT', version='1.0')
+    projectInfo.createdAt = '2020-01-01T00:00:00Z'
+    return Project(projectInfo=projectInfo, clusterInfo=ClusterInfo(), workflow=build_workflow(size),
+                   metrics=Metrics(), clock=Clock())
+
+
+def _cmpt_id(cmptType, g):
+    return cmptType.lower() + '_' + str(g)
+
+
+def _group(g):
+    """ Component types and settings of the group `g`, the waves ids are unique like in the editor """
+    wavesId = str(g + 1)
+    firstId = GROUP_SIZE * g + 1
+    return [
+        ('Stream',     {'id': str(firstId), 'label': 'stream ' + wavesId, 'location': 'data/stream_' + wavesId + '.ttl',
+                        'stepRate': 'PT1S', 'eventRate': 'PT0.5S'}),
+        ('Filter',     {'id': str(firstId + 1), 'label': 'filter ' + wavesId, 'numTasks': '2',
+                        'query': 'SELECT ?s ?p ?o WHERE { ?s ?p ?o . FILTER(?o > ' + wavesId + ') }'}),
+        ('Strider',    {'id': str(firstId + 2), 'label': 'strider ' + wavesId, 'numTasks': '1', 'workers': '4',
+                        'query': 'SELECT ?s WHERE { ?s a <http://example.org/Sensor> }'}),
+        ('SparqlFeed', {'label': 'feed ' + wavesId, 'refreshInterval': 'PT60S',
+                        'locations': 'http://example.org/a || http://example.org/b'}),
+        ('Sink',       {'id': str(firstId + 4), 'label': 'sink ' + wavesId}),
+        ('RdfStore',   {'label': 'store ' + wavesId, 'location': 'http://localhost:3030/ds_' + wavesId}),
+    ]
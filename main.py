@@ -17,95 +17,161 @@ This program contains several modules:
         * save   link settings
         * upload file
         * upload multi file
+        * chunked upload of large files, resumable
+        * import trig
         * save   clock settings
         * save   clock settings standalone
         * preview trig
+        * get    / patch workflow revisions, a patch is a batch of changes applied at once
     * Delete project
         * delete project
     * Modify project
         * modify project
+        * diff   project with its saved trig
     * Launch project
         * launch containers
         * stop   containers
         * remove containers
+    * Project space
+        * list projects, paginated and sorted
     * Project details
+        * load project details, conditional and gzip compressed
+        * load project workflow UI, sent compressed as it is stored
         * load project component settings
+        * download n-quads
 
 To launch the program:
 
         $ python main.py
 
+The routes are registered on a blueprint and the application is built by create_app, e.g. for a
+WSGI server:
+
+        $ gunicorn "main:create_app()"
+
+The heavy libraries (rdflib, validators, docker) are only imported by the requests that use them,
+so starting a process or a worker does not pay for them.
+
 """
 
-from flask import Flask, request, Response, send_from_directory
+from flask import Flask, Blueprint, request, Response, send_from_directory, g, current_app
 from flask import render_template
-app = Flask(__name__, static_url_path='/static')
 
+import codecs
+import copy
+import gzip
+import hashlib
 import json
-from datetime import datetime
-import validators
+import os
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from werkzeug.utils import secure_filename
+from werkzeug.http import parse_content_range_header, is_resource_modified
 
-from services.model import Project, ProjectInfo, Workflow, Component, ClusterInfo, Metrics, Clock
-from services.utils import FileHandler, DockerHandler
+from services.model import Project, Component, TrigCache, TrigImporter, ProjectDiff
+from services.model.ComponentSchema import SCHEMA as COMPONENT_SCHEMA
+from services.utils import FileHandler, DockerHandler, TrigArtifactCache, PageCache, create_session_store, UploadOffsetError
 from services.config import DeploySetting
 
+bp = Blueprint('waves', __name__)
+
+def create_app():
+    """ Build the Flask application
+
+    Params:
+        app.extensions['waves_sessions']   : Session store of the editor states, see Editor State
+        app.extensions['waves_trig_cache'] : TriG of the components and links, see Preview TriG
+        app.extensions['waves_trig_artifacts'] : TriG files of the previewed and created projects
+        app.extensions['waves_pages']      : Rendered project details pages, see Project Details
+    
+    :return: Flask application with all the routes of this module
+    """
+    app = Flask(__name__, static_url_path='/static')
+    app.register_blueprint(bp)
+    app.extensions['waves_sessions']   = create_session_store()
+    app.extensions['waves_trig_cache'] = TrigCache()
+    app.extensions['waves_trig_artifacts'] = TrigArtifactCache(fragmentCache=app.extensions['waves_trig_cache'])
+    app.extensions['waves_pages']      = PageCache()
+    return app
+
 # ========================================
 #   Handle Static Files
 # ========================================
 
-@app.route('/static/js/<path:path>')
+@bp.route('/static/js/<path:path>')
 def send_js(path):
     return send_from_directory('static/js', path)
 
-@app.route('/static/js/myscripts/<path:path>')
+@bp.route('/static/js/myscripts/<path:path>')
 def send_my_js(path):
     return send_from_directory('static/js/myscripts', path)
 
-@app.route('/static/css/<path:path>')
+@bp.route('/static/css/<path:path>')
 def send_css(path):
     return send_from_directory('static/css', path)
 
-@app.route('/static/fonts/<path:path>')
+@bp.route('/static/fonts/<path:path>')
 def send_fonts(path):
     return send_from_directory('static/fonts', path)
 
-@app.route('/static/img/<path:path>')
+@bp.route('/static/img/<path:path>')
 def send_img(path):
     return send_from_directory('static/img', path)
 
-@app.route('/static/img/workflow/<path:path>')
+@bp.route('/static/img/workflow/<path:path>')
 def send_workflow_img(path):
     return send_from_directory('static/img/workflow', path)
 
 # ========================================
-#   Global Variables
+#   Editor State
 # ========================================
 
 """
-    Global variables to save the settings info during the creation & modification of a project
-        - When load the create-project / modify-project page, init these global variables
+    Editor state to save the settings info during the creation & modification of a project
+        - Each user session has its own EditorState, see services.model.EditorState,
+            kept in the session store and found from the session cookie
+        - The session store backend is set in services.config.SessionSetting, use the sqlite one
+            to run the app with several worker processes
+        - When load the create-project / modify-project page, init the editor state
         - Every time a new component / link is added or the settings of component is added,
-            the value in each global variable will be modified
-    
-    Global Args: 
-        projectInfo : Contains the information of installation: project name, description etc.
-        clusterInfo : Information about the hosts and IPs 
-        workflow    : 
-            - List of components
-            - List of links
-        metrics     : Monitoring parameters
-        clock       : Acceleration parameters
-        cmptCounter : Number of current added components, used for automatic setting the id
+            the editor state will be modified
+        - The requests of a session are processed one at a time, the requests of different 
+            sessions run concurrently, so the app can run threaded
 """
 
-projectInfo = ProjectInfo()
-clusterInfo = ClusterInfo()
-workflow    = Workflow()
-metrics     = Metrics()
-clock       = Clock()
+SESSION_COOKIE = 'waves_editor_session'
 
-cmptCounter = 0
+def session_id():
+    """ Get the id of the current user session, a new session is started if there is no cookie """
+    session_id = request.cookies.get(SESSION_COOKIE) or g.get('new_session_id')
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+        g.new_session_id = session_id
+    return session_id
+
+@contextmanager
+def editor_state():
+    """ Get the editor state of the current user session and hold it during the request
+
+        with editor_state() as state:
+            state.workflow.add_cmpt(cmpt)
+    """
+    with current_app.extensions['waves_sessions'].acquire(session_id()) as state:
+        yield state
+
+def session_files():
+    """ FileHandler of the tmp workspace of the current user session, where its files are uploaded """
+    return FileHandler(session_id())
+
+@bp.after_request
+def set_session_cookie(resp):
+    """ Send the session cookie when a new session was started during the request """
+    session_id = g.get('new_session_id')
+    if session_id is not None:
+        resp.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    return resp
 
 
 # ========================================
@@ -117,7 +183,7 @@ cmptCounter = 0
     Load Welcome Page
 """
 
-@app.route('/')
+@bp.route('/')
 def load_index():
     """ Load Welcome page
     
@@ -136,7 +202,7 @@ def load_index():
 """
 
 
-@app.route('/about')
+@bp.route('/about')
 def load_about():
     """ Load About page """
     return render_template('about.html')
@@ -151,35 +217,38 @@ def load_about():
     Load Create Project Page
 """
 
-@app.route('/create-project', methods=['GET'])
+@bp.route('/create-project', methods=['GET'])
 def load_create_project():
     """ Load Page to create a project
     
     When launch the program, http://localhost:9002/create-project -> show page create-project.html
     There are 2 steps to do when load this page
     
-    Step 1: Init all global variables when load this page, make sure that:
+    Step 1: Init the editor state when load this page, make sure that:
         - List of components in workflow is empty
         - List of links      in workflow is empty
         - Number of components is 0
     
     Step 2: Set up project folder
         - If /{user.home}/Documents/waves_project_space folder doesn't exist, create the folder
-        - Create a tmp folder for temporal saving the uploaded files,
-            the temporal files will be moved the project folder once user clicked submit project button
-        - Copy the docker-standalone folder into tmp folder,
+        - Create a tmp folder of the user session for temporal saving the uploaded files,
+            the temporal files will be moved the project folder once user clicked submit project button,
+            the tmp folders of the other sessions are kept
+        - Materialize the docker-standalone folder into tmp folder, its files are linked to a
+            template store instead of being copied, see ProjectTemplate,
             when user submit the project, it will also be moved to project folder
             to be used for building the Docker image and containers
     """
     
-    # Initial global variables
-    global workflow, clock, cmptCounter
-    workflow.cmpt_list = []
-    workflow.link_list = []
-    cmptCounter = 0
+    # Initial editor state
+    with editor_state() as state:
+        state.workflow.cmpt_list = []
+        state.workflow.link_list = []
+        state.cmptCounter = 0
+        clock = state.clock
     
     # Init Project Space folder 
-    handler = FileHandler()
+    handler = session_files()
     handler.setup_project_space_folder()
     
     return render_template('create-project.html', clock=clock)
@@ -189,7 +258,7 @@ def load_create_project():
 """
 
 # Receive form data and create a project
-@app.route('/create-project', methods=['POST'])
+@bp.route('/create-project', methods=['POST'])
 def create_project():
     """When user clicked on the button, retrieve the project information and build the project
     
@@ -199,10 +268,10 @@ def create_project():
         - Workflow     : 
             Workflow information is updated while adding, removing, save settings
                 of the components etc.
-            The information is already saved in workflow global variable, 
+            The information is already saved in the editor state, 
                 no need to retrieve from the form data
         - Metrics     : Information is obtained from the submitted form data
-        - Clock       : Information already saved in global variable clock 
+        - Clock       : Information already saved in the editor state clock 
                 when user click on the button of saving clock settings
     
      Step 1: Retrieve project information
@@ -220,6 +289,8 @@ def create_project():
              the empty workflow space.
     
      Step 3: Parse the project information into TriG
+         - Reuse the TriG file generated for the preview if nothing changed since then,
+             see services.utils.TrigArtifactCache
      
      Step 4: Set up project folder
          - New a folder with the name of project name at /{user.root}/Documents/waves_project_space/
@@ -241,33 +312,35 @@ def create_project():
              directly on the existing workflow.
     """
     
-    global projectInfo, clusterInfo, workflow, metrics, clock
-    
     print(request.form)
     
-    # Receive form data
-    projectInfo.name = request.form['name']
-    projectInfo.description = request.form['description']
-    projectInfo.license = request.form['license']
-    projectInfo.version = request.form['version']
-    projectInfo.createdAt = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    metrics.frequency = request.form['frequency']
-    metrics.reporters = request.form['reporters']
-    
-    workflow_ui = request.form['workflow_ui']
-    
-    # Create a new project
-    project = Project(projectInfo, clusterInfo, workflow, metrics, clock)
-    
-    # Parse project -> TriG
-    resp = {}
-    resp['trig'] = project.parse_trig() 
-    
-    # Create the project folder
-    handler = FileHandler()
-    handler.setup_project_folder(project)
-    handler.save_workflow_ui(workflow_ui, projectInfo.name)
+    with editor_state() as state:
+        
+        # Receive form data
+        projectInfo = state.projectInfo
+        projectInfo.name = request.form['name']
+        projectInfo.description = request.form['description']
+        projectInfo.license = request.form['license']
+        projectInfo.version = request.form['version']
+        
+        state.metrics.frequency = request.form['frequency']
+        state.metrics.reporters = request.form['reporters']
+        
+        workflow_ui = request.form['workflow_ui']
+        
+        # Create a new project
+        project = Project(projectInfo, state.clusterInfo, state.workflow, state.metrics, state.clock)
+        artifacts = current_app.extensions['waves_trig_artifacts']
+        _stamp_created_at(project, artifacts)
+        
+        # Parse project -> TriG, reuse the TriG of the preview if nothing changed since then
+        resp = {}
+        resp['trig'] = artifacts.get(project)
+        
+        # Create the project folder, with the files uploaded by the session
+        handler = session_files()
+        handler.setup_project_folder(project, artifacts)
+        handler.save_workflow_ui(workflow_ui, projectInfo.name)
     
     return json.dumps(resp)
 
@@ -275,8 +348,7 @@ def create_project():
     Add Component in Workflow
 """
 
-@app.route('/create-project/add-component', methods=['POST'])
-def add_component():
+def _add_component(state, params):
     """ Add component in workflow
     
     When user drag a component from selector and drop it -> workflow space. The function here 
@@ -295,210 +367,350 @@ def add_component():
     
     # Get basic component settings
     cmpt = Component()
-    cmpt.cmptType = request.form['cmptType'] 
-    cmpt.id = request.form['id'] 
-    cmpt.ui_left = request.form['ui_left'] 
-    cmpt.ui_top = request.form['ui_top'] 
+    cmpt.cmptType = params['cmptType'] 
+    cmpt.id = params['id'] 
+    cmpt.ui_left = params['ui_left'] 
+    cmpt.ui_top = params['ui_top'] 
     
     # Automatically append id
-    global cmptCounter
     settings = {}
-    cmptCounter = cmptCounter + 1
-    settings["id"] = str(cmptCounter)
+    settings["id"] = str(state.cmptCounter + 1)
     cmpt.settings = settings
        
-    # Append component to workflow component list
-    global workflow
-    workflow.add_cmpt( cmpt )
+    # Append component to workflow component list, the counter is only used if it is added
+    state.workflow.add_cmpt( cmpt )
+    state.cmptCounter = state.cmptCounter + 1
     
-    return '{}'
+    return cmpt.to_dict()
+
+@bp.route('/create-project/add-component', methods=['POST'])
+def add_component():
+    """ Add component in workflow, see _add_component 
+    
+    :return: 400 with the error when there is already a component with this id
+    """
+    with editor_state() as state:
+        try:
+            return json.dumps(_add_component(state, request.form))
+        except ValueError as e:
+            return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
 
 """
     Remove Component from Workflow
 """
 
-@app.route('/create-project/remove-component', methods=['POST'])
-def remove_component():
+def _remove_component(state, params):
     """ Remove component from Workflow
     
     - Remove all links that are related to the component, source link or target link
     - Remove component from workflow component list
     """
-    global workflow
-    cmptId = request.form['id']
-    workflow.del_all_links(cmptId)
-    workflow.del_cmpt_by_id(cmptId)
+    cmptId = params['id']
+    links = state.workflow.get_links_from(cmptId) + state.workflow.get_links_to(cmptId)
+    state.workflow.del_all_links(cmptId)
+    state.workflow.del_cmpt_by_id(cmptId)
 
-    return '{}'
+    return {'id': cmptId, 'removedLinks': [link.to_ref_dict() for link in links]}
+
+@bp.route('/create-project/remove-component', methods=['POST'])
+def remove_component():
+    """ Remove component from Workflow, see _remove_component """
+    with editor_state() as state:
+        return json.dumps(_remove_component(state, request.form))
 
 """
     Update Component's UI location in Workflow
 """
 
-@app.route('/create-project/update-component-location', methods=['POST'])
-def update_component_location():
+def _update_component_location(state, params):
     """ Update Component's UI Location when user drag and drop component """
     
-    global workflow
-    workflow.update_component_location(
-            request.form['id'], 
-            request.form['ui_left'],
-            request.form['ui_top'])
+    state.workflow.update_component_location(
+            params['id'], 
+            params['ui_left'],
+            params['ui_top'])
     
-    return '{}'
+    cmpt = state.workflow.get_cmpt_by_id(params['id'])
+    return cmpt.to_dict() if cmpt is not None else {}
+
+@bp.route('/create-project/update-component-location', methods=['POST'])
+def update_component_location():
+    """ Update Component's UI Location, see _update_component_location """
+    with editor_state() as state:
+        return json.dumps(_update_component_location(state, request.form))
 
 """
     Save component's settings
 """
 
-@app.route('/create-project/save-component-settings', methods=['POST'])
-def save_component_settings():
+def _save_component_settings(state, params):
     """ Save component settings when user click on 'Save Settings' button.
     
     Retrieve from key-value form data and set the component settings
     The component's settings is in fact a python dictionary.
     
-    For some special keys, we will make some modifications
+    The values are checked and cleaned by the component schema, see services.model.ComponentSchema
         - cmpt_id : do not need to save it in settings, so pass it
-        - location : Since we deploy the program at container, the location should be 
+        - numTasks, windowSpan etc. : typed settings are trimmed, integers and numbers are checked
+        - location, inputFolder : Since we deploy the program at container, the location should be 
                 the location at the container.
             Check if the location is URL or filename, if it's not a url location:
-                If raw source, make the location as "/usr/local/srcFolder/"
-                If others, "/usr/local/srcFiles/" + filename
-        - outputFile : Add prefix of "/usr/local/" 
-        - inputFolder : Add prefix of '/usr/local/srcFolder'
+                If raw source, make the location as "/opt/data/csv"
+                If rdf source, make the location as "/opt/data/rdfSource"
+            The location of a static feed is "/opt/data/rdf/" + filename
+        - outputFile : Only keep the file name
         
     Set component settings.
     """
-    global workflow
-    cmpt_id = request.form['cmpt_id']
-    cmpt_type = request.form['cmpt_type']
-    print(request.form)
+    cmpt_id = params['cmpt_id']
+    cmpt_type = params['cmpt_type']
+    print(params)
     
-    cmpt = workflow.get_cmpt_by_id(cmpt_id)
+    cmpt = state.workflow.get_cmpt_by_id(cmpt_id)
     
-    settings = {}
-    settings['id'] = cmpt.settings['id']
+    # Keep the waves id, and what the settings of an imported component cannot tell, see 
+    # services.model.TrigImporter
+    settings = dict( (key, cmpt.settings[key]) for key in ('id', 'trig') if key in cmpt.settings )
     
-    for key, value in request.form.items():
+    # Do not save the component id
+    values = dict( (key, value) for key, value in params.items() if key != 'cmpt_id' )
+    settings.update( COMPONENT_SCHEMA.clean_settings(cmpt_type, values, session_files()) )
 
-        # Do not save the component id
-        if key != 'cmpt_id':
-            settings[key] = value
+    state.workflow.save_component_settings(cmpt_id, settings)
+    
+    return {'id': cmpt_id, 'settings': settings}
 
-        # RawSource data location in docker
-        if cmpt_type == 'RawSource' and key == 'location':
-            # Check if it's url
-            # If it's not a url, means that it's a file source
-            if validators.url(value) != True:
-                # Save the location as the folder path in docker container
-                settings[key] = "/opt/data/csv"
-
-        # RdfSource data location in docker
-        if cmpt_type == 'Source' and key == 'inputFolder':
-            # Check if it's url
-            # If it's not a url, means that it's a file source
-            if validators.url(value) != True:
-                # Save the location as the folder path in docker container
-                settings[key] = "/opt/data/rdfSource"
-
-        # Static Feed data location in docker
-        if cmpt_type == 'RdfFeed' and key == 'location':
-            fhandler = FileHandler()
-            settings[key] = "/opt/data/rdf/" + fhandler.get_static_feed_filename()
-
-        # Sink Location
-        if cmpt_type == 'Sink' and key == 'outputFile':
-            settings[key] = value.split('\\')[-1]
-
-    workflow.save_component_settings(cmpt_id, settings)
+@bp.route('/create-project/save-component-settings', methods=['POST'])
+def save_component_settings():
+    """ Save component settings, see _save_component_settings 
     
-    return '{}'
+    :return: 400 with the error when a value does not match its setting, i.e. numTasks is not an integer
+    """
+    with editor_state() as state:
+        try:
+            return json.dumps(_save_component_settings(state, request.form))
+        except ValueError as e:
+            return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
 
 """
     Get Component Settings
 """
 
-@app.route('/create-project/get-component-settings', methods=['POST'])
-def get_component_settings():
+def _get_component_settings(state, params):
     """ When user click on component in workflow space, load the component settings """
     
-    global workflow
-    cmpt = workflow.get_cmpt_by_id(request.form['id'])
+    cmpt = state.workflow.get_cmpt_by_id(params['id'])
     if cmpt != None:
-        settings = cmpt.settings
-        return json.dumps(settings)
+        return cmpt.settings
     else:
-        return '{}'
+        return {}
+
+@bp.route('/create-project/get-component-settings', methods=['POST'])
+def get_component_settings():
+    """ Load the component settings, see _get_component_settings """
+    with editor_state() as state:
+        return json.dumps(_get_component_settings(state, request.form))
 
 """
     Add component link
 """
 
-@app.route('/create-project/add-link', methods=['POST'])
-def add_link():
+def _add_link(state, params):
     """ Add component link by giving source component id and target component id """
     
-    global workflow 
-    workflow.add_link_with_cmpt_ids(
-            request.form['srcCmptId'],
-            request.form['trgCmptId'])
+    state.workflow.add_link_with_cmpt_ids(
+            params['srcCmptId'],
+            params['trgCmptId'])
     
-    return '{}'
+    link = state.workflow.get_link_by_cmpt_ids(params['srcCmptId'], params['trgCmptId'])
+    return link.to_ref_dict() if link is not None else {}
+
+@bp.route('/create-project/add-link', methods=['POST'])
+def add_link():
+    """ Add component link, see _add_link 
+    
+    :return: 400 with the error when the link already exists
+    """
+    with editor_state() as state:
+        try:
+            return json.dumps(_add_link(state, request.form))
+        except ValueError as e:
+            return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
 
 """
     Remove link
 """
 
-@app.route('/create-project/remove-link', methods=['POST'])
-def remove_link():
-    """ Remove link """
+def _remove_link(state, params):
+    """ Remove all the links going out of the source component """
     
-    global workflow 
-    workflow.del_link_by_src_cmpt_id(
-            request.form['srcCmptId'])
+    links = state.workflow.get_links_from(params['srcCmptId'])
+    state.workflow.del_link_by_src_cmpt_id(
+            params['srcCmptId'])
     
-    return '{}'
+    return {'removedLinks': [link.to_ref_dict() for link in links]}
+
+@bp.route('/create-project/remove-link', methods=['POST'])
+def remove_link():
+    """ Remove link, see _remove_link """
+    with editor_state() as state:
+        return json.dumps(_remove_link(state, request.form))
 
 """
     Save link settings
 """
 
-@app.route('/create-project/save-link-settings', methods=['POST'])
-def save_link_settings():
+def _save_link_settings(state, params):
     """ Save Link Settings
     
     This is only used for window span settings between RDF stream and Semantic Filter
     """
     
-    global workflow 
     settings = {}
 
-    for key, value in request.form.items():
+    for key, value in params.items():
         # if key == "windowSpan":
         if key != 'srcCmptId' and key != "trgCmptId":
             settings[key] = value
+    
+    # Keep the predicates of an imported link, see services.model.TrigImporter
+    link = state.workflow.get_link_by_cmpt_ids(params['srcCmptId'], params['trgCmptId'])
+    if link is not None and 'trig' in link.settings:
+        settings['trig'] = link.settings['trig']
 
-    workflow.save_link_settings_by_cmpt_ids(
-            request.form['srcCmptId'],
-            request.form['trgCmptId'],
+    state.workflow.save_link_settings_by_cmpt_ids(
+            params['srcCmptId'],
+            params['trgCmptId'],
             settings)
     
-    return '{}'
+    link = state.workflow.get_link_by_cmpt_ids(params['srcCmptId'], params['trgCmptId'])
+    return link.to_ref_dict() if link is not None else {}
+
+@bp.route('/create-project/save-link-settings', methods=['POST'])
+def save_link_settings():
+    """ Save Link Settings, see _save_link_settings """
+    with editor_state() as state:
+        return json.dumps(_save_link_settings(state, request.form))
 
 """
     Load default workflow
 """
 
-@app.route('/create-project/default-workflow', methods=['POST'])
+@bp.route('/create-project/default-workflow', methods=['POST'])
 def get_default_workflow():
-    global workflow
-    workflow.cmpt_list = []
-    workflow.link_list = []
-    
-    default_workflow = workflow.get_default_workflow()
+    with editor_state() as state:
+        state.workflow.clear()
+        
+        default_workflow = state.workflow.get_default_workflow()
     return default_workflow
 
+"""
+    Workflow revisions
+"""
+
+@bp.route('/create-project/workflow', methods=['GET'])
+def get_workflow():
+    """ Get the workflow being edited, or only its changes since a known revision
+    
+    The ETag of the response is the revision of the workflow.
+        - If-None-Match is the current revision : 304, nothing has changed
+        - ?since=REVISION and the changes since REVISION are still recorded :
+            { "revision": 12, "changes": [ ...changes, see services.model.Workflow... ] }
+        - Otherwise the whole workflow :
+            { "revision": 12, "workflow": { "cmpt_list": [...], "link_list": [...] } }
+    """
+    with editor_state() as state:
+        workflow = state.workflow
+        
+        etag = str(workflow.revision)
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+            resp.set_etag(etag)
+            return resp
+        
+        info = {}
+        info['revision'] = workflow.revision
+        
+        changes = None
+        since = request.args.get('since', type=int)
+        if since is not None:
+            changes = workflow.get_changes_since(since)
+        if changes is not None:
+            info['changes'] = changes
+        else:
+            info['workflow'] = workflow.to_ref_dict()
+    
+    resp = Response(json.dumps(info), mimetype='application/json')
+    resp.set_etag(etag)
+    return resp
+
+@bp.route('/create-project/workflow', methods=['PATCH'])
+def patch_workflow():
+    """ Apply a list of changes to the workflow
+    
+    The If-Match header must be the revision the changes are based on, i.e. the ETag 
+    received from the last GET or PATCH. The request body is the json list of changes,
+    see services.model.Workflow for their format.
+    
+    A component added without an id in its settings gets the next one, as by add-component,
+    a component added with a numeric id moves the next one after it.
+    The changes are applied on a copy of the workflow, which replaces the workflow only 
+    when all of them succeed, so the editor sends the operations of a single action (i.e. 
+    loading the default workflow) in one request. A change on a missing component or link, 
+    or adding one that already exists, fails the whole patch.
+    
+    :return: 
+        - 200 with the new revision and the changes since the base revision,
+            including the ones made by the server like the removal of the links of a removed component
+        - 400 when a change can not be applied
+        - 409 when the base revision is not the current one, the client must fetch the changes first
+        - 428 when If-Match is missing
+    """
+    if not request.if_match:
+        return Response(status=428)
+    
+    with editor_state() as state:
+        
+        etag = str(state.workflow.revision)
+        if not request.if_match.contains(etag):
+            resp = Response(json.dumps({'revision': state.workflow.revision}), status=409, mimetype='application/json')
+            resp.set_etag(etag)
+            return resp
+        
+        base = state.workflow.revision
+        draft = copy.deepcopy(state.workflow)
+        cmptCounter = state.cmptCounter
+        try:
+            changes = request.get_json(force=True)
+            for change in changes:
+                # Number the added components, the id in their settings is the one of the TriG
+                value = change.get('value')
+                if change['op'] != 'add' or not change['path'].startswith('/cmpts/'):
+                    continue
+                settings = value.get('settings', {})
+                if 'id' not in settings:
+                    cmptCounter = cmptCounter + 1
+                    change['value'] = dict(value, settings=dict(settings, id=str(cmptCounter)))
+                elif str(settings['id']).isdigit():
+                    # The next components get the ids after it, as for an imported TriG
+                    cmptCounter = max(cmptCounter, int(settings['id']))
+            draft.apply_patch(changes)
+        except Exception as e:
+            resp = {}
+            resp['error'] = '{}: {}'.format(type(e).__name__, e)
+            return Response(json.dumps(resp), status=400, mimetype='application/json')
+        
+        state.workflow = workflow = draft
+        state.cmptCounter = cmptCounter
+        
+        info = {}
+        info['revision'] = workflow.revision
+        info['changes'] = workflow.get_changes_since(base)
+    
+    resp = Response(json.dumps(info), mimetype='application/json')
+    resp.set_etag(str(workflow.revision))
+    return resp
+
 # ========================================
 #   Upload File
 # ========================================
@@ -507,14 +719,15 @@ def get_default_workflow():
     Upload Single File
 """
 
-@app.route('/create-project/upload-single-file', methods=['POST'])
+@bp.route('/create-project/upload-single-file', methods=['POST'])
 def upload_single_file():
     """ Upload single files 
 
     This method is used for static feed
-    The file will be saved at tmp folder at /{user.home}/Documents/waves_project_space/tmp/Data/StaticFeed
+    The file will be saved at the tmp folder of the session, 
+    /{user.home}/Documents/waves_project_space/tmp/SESSION/instance/Data/StaticFeed
     """
-    handler = FileHandler()
+    handler = session_files()
     files = request.files.getlist("location")
 
     if len(files) == 1:
@@ -526,15 +739,16 @@ def upload_single_file():
     Upload Multi Files
 """
 
-@app.route('/create-project/upload-multi-file', methods=['POST'])
+@bp.route('/create-project/upload-multi-file', methods=['POST'])
 def upload_multi_files():
     """ Upload Multi File
 
     The name of input may be location or inputFolder, need to retrieve them independently.
     For raw source, the name is location
     For rdf source, the name is inputFolder
+    The files are saved in the tmp folder of the session
     """
-    handler = FileHandler()
+    handler = session_files()
     
     if request.files.getlist("inputFolder") == []:
         # If not inputFolder, uploaded file -> raw source
@@ -549,11 +763,150 @@ def upload_multi_files():
 
     return '{}'
 
+"""
+    Chunked uploads
+"""
+
+@bp.route('/create-project/uploads', methods=['POST'])
+def open_upload():
+    """ Start a chunked upload of a large data file
+
+    The json body is {"filename": .., "kind": "raw" | "rdf" | "static", "size": ..}. The chunks are
+    sent next by PUT /create-project/uploads/<upload_id>, see upload_chunk. The complete file is
+    linked to the tmp folder of the session that opened the upload.
+
+    :return: 201 with {'id': .., 'size': .., 'offset': 0}, 400 if the body is not valid
+    """
+    handler = session_files()
+    info = request.get_json(silent=True) or {}
+    try:
+        upload_id = handler.open_upload(info.get('filename', ''), info.get('kind'), int(info.get('size', -1)))
+    except (TypeError, ValueError) as e:
+        return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
+    return Response(json.dumps(handler.blobs.get_upload(upload_id)), status=201, mimetype='application/json')
+
+@bp.route('/create-project/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """ Get the offset of a chunked upload, to resume it after an interruption
+
+    :return: {'id': .., 'size': .., 'offset': ..}, 404 if there is no such upload
+    """
+    handler = FileHandler()
+    try:
+        info = handler.blobs.get_upload(upload_id)
+    except KeyError:
+        return Response(json.dumps({'error': 'No such upload'}), status=404, mimetype='application/json')
+    return Response(json.dumps(info), mimetype='application/json')
+
+@bp.route('/create-project/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """ Append a chunk to a chunked upload
+
+    The body is the raw bytes of the chunk, streamed to the part file of the upload without being
+    spooled, and the header Content-Range: bytes START-END/SIZE gives its position. The chunk that
+    reaches the size completes the upload: the file is linked to the temp data folder. An empty
+    body with Content-Range: bytes */SIZE gives the offset, and completes an empty upload.
+
+    :return: {'id': .., 'size': .., 'offset': ..} and 'sha256' once complete,
+        409 with the offset to resume from if the chunk does not start there,
+        404 if there is no such upload, 400 without a valid Content-Range,
+        400 with the offset if the body is not as long as the range,
+        416 with the size if the SIZE of the range is not the size of the upload or the range ends after it
+    """
+    handler = FileHandler()
+    content_range = parse_content_range_header(request.headers.get('Content-Range'))
+    if content_range is None or content_range.units != 'bytes':
+        return Response(json.dumps({'error': 'Content-Range: bytes START-END/SIZE is required'}),
+                        status=400, mimetype='application/json')
+    
+    try:
+        upload = handler.blobs.get_upload(upload_id)
+        if content_range.length != upload['size'] or (content_range.stop or 0) > upload['size']:
+            return Response(json.dumps({'error': 'The upload has ' + str(upload['size']) + ' bytes',
+                                        'size': upload['size']}),
+                            status=416, mimetype='application/json')
+        
+        start = content_range.start
+        length = 0 if start is None else content_range.stop - start
+        if request.content_length is not None and request.content_length != length:
+            return Response(json.dumps({'error': 'The body has ' + str(request.content_length) + ' bytes, the range '
+                                                 + str(length), 'offset': upload['offset']}),
+                            status=400, mimetype='application/json')
+        if start is None:
+            start = upload['offset']
+        
+        info = handler.blobs.write_upload(upload_id, start, request.stream, length)
+    except KeyError:
+        return Response(json.dumps({'error': 'No such upload'}), status=404, mimetype='application/json')
+    except UploadOffsetError as e:
+        return Response(json.dumps({'error': str(e), 'offset': e.offset}), status=409, mimetype='application/json')
+    except (IOError, ValueError) as e:
+        return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
+    
+    if info['offset'] - start != length:
+        # The connection was closed before the end of the chunk, the bytes received are kept
+        return Response(json.dumps({'error': 'The chunk ended after ' + str(info['offset'] - start) + ' bytes',
+                                    'offset': info['offset']}),
+                        status=400, mimetype='application/json')
+    return Response(json.dumps(info), mimetype='application/json')
+
+@bp.route('/create-project/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """ Abort a chunked upload and delete what was received """
+    handler = FileHandler()
+    try:
+        handler.blobs.abort_upload(upload_id)
+    except KeyError:
+        return Response(json.dumps({'error': 'No such upload'}), status=404, mimetype='application/json')
+    return '{}'
+
+"""
+    Import TriG
+"""
+
+@bp.route('/create-project/import-trig', methods=['POST'])
+def import_trig():
+    """ Import an existing TriG configuration, i.e. a hand-written waves.trig
+    
+    The uploaded file is read statement by statement, see services.model.TrigImporter, and 
+    replaces the project being edited: project info, cluster info, components, links, metrics 
+    and clock. The components added next get the ids following the highest imported one. The 
+    project is written back as the TriG was read: the uris of the components, the datatypes of 
+    their literals and the statements that are not part of the project are kept.
+    
+    :return: the editor state, see EditorState.to_dict, 
+        400 with the error when the file is not a valid TriG configuration, or when it can not 
+        be written back as it was read, i.e. a literal with a language
+    """
+    files = request.files.getlist("trig")
+    if len(files) != 1:
+        return Response(json.dumps({'error': 'Upload one TriG file'}), status=400, mimetype='application/json')
+    
+    try:
+        # Decoded chunk by chunk while it is read, the line endings are kept as they are
+        importer = TrigImporter().load(codecs.getreader('utf-8')(files[0].stream))
+    except ValueError as e:
+        return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
+    
+    with editor_state() as state:
+        state.projectInfo = importer.projectInfo
+        state.clusterInfo = importer.clusterInfo
+        state.metrics     = importer.metrics
+        state.clock       = importer.clock
+        # Replace the components and links, the revision of the workflow keeps increasing
+        state.workflow.cmpt_list = importer.workflow.cmpt_list
+        state.workflow.link_list = importer.workflow.link_list
+        state.cmptCounter = importer.cmptCounter
+        
+        info = state.to_dict()
+    
+    return Response(json.dumps(info), mimetype='application/json')
+
 """
     Save deploy settings
 """
 
-@app.route('/launch-program/save-deploy-settings', methods=['POST'])
+@bp.route('/launch-program/save-deploy-settings', methods=['POST'])
 def save_deploy_settings():
 
     """ Deploy settings
@@ -571,7 +924,7 @@ def save_deploy_settings():
     Save clock settings
 """
 
-@app.route('/create-project/save-clock-settings', methods=['POST'])
+@bp.route('/create-project/save-clock-settings', methods=['POST'])
 def save_clock_settings():
     
     """ Save clock settings by choosing two modes
@@ -580,16 +933,17 @@ def save_clock_settings():
     Mode 2: Use startTime, endTime, duration
     """
     
-    global clock
-    if "acceleration" in request.form:
-        clock.startDate = request.form['startDate']
-        clock.acceleration = request.form['acceleration']
-        clock.localTimeZone = request.form['localTimeZone']
-    else:
-        clock.startDate = request.form['startDate']
-        clock.endDate = request.form['endDate']
-        clock.duration = request.form['duration']
-        clock.localTimeZone = request.form['localTimeZone']
+    with editor_state() as state:
+        clock = state.clock
+        if "acceleration" in request.form:
+            clock.startDate = request.form['startDate']
+            clock.acceleration = request.form['acceleration']
+            clock.localTimeZone = request.form['localTimeZone']
+        else:
+            clock.startDate = request.form['startDate']
+            clock.endDate = request.form['endDate']
+            clock.duration = request.form['duration']
+            clock.localTimeZone = request.form['localTimeZone']
     
     return '{}'
 
@@ -597,36 +951,59 @@ def save_clock_settings():
     Preview TriG
 """
 
-@app.route('/create-project/preview-trig', methods=['POST'])
+@bp.route('/create-project/preview-trig', methods=['POST'])
 def preview_trig():
     
-    """ Retrieve project information and generate TriG """
+    """ Retrieve project information and generate TriG 
     
-    global projectInfo, clusterInfo, workflow, metrics, clock
-
-    projectInfo.name = request.form['name']
-    projectInfo.description = request.form['description']
-    projectInfo.license = request.form['license']
-    projectInfo.version = request.form['version']
-    projectInfo.createdAt = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    metrics.frequency = request.form['frequency']
-    metrics.reporters = request.form['reporters']
+    The TriG of the project is kept in the artifact cache, the same project is not generated 
+    again, i.e. when the project is created right after the preview. When it is generated, 
+    the TriG of the components and links is cached, only the ones modified since the 
+    last preview are generated again. Both caches are shared by all the sessions since they 
+    are keyed by content
+    """
     
-    project = Project(projectInfo, clusterInfo, workflow, metrics, clock)
+    with editor_state() as state:
+        
+        projectInfo = state.projectInfo
+        projectInfo.name = request.form['name']
+        projectInfo.description = request.form['description']
+        projectInfo.license = request.form['license']
+        projectInfo.version = request.form['version']
+        
+        state.metrics.frequency = request.form['frequency']
+        state.metrics.reporters = request.form['reporters']
+        
+        project = Project(projectInfo, state.clusterInfo, state.workflow, state.metrics, state.clock)
+        artifacts = current_app.extensions['waves_trig_artifacts']
+        _stamp_created_at(project, artifacts)
+        
+        resp = {}
+        resp['trig'] = artifacts.get(project)
+        
+        print( json.dumps(project.to_dict(), indent=5, sort_keys=True) )
     
-    resp = {}
-    resp['trig'] = project.parse_trig() 
+    return json.dumps(resp)
+
+def _stamp_created_at(project, artifacts):
+    """ Set the creation date of the project
     
-    print( json.dumps(project.to_dict(), indent=5, sort_keys=True) )
+    The date of the last preview is kept when the TriG of the project is still in the artifact 
+    cache, i.e. nothing changed since the preview, so that the TriG is not generated again and
+    the created project is the one that was previewed. Otherwise it is set to now.
     
-    return json.dumps(resp)
+    :param project: Project model
+    :param artifacts: TrigArtifactCache
+    """
+    if project.projectInfo.createdAt and artifacts.contains(project):
+        return
+    project.projectInfo.createdAt = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 """
     Delete Project
 """
 
-@app.route('/delete-project', methods=['POST'])
+@bp.route('/delete-project', methods=['POST'])
 def delete_project():
     """ Delete project """
 
@@ -641,44 +1018,134 @@ def delete_project():
     Load Project Space Page
 """
 
-@app.route('/project-space')
+@bp.route('/project-space')
 def load_project_space():
     """ Load Project Space
         
-    Read all project names from project space local folder /{user.home}/Documents/waves_project_space
-    The project names are the list of folder names
+    Read the summaries of the projects of the project space local folder /{user.home}/Documents/waves_project_space
+    from the catalog, the project files are only read when they changed, see ProjectCatalog
     """
     handler = FileHandler()
-    pnames = handler.get_list_project()
-    projects = []
-    for pname in pnames:
-        project = handler.get_project_as_dict(pname)
-        projects.append(project)
+    total, projects = handler.list_projects()
     return render_template('project-space.html', projects=projects)
 
+@bp.route('/project-space/projects')
+def list_projects():
+    """ List the projects of the project space, a page at a time
+
+    The query parameters are offset (0 by default), limit (all by default), sort (name,
+    createdAt, modifiedAt, version, cmpts or links) and order (asc or desc).
+
+    :return: {'total': .., 'offset': .., 'limit': .., 'projects': [summary, ..]}, see ProjectCatalog.list,
+        400 if a parameter is not valid
+    """
+    handler = FileHandler()
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+        order = request.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError('The order must be asc or desc')
+        total, projects = handler.list_projects(offset, limit, request.args.get('sort', 'name'), order == 'desc')
+    except ValueError as e:
+        return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
+    
+    info = {'total': total, 'offset': offset, 'limit': limit, 'projects': projects}
+    return Response(json.dumps(info), mimetype='application/json')
+
 """
     Load Project Details Page
 """
 
-@app.route('/project-space/<name>/details')
+@bp.route('/project-space/<name>/details')
 def load_project_details(name):
     """ Load the details of project
 
+    The page is sent with an ETag and a Last-Modified made from the version of the project files,
+    see FileHandler.get_project_version, and of the template. A browser that already has the page
+    gets 304 Not Modified, the project is not read. Otherwise the page is taken from the page cache,
+    gzip compressed if the browser accepts it, it is only rendered again when the project changed.
+
     :param name: name of the project
-    :return:
+    :return: page of the project, 404 if there is no such project
     """
     handler = FileHandler()
-    # Load project information as json for processingin UI
-    project = handler.get_project_as_dict(name)
-    workflow_ui = handler.get_workflow_ui(name).rstrip()
-    trig = handler.get_project_as_trig(name)
-    return render_template('project-details.html', project=project, workflow_ui=workflow_ui, trig=trig)
+    try:
+        version, modifiedAt = handler.get_project_version(name)
+    except FileNotFoundError:
+        return Response(json.dumps({'error': 'No project ' + name}), status=404, mimetype='application/json')
+    
+    template = os.path.join(current_app.root_path, current_app.template_folder, 'project-details.html')
+    version = version + ':' + str(os.stat(template).st_mtime_ns)
+    etag = hashlib.sha1(version.encode('utf-8')).hexdigest()
+    lastModified = datetime.fromtimestamp(int(modifiedAt), timezone.utc)
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=lastModified):
+        resp = Response(status=304)
+    else:
+        def render():
+            # Load project information as json for processingin UI, the workflow UI is loaded by the
+            # page, see load_project_workflow_ui
+            project = handler.get_project_as_dict(name)
+            trig = handler.get_project_as_trig(name)
+            return render_template('project-details.html', project=project, trig=trig).encode('utf-8')
+        
+        body, gzipBody = current_app.extensions['waves_pages'].get(name, etag, render)
+        if request.accept_encodings['gzip'] > 0:
+            resp = Response(gzipBody, mimetype='text/html')
+            resp.headers['Content-Encoding'] = 'gzip'
+        else:
+            resp = Response(body, mimetype='text/html')
+    
+    # The same validators for both encodings, so the etag is weak
+    resp.set_etag(etag, weak=True)
+    resp.last_modified = lastModified
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+"""
+    Load project workflow UI
+"""
+
+@bp.route('/project-space/<name>/workflow-ui')
+def load_project_workflow_ui(name):
+    """ Get the workflow UI of the project, the HTML tags inserted in the workflow space of the details page
+
+    The workflow UI is stored compressed, see services.utils.WorkflowUI. It is sent as it is stored,
+    with Content-Encoding, if the browser accepts the encoding, and decompressed otherwise.
+
+    :param name: name of the project
+    :return: HTML tags, 404 if the project has no workflow UI
+    """
+    handler = FileHandler()
+    try:
+        data, encoding = handler.get_workflow_ui_compressed(name)
+    except FileNotFoundError:
+        return Response(json.dumps({'error': 'No workflow UI for project ' + name}), status=404, 
+                        mimetype='application/json')
+    
+    etag = hashlib.sha1(data).hexdigest()
+    if not is_resource_modified(request.environ, etag=etag):
+        resp = Response(status=304)
+    elif request.accept_encodings[encoding] > 0:
+        resp = Response(data, mimetype='text/html')
+        resp.headers['Content-Encoding'] = encoding
+    else:
+        resp = Response(gzip.decompress(data) if encoding == 'gzip' else zlib.decompress(data), mimetype='text/html')
+    
+    # The same validator for both encodings, so the etag is weak
+    resp.set_etag(etag, weak=True)
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.vary.add('Accept-Encoding')
+    return resp
 
 """
     Load project component settings
 """
 
-@app.route('/project-space/<name>/details/get-component-settings', methods=['POST'])
+@bp.route('/project-space/<name>/details/get-component-settings', methods=['POST'])
 def load_project_component_settings(name):
     """ Get the project all component's settings
 
@@ -699,6 +1166,35 @@ def load_project_component_settings(name):
     
     return json.dumps(settings)
 
+"""
+    Download project N-Quads
+"""
+
+@bp.route('/project-space/<name>/download-nquads')
+def download_project_nquads(name):
+    """ Download the project as N-Quads, one statement per line
+    
+    The file written in the project folder is sent when it exists. Otherwise, i.e. for the projects
+    created before, the lines are generated from the project json and streamed while they are
+    generated, see Project.iter_nquads
+
+    :param name: name of the project
+    :return: PROJECT_NAME.nq as attachment, 404 if there is no such project
+    """
+    handler = FileHandler()
+
+    if os.path.isfile(handler.get_project_nquads_path(name)):
+        return send_from_directory(handler.directory, name + '/' + name + '.nq',
+                                   mimetype='application/n-quads', as_attachment=True)
+
+    try:
+        project = handler.get_project(name)
+    except FileNotFoundError:
+        return Response(json.dumps({'error': 'No project ' + name}), status=404, mimetype='application/json')
+    resp = Response(project.iter_nquads(), mimetype='application/n-quads')
+    resp.headers['Content-Disposition'] = 'attachment; filename="' + secure_filename(name) + '.nq"'
+    return resp
+
 # ========================================
 #   Docker deployement
 # ========================================
@@ -707,7 +1203,7 @@ def load_project_component_settings(name):
     Load launch program page
 """
 
-@app.route('/launch-program/<name>')
+@bp.route('/launch-program/<name>')
 def load_launch_program_page(name):
     """ Load launch program page
 
@@ -721,7 +1217,7 @@ def load_launch_program_page(name):
     Launch containers
 """
 
-@app.route('/launch-program/<name>/launch-containers')
+@bp.route('/launch-program/<name>/launch-containers')
 def launch_containers(name):
     """ Launch the project's docker container
 
@@ -742,7 +1238,7 @@ def launch_containers(name):
     Stop containers
 """
 
-@app.route('/launch-program/<name>/stop-containers')
+@bp.route('/launch-program/<name>/stop-containers')
 def stop_containers(name):
     """ Stop running container
 
@@ -762,7 +1258,7 @@ def stop_containers(name):
     Stop and delete containers
 """
  
-@app.route('/launch-program/<name>/delete-containers')
+@bp.route('/launch-program/<name>/delete-containers')
 def delete_containers(name):
     """ Stop and delete the docker containers
 
@@ -781,7 +1277,7 @@ def delete_containers(name):
     Modify the project
 """
 
-@app.route('/modify-project/<name>')
+@bp.route('/modify-project/<name>')
 def modify_project(name):
     """ Modify the project
 
@@ -793,16 +1289,40 @@ def modify_project(name):
     
     project = handler.get_project(name)
     
-    global projectInfo, clusterInfo, workflow, metrics, clock
-    
-    # Modify the project by re-create workflow
-    projectInfo = project.projectInfo
-    clusterInfo = project.clusterInfo
-    workflow = Workflow()
-    metrics = project.metrics
-    clock = project.clock
+    with editor_state() as state:
+        
+        # Modify the project by re-create workflow, the removals are recorded so the
+        # editors knowing a revision get them with the changes since then
+        state.projectInfo = project.projectInfo
+        state.clusterInfo = project.clusterInfo
+        state.workflow.clear()
+        state.metrics = project.metrics
+        state.clock = project.clock
+        state.cmptCounter = 0
     
-    return render_template('modify-project.html', project=project, clock=clock)
+    return render_template('modify-project.html', project=project, clock=project.clock)
+
+@bp.route('/modify-project/<name>/diff')
+def diff_project(name):
+    """ Compare the project being modified with its saved TriG
+
+    The triples added and removed are grouped by component, see ProjectDiff.
+
+    :param name: name of the saved project
+    :return: json of the diff, {'added': .., 'removed': .., 'components': {..}}
+    """
+
+    handler = FileHandler()
+
+    try:
+        with editor_state() as state:
+            project = Project(state.projectInfo, state.clusterInfo, state.workflow, state.metrics, state.clock)
+            with open(handler.get_project_trig_path(name), 'r', newline='') as file:
+                info = ProjectDiff(file, project).to_dict()
+    except (IOError, ValueError) as e:
+        return Response(json.dumps({'error': str(e)}), status=400, mimetype='application/json')
+
+    return Response(json.dumps(info), mimetype='application/json')
 
 """
     Streaming out the results
@@ -830,4 +1350,4 @@ def stream(methodToRun, project_name):
 """
 
 if __name__ == '__main__':
-    app.run(debug=True, port=9002)
\ No newline at end of file
+    create_app().run(debug=True, port=9002, threaded=True)
\ No newline at end of file
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""Migrate the projects of the project space to the SQLite storage backend
+
+Each project folder of the project space (see FileHandler.directory) has its files:
+    - PROJECT_NAME.json, PROJECT_NAME.trig and workflow.txt.gz (or workflow.txt)
+                                                            -> saved in the database, see ProjectDatabase
+    - docker-standalone                                     -> stays in the project folder
+
+Each project is saved in one transaction, a project whose TriG file is missing gets its TriG
+generated from its json. Once the projects are migrated, set StorageSetting.backend = "sqlite"
+in services/config.py.
+
+To migrate the projects:
+
+        $ python migrate_projects.py                  # the projects not in the database yet
+        $ python migrate_projects.py --force demo     # only some projects, even if already migrated
+        $ python migrate_projects.py --remove-files   # and remove their json, trig, n-quads and workflow ui
+
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from services.model import Project
+from services.config import StorageSetting
+from services.utils.ProjectDatabase import ProjectDatabase
+from services.utils.ProjectCatalog import IGNORED
+from services.utils import WorkflowUI
+
+
+def migrate(db, directory, project_name, remove_files=False):
+    """ Save the files of a project folder in the database
+
+    :param db: ProjectDatabase
+    :param directory: project space folder
+    :param project_name: name of the project
+    :param remove_files: remove the files of the project once saved
+    """
+    project_dir = os.path.join(directory, project_name)
+    json_path = os.path.join(project_dir, project_name + '.json')
+    trig_path = os.path.join(project_dir, project_name + '.trig')
+    ui_path = os.path.join(project_dir, 'workflow.txt')
+    ui_gz_path = os.path.join(project_dir, 'workflow.txt.gz')
+
+    with open(json_path, 'r') as file:
+        json_str = file.read()
+    info = json.loads(json_str)
+
+    if os.path.isfile(trig_path):
+        with open(trig_path, 'r', newline='') as file:
+            trig = file.read()
+    else:
+        project = Project()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            trig = project.parse_from_dict(project.upgrade_dict(info)).parse_trig()
+
+    workflow_ui = None
+    if os.path.isfile(ui_gz_path):
+        with open(ui_gz_path, 'rb') as file:
+            workflow_ui = WorkflowUI.decompress(file.read())
+    elif os.path.isfile(ui_path):
+        with open(ui_path, 'r') as file:
+            workflow_ui = file.read()
+
+    db.save_project(project_name, info, json_str, trig, workflow_ui, os.stat(json_path).st_mtime)
+
+    if remove_files:
+        for path in (json_path, trig_path, ui_path, ui_gz_path, os.path.join(project_dir, 'workflow.html.gz'),
+                     os.path.join(project_dir, project_name + '.nq')):
+            if os.path.isfile(path):
+                os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Migrate the projects of the project space to the SQLite database')
+    parser.add_argument('projects', nargs='*', help='names of the projects, all the projects by default')
+    parser.add_argument('-f', '--force', action='store_true', help='migrate the projects already in the database again')
+    parser.add_argument('--remove-files', action='store_true', help='remove the files of the projects once migrated')
+    parser.add_argument('--db', help='path of the database, StorageSetting.sqlitePath by default')
+    args = parser.parse_args(argv)
+
+    directory = os.path.expanduser("~") + "/Documents/waves_project_spaces"
+    db = ProjectDatabase(args.db or StorageSetting.sqlitePath or directory + "/.projects.db")
+
+    project_names = args.projects
+    if not project_names and os.path.isdir(directory):
+        project_names = [name for name in os.listdir(directory)
+                         if not name.startswith('.') and name not in IGNORED
+                         and os.path.isfile(os.path.join(directory, name, name + '.json'))]
+
+    start = time.perf_counter()
+    migrated = 0
+    skipped = 0
+    errors = 0
+    for project_name in sorted(project_names):
+        if not args.force and db.contains(project_name):
+            print('{:<32} {:>10}'.format(project_name, 'skipped'))
+            skipped += 1
+            continue
+        try:
+            migrate(db, directory, project_name, args.remove_files)
+        except (OSError, ValueError) as e:
+            print('{:<32} {:>10}  {}'.format(project_name, 'ERROR', e))
+            errors += 1
+            continue
+        print('{:<32} {:>10}'.format(project_name, 'migrated'))
+        migrated += 1
+
+    print('{} migrated, {} skipped, {} errors in {:.3f}s into {}'.format(
+        migrated, skipped, errors, time.perf_counter() - start, db.path))
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
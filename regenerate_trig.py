@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+"""Regenerate the TriG of every project of the project space
+
+Each project folder of the project space (see FileHandler.directory) has its configuration in
+PROJECT_NAME.json. This command generates the TriG from it again and writes:
+    - PROJECT_NAME.trig
+    - docker-standalone/instance/Configuration/TriG/waves.trig
+    - PROJECT_NAME.nq, the same statements as N-Quads
+
+With the "sqlite" backend of StorageSetting, the json is read from the database and the TriG is
+saved in the database and in the docker folder, there is no N-Quads file.
+
+The projects are processed in a pool of processes. A project is skipped when neither its json nor
+the TriG mapping (the source of Project, TrigWriter, NquadsWriter and ComponentSchema, and the
+TriG engine) changed since the last run, the state of the last run is kept in .regenerate-trig.json
+in the project space folder.
+
+To regenerate the TriG:
+
+        $ python regenerate_trig.py                 # all the projects that changed
+        $ python regenerate_trig.py --force         # all the projects
+        $ python regenerate_trig.py -j 4 demo test  # only some projects, with 4 processes
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+import uuid
+
+from services.model import Project
+from services.utils import FileHandler
+from services.utils.TrigArtifactCache import mapping_fingerprint
+
+STATE_FILE = '.regenerate-trig.json'
+
+
+def json_hash(handler, project_name):
+    """ Hash of the json file of a project """
+    return hashlib.sha256(_read_json(handler, project_name)).hexdigest()
+
+
+def regenerate(project_name):
+    """ Regenerate the TriG of a project, run in a worker process
+
+    :param project_name: name of the project
+    :return: (project name, hash of the json, seconds)
+    """
+    start = time.perf_counter()
+    handler = FileHandler()
+    project_dir = handler.directory + '/' + project_name
+
+    content = _read_json(handler, project_name)
+    project = Project()
+    project = project.parse_from_dict(project.upgrade_dict(json.loads(content.decode('utf-8'))))
+
+    if handler.db is not None:
+        trig = project.parse_trig()
+        trig_path = handler.get_project_trig_path(project_name)
+        if os.path.isdir(os.path.dirname(trig_path)):
+            with open(trig_path + '.tmp', 'w') as file:
+                file.write(trig)
+            os.replace(trig_path + '.tmp', trig_path)
+        handler.db.save_document(project_name, 'trig', trig)
+        return project_name, hashlib.sha256(content).hexdigest(), time.perf_counter() - start
+
+    paths = [project_dir + '/' + project_name + '.trig']
+    if os.path.isdir(project_dir + '/docker-standalone'):
+        trig_dir = project_dir + '/docker-standalone/instance/Configuration/TriG'
+        os.makedirs(trig_dir, exist_ok=True)
+        paths.append(trig_dir + '/waves.trig')
+
+    # Write to a temporary file then rename, so the TriG files are never half written
+    tmp_path = paths[0] + '.' + uuid.uuid4().hex + '.tmp'
+    try:
+        with open(tmp_path, 'w') as file:
+            project.write_trig(file)
+        for path in paths[1:]:
+            with open(tmp_path, 'r') as src, open(path + '.tmp', 'w') as dst:
+                dst.write(src.read())
+            os.replace(path + '.tmp', path)
+        os.replace(tmp_path, paths[0])
+        
+        with open(tmp_path, 'w') as file:
+            project.write_nquads(file)
+        os.replace(tmp_path, project_dir + '/' + project_name + '.nq')
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return project_name, hashlib.sha256(content).hexdigest(), time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Regenerate the TriG of the projects of the project space')
+    parser.add_argument('projects', nargs='*', help='names of the projects, all the projects by default')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes, one per cpu by default')
+    parser.add_argument('-f', '--force', action='store_true', help='regenerate the projects that did not change')
+    args = parser.parse_args(argv)
+
+    handler = FileHandler()
+    state_path = handler.directory + '/' + STATE_FILE
+    state = _load_state(state_path)
+    fingerprint = mapping_fingerprint()
+
+    project_names = args.projects or [name for name in handler.get_list_project()
+                                      if handler.db is not None or os.path.isfile(_json_path(handler, name))]
+
+    # Find the projects to regenerate
+    todo = []
+    unchanged = 0
+    regenerated = 0
+    errors = 0
+    for project_name in sorted(project_names):
+        try:
+            current = json_hash(handler, project_name)
+        except OSError as e:
+            print('{:<32} {:>10}  {}'.format(project_name, 'ERROR', e))
+            errors += 1
+            continue
+        last = state.get(project_name)
+        if not args.force and last == {'json': current, 'mapping': fingerprint} \
+                and _has_trig(handler, project_name):
+            print('{:<32} {:>10}'.format(project_name, 'unchanged'))
+            unchanged += 1
+            continue
+        todo.append(project_name)
+
+    # Regenerate them in the process pool
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(_quiet, regenerate, name): name for name in todo}
+        for future in as_completed(futures):
+            project_name = futures[future]
+            try:
+                project_name, current, seconds = future.result()
+            except Exception as e:
+                print('{:<32} {:>10}  {}'.format(project_name, 'ERROR', e))
+                state.pop(project_name, None)
+                errors += 1
+                continue
+            print('{:<32} {:>9.3f}s'.format(project_name, seconds))
+            state[project_name] = {'json': current, 'mapping': fingerprint}
+            regenerated += 1
+
+    # Forget the deleted projects
+    existing = set(handler.get_list_project())
+    for project_name in list(state):
+        if project_name not in existing:
+            del state[project_name]
+    _save_state(state_path, state)
+
+    print('{} regenerated, {} unchanged, {} errors in {:.3f}s'.format(
+        regenerated, unchanged, errors, time.perf_counter() - start))
+
+    return 1 if errors else 0
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _json_path(handler, project_name):
+    return handler.directory + '/' + project_name + '/' + project_name + '.json'
+
+
+def _read_json(handler, project_name):
+    """ Content of the json of a project, from its file or from the database """
+    if handler.db is not None:
+        return handler.db.get_document(project_name, 'json').encode('utf-8')
+    with open(_json_path(handler, project_name), 'rb') as file:
+        return file.read()
+
+
+def _has_trig(handler, project_name):
+    if handler.db is not None:
+        return handler.db.contains(project_name)
+    return os.path.isfile(handler.directory + '/' + project_name + '/' + project_name + '.trig')
+
+
+def _quiet(function, *args):
+    """ Run a function without its prints, the models print each operation """
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return function(*args)
+    except Exception:
+        # Only send back the last line of the traceback, i.e. "ValueError: ..."
+        raise RuntimeError(traceback.format_exc().strip().splitlines()[-1])
+
+
+def _load_state(path):
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, state):
+    if not os.path.isdir(os.path.dirname(path)):
+        return
+    with open(path + '.tmp', 'w') as file:
+        json.dump(state, file, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
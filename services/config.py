@@ -14,4 +14,57 @@
 class DeploySetting(object):
     
     dckLoc = "/usr/local/bin/docker"
-    dckCmpsLoc = "/usr/local/bin/docker-compose"
\ No newline at end of file
+    dckCmpsLoc = "/usr/local/bin/docker-compose"
+
+
+"""
+    Editor sessions conf
+    - backend : where the editor sessions are kept
+        - "memory" : in the server process, only for a server with a single process
+        - "sqlite" : in a SQLite database shared by all the server processes
+    - sqlitePath : path of the SQLite database, by default .sessions.db in the project space folder
+    - maxSessions : max number of editor sessions kept in memory
+    - maxIdle : seconds after which an unused editor session is dropped
+    - maxBytes : memory budget of all the editor sessions, estimated from their workflow size
+"""
+
+class SessionSetting(object):
+    
+    backend = "memory"
+    sqlitePath = None
+    maxSessions = 100
+    maxIdle = 4 * 3600
+    maxBytes = 256 * 1024 * 1024
+
+
+"""
+    TriG generation conf
+    - engine : how the TriG of a project is generated
+        - "native" : written straight to the file or the response by services.model.TrigWriter
+        - "rdflib" : built as a rdflib Graph then serialized, slower, kept as a fallback
+    - cacheDir : folder of the TriG files already generated, by default .trig-cache in the project space folder
+    - cacheMaxBytes : max total size of the TriG files kept in cacheDir
+"""
+
+class TrigSetting(object):
+    
+    engine = "native"
+    cacheDir = None
+    cacheMaxBytes = 64 * 1024 * 1024
+
+
+"""
+    Project storage conf
+    - backend : where the projects of the project space are saved
+        - "files"  : a folder per project with PROJECT_NAME.json, PROJECT_NAME.trig, PROJECT_NAME.nq
+                     and the workflow UI, compressed, in workflow.txt.gz and workflow.html.gz
+        - "sqlite" : the json, the TriG and the workflow UI of all the projects in a SQLite database,
+                     the docker folder of each project stays in its folder,
+                     see migrate_projects.py to move the projects saved as files to the database
+    - sqlitePath : path of the SQLite database, by default .projects.db in the project space folder
+"""
+
+class StorageSetting(object):
+    
+    backend = "files"
+    sqlitePath = None
@@ -27,8 +27,8 @@ class Clock(object):
         info = {}
         
         info['startDate']       = self.startDate
-        info['endDate']         = self.startDate
-        info['duration']        = self.startDate
+        info['endDate']         = self.endDate
+        info['duration']        = self.duration
         info['localTimeZone']   = self.localTimeZone
         info['acceleration']    = self.acceleration
         
@@ -0,0 +1,201 @@
+""" Component Schema
+
+Kind of each setting of each component type, used when the settings of a component are saved
+and when the triples of a component are written:
+    - the kind gives the datatype of the literal, i.e. "PT5S"^^xsd:duration, and how the value
+      is checked and cleaned when it is saved
+    - multi-value settings are split on " || ", one triple per value
+    - some settings of some component types are paths of uploaded files, they are replaced by
+      the path of the files in the docker container when they are saved
+
+The schema is compiled once per component type into a table: setting name -> Property, so
+writing a setting is a single dictionary lookup.
+
+    prop = SCHEMA.get_property('Filter', 'numTasks')
+    prop.datatype          # 'int'
+    prop.split('4')        # ['4']
+
+"""
+
+import re
+
+# Kinds of settings
+STRING   = 'string'
+LABEL    = 'label'      # written as rdfs:label
+DURATION = 'duration'
+DATETIME = 'dateTime'
+TIME     = 'time'
+INTEGER  = 'int'
+DOUBLE   = 'double'
+MULTI    = 'multi'      # several values separated by " || "
+IGNORED  = 'ignored'    # not written in the TriG
+
+# Kinds written with a xsd datatype, the datatype is the kind
+TYPED_KINDS = [DURATION, DATETIME, TIME, INTEGER, DOUBLE]
+
+MULTI_VALUE_SEPARATOR = " || "
+
+# Settings of all the component types
+DURATION_PROPS    = ["stepRate", "duration", "frequency", "windowSpan", \
+                     "refreshInterval", "eventRate", "allowedDuration", "initTime"]
+DATETIME_PROPS    = ["startDate", "endDate"]
+TIME_PROPS        = ["allowedDuration", "initTime"]
+INTEGER_PROPS     = ["numTasks", "workers", "id", "samplingParameter", \
+                     "broadcastThreshold", "concurrentJobs", "numberRepartitions", "shuffledPartitions"]
+DOUBLE_PROPS      = []
+MULTI_VALUE_PROPS = ["locations", "pages", "hashTags"]
+
+# From the lowest to the highest priority, i.e. allowedDuration is a duration, not a time
+DEFAULT_KINDS = [
+    (MULTI,    MULTI_VALUE_PROPS),
+    (IGNORED,  ["cmpt_type", "trig"]),
+    (DOUBLE,   DOUBLE_PROPS),
+    (INTEGER,  INTEGER_PROPS),
+    (TIME,     TIME_PROPS),
+    (DATETIME, DATETIME_PROPS),
+    (DURATION, DURATION_PROPS),
+    (LABEL,    ["label"]),
+]
+
+_INTEGER = re.compile(r'^[+-]?[0-9]+$')
+
+"""
+    Path of the uploaded files in the docker container
+"""
+
+def _is_url(value):
+    # Imported on first use, it is only needed when the settings are saved
+    import validators
+    return validators.url(value) == True
+
+def _container_folder(folder):
+    """ Uploaded files are in `folder` of the container, urls are kept as they are """
+    def normalize(value, fhandler):
+        return value if _is_url(value) else folder
+    return normalize
+
+def _static_feed_path(value, fhandler):
+    """ The static feed is the file uploaded in the static feed folder of the container """
+    return "/opt/data/rdf/" + fhandler.get_static_feed_filename()
+
+def _file_name(value, fhandler):
+    """ Only keep the name of the file, browsers may send C:\\fakepath\\name """
+    return value.split('\\')[-1]
+
+# Settings specific to a component type : cmptType -> setting name -> (kind, normalize function)
+COMPONENT_TYPES = {
+    'RawSource' : { 'location'    : (STRING, _container_folder("/opt/data/csv")) },
+    'Source'    : { 'inputFolder' : (STRING, _container_folder("/opt/data/rdfSource")) },
+    'RdfFeed'   : { 'location'    : (STRING, _static_feed_path) },
+    'Sink'      : { 'outputFile'  : (STRING, _file_name) },
+}
+
+
+class Property(object):
+
+    def __init__(self, name, kind=STRING, normalize=None):
+        """ Initial function
+
+        Params:
+            self.name      : Name of the setting
+            self.kind      : Kind of the setting, i.e. STRING, DURATION
+            self.datatype  : Local name of the xsd datatype of the literal, None for plain literals
+            self.normalize : Function (value, fhandler) -> value, applied when the setting is saved
+        """
+        self.name      = name
+        self.kind      = kind
+        self.datatype  = kind if kind in TYPED_KINDS else None
+        self.normalize = normalize
+
+    def split(self, value):
+        """ Values of the setting, one triple is written for each of them """
+        if self.kind == MULTI:
+            return value.split(MULTI_VALUE_SEPARATOR)
+        return [value]
+
+    def clean(self, cmptType, value, fhandler=None):
+        """ Check and clean a value of the setting before it is saved
+
+        :param cmptType: component type, for the error message
+        :param value: value from the form data
+        :param fhandler: FileHandler, to find the uploaded files
+        :return: cleaned value
+        """
+        if self.normalize is not None:
+            value = self.normalize(value, fhandler)
+
+        if self.datatype is None:
+            return value
+
+        value = str(value).strip()
+        if value == '':
+            return value
+        if self.kind == INTEGER and not _INTEGER.match(value):
+            raise ValueError('{} of {} must be an integer, not "{}"'.format(self.name, cmptType, value))
+        if self.kind == DOUBLE:
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError('{} of {} must be a number, not "{}"'.format(self.name, cmptType, value))
+        return value
+
+
+class ComponentSchema(object):
+
+    def __init__(self, defaults=DEFAULT_KINDS, types=COMPONENT_TYPES):
+        """ Initial function
+
+        Params:
+            self.defaults : Kinds of the settings of all the component types, see DEFAULT_KINDS
+            self.types    : Settings specific to a component type, see COMPONENT_TYPES
+            self._tables  : cmptType -> compiled table, see get_table
+        """
+        self.defaults = defaults
+        self.types    = types
+        self._tables  = {}
+
+        self._default_table = {}
+        for kind, names in defaults:
+            for name in names:
+                self._default_table[name] = Property(name, kind)
+
+    def get_table(self, cmptType):
+        """ Table of the settings of a component type, compiled on first use
+
+        :param cmptType: component type
+        :return: dictionary setting name -> Property, the settings not in it are STRING
+        """
+        table = self._tables.get(cmptType)
+        if table is None:
+            table = dict(self._default_table)
+            for name, (kind, normalize) in self.types.get(cmptType, {}).items():
+                table[name] = Property(name, kind, normalize)
+            self._tables[cmptType] = table
+        return table
+
+    def get_property(self, cmptType, name):
+        """ Property of a setting of a component type """
+        prop = self.get_table(cmptType).get(name)
+        if prop is None:
+            prop = Property(name)
+        return prop
+
+    def clean_settings(self, cmptType, params, fhandler=None):
+        """ Check and clean the settings of a component before they are saved
+
+        :param cmptType: component type
+        :param params: settings from the form data
+        :param fhandler: FileHandler, to find the uploaded files
+        :return: python dictionary of the cleaned settings
+        :raise ValueError: if a value does not match the kind of its setting
+        """
+        table = self.get_table(cmptType)
+        settings = {}
+        for name, value in params.items():
+            prop = table.get(name)
+            settings[name] = value if prop is None else prop.clean(cmptType, value, fhandler)
+        return settings
+
+
+# Schema of the Waves components, shared by the whole program
+SCHEMA = ComponentSchema()
@@ -0,0 +1,76 @@
+""" Editor State
+
+State of a project while it is created or modified in the editor, one per user session:
+- projectInfo : Contains the information of installation: project name, description etc.
+- clusterInfo : Information about the hosts and IPs 
+- workflow    : List of components and list of links
+- metrics     : Monitoring parameters
+- clock       : Acceleration parameters
+- cmptCounter : Number of current added components, used for automatic setting the id
+
+"""
+
+from services.model.ProjectInfo import ProjectInfo
+from services.model.ClusterInfo import ClusterInfo
+from services.model.Workflow import Workflow
+from services.model.Metrics import Metrics
+from services.model.Clock import Clock
+
+class EditorState(object):
+    
+    def __init__(self, projectInfo=None, clusterInfo=None, 
+                 workflow=None, metrics=None, clock=None, cmptCounter=0):
+        self.projectInfo = projectInfo if projectInfo is not None else ProjectInfo()
+        self.clusterInfo = clusterInfo if clusterInfo is not None else ClusterInfo()
+        self.workflow    = workflow    if workflow    is not None else Workflow()
+        self.metrics     = metrics     if metrics     is not None else Metrics()
+        self.clock       = clock       if clock       is not None else Clock()
+        self.cmptCounter = cmptCounter
+    
+    def to_dict(self):
+        """ Parse information -> python dictionary
+
+        :return: python dictionary which contains the information of model
+        """
+        
+        info = {}
+        
+        info['projectInfo'] = self.projectInfo.to_dict()
+        info['clusterInfo'] = self.clusterInfo.to_dict()
+        info['workflow']    = self.workflow.to_ref_dict()
+        info['revision']    = self.workflow.revision
+        info['metrics']     = self.metrics.to_dict()
+        info['clock']       = self.clock.to_dict()
+        info['cmptCounter'] = self.cmptCounter
+        
+        return info
+    
+    def parse_from_dict(self, info):
+        """ From python dictionary fetch information and build this object
+
+        :param info: python dictionary that contains the key-value format of the object
+        :return: Object that contains the information of json
+        """
+        
+        state = EditorState()
+        
+        state.projectInfo = ProjectInfo().parse_from_dict( info['projectInfo'] )
+        state.clusterInfo = ClusterInfo().parse_from_dict( info['clusterInfo'] )
+        state.workflow    = Workflow()   .parse_from_dict( info['workflow']    )
+        state.metrics     = Metrics()    .parse_from_dict( info['metrics']     )
+        state.clock       = Clock()      .parse_from_dict( info['clock']       )
+        state.cmptCounter = info['cmptCounter']
+        
+        state.workflow.revision = info['revision']
+        
+        return state
+    
+    def estimate_size(self):
+        """ Rough estimation of the memory used by the state in bytes
+
+        The estimation only counts the components and links, so that it costs nothing
+        even for large workflows.
+
+        :return: estimated size in bytes
+        """
+        return 2048 + 1024 * len(self.workflow._cmpts) + 256 * len(self.workflow._links)
@@ -6,6 +6,11 @@ Three informations are needed in a Link:
 - trgCmpt : Target Component
 - settings : Settings related with link, in our case, it's only for window span between RDF Stream and Filter 
 
+A link can be written in two formats:
+- to_dict     : (v1) full copies of the source and target components
+- to_ref_dict : (v2) ids of the source and target components, which are resolved
+                against the components of the workflow when the link is read back
+
 """
 
 from services.model.Component import Component
@@ -58,4 +63,52 @@ class Link(object):
         link.trgCmpt    = trgCmpt
         link.settings   = info['settings'] 
         
-        return link
\ No newline at end of file
+        return link
+    
+    def to_ref_dict(self):
+        """ Parse information -> python dictionary referring to the components by id
+
+        :return: python dictionary which contains the information of model
+        """
+        
+        info = {}
+        
+        info['srcCmptId']   = self.srcCmpt.id
+        info['trgCmptId']   = self.trgCmpt.id
+        info['settings']    = self.settings
+        
+        return info
+    
+    def parse_from_ref_dict(self, info, cmpts):
+        """ From python dictionary referring to components by id build this object
+
+        :param info: python dictionary written by to_ref_dict
+        :param cmpts: dictionary of component id -> component of the workflow
+        :return: Object that contains the information of json
+        """
+        
+        link = Link()
+        
+        link.srcCmpt    = cmpts[info['srcCmptId']]
+        link.trgCmpt    = cmpts[info['trgCmptId']]
+        link.settings   = info['settings']
+        
+        return link
+    
+    def upgrade_dict(self, info):
+        """ Convert a link dictionary written by to_dict (v1) into the to_ref_dict format (v2)
+
+        :param info: python dictionary in v1 or v2 format
+        :return: python dictionary in v2 format
+        """
+        
+        if 'srcCmptId' in info:
+            return info
+        
+        ref_info = {}
+        
+        ref_info['srcCmptId']   = info['srcCmpt']['id']
+        ref_info['trgCmptId']   = info['trgCmpt']['id']
+        ref_info['settings']    = info['settings']
+        
+        return ref_info
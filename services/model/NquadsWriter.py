@@ -0,0 +1,74 @@
+""" N-Quads Writer
+
+Native N-Quads writer for the Waves configuration, used by Project.iter_nquads. Each statement is
+a whole line, the uris are absolute and the blank nodes have labels:
+
+    <http://localhost:9091/waves/versailles/filter/2> <http://www.waves-rsp.org/configuration#id> "2"^^<http://www.w3.org/2001/XMLSchema#int> <http://localhost:9091/waves/demo> .
+
+so the lines can be written as soon as they are generated, and a file can be split, concatenated
+or searched line by line.
+
+The statements are the ones of the TriG written by TrigWriter: the relative uris of the TriG are
+resolved against its second base, see TrigWriter.RESOLVED_BASE, so the uris of the components
+are the same in both files.
+
+"""
+
+import re
+
+from services.model.TrigWriter import WAVES_NS, RDF_NS, RDFS_NS, XSD_NS, RESOLVED_BASE, bnode_label
+
+# Characters to escape in a string literal
+_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+_TO_ESCAPE = re.compile(r'[\\"\n\r]')
+
+class NquadsTerms(object):
+
+    TYPE  = '<' + RDF_NS + 'type>'
+    LABEL = '<' + RDFS_NS + 'label>'
+
+    def __init__(self, base_str):
+        """ Initial function
+
+        :param base_str: base uri of the project, the uris inside it get the resolved base instead
+        """
+        self.base_str = base_str
+        self._waves   = {}
+
+    def uri(self, uri):
+        """ Term of an uri
+
+        :param uri: absolute uri
+        :return: <uri>
+        """
+        if uri.startswith(self.base_str) and len(uri) > len(self.base_str):
+            uri = RESOLVED_BASE + uri[len(self.base_str):]
+        return '<' + uri + '>'
+
+    def waves(self, name):
+        """ Term of an uri in the waves namespace """
+        term = self._waves.get(name)
+        if term is None:
+            term = self._waves[name] = '<' + WAVES_NS + name + '>'
+        return term
+
+    def literal(self, value, datatype=None):
+        """ Term of a literal
+
+        :param value: value of the literal, written as it is
+        :param datatype: local name of a xsd datatype, i.e. int, duration
+        :return: literal string
+        """
+        term = '"' + _TO_ESCAPE.sub(lambda m: _ESCAPES[m.group(0)], str(value)) + '"'
+        if datatype is not None:
+            term = term + '^^<' + XSD_NS + datatype + '>'
+        return term
+
+    def bnode(self, label):
+        """ Term of a blank node, see TrigWriter.bnode_label """
+        return '_:' + bnode_label(label)
+
+
+def format_quad(s, p, o, graph):
+    """ Line of a statement made of NquadsTerms """
+    return s + ' ' + p + ' ' + o + ' ' + graph + ' .\n'
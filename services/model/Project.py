@@ -1,12 +1,30 @@
-from rdflib import Graph, Literal, BNode, Namespace, RDF, URIRef
-from rdflib.namespace import XSD, RDFS
-from decimal import Decimal
+import hashlib
+import io
+import json
 
+from services.config import TrigSetting
 from services.model.ProjectInfo import ProjectInfo
 from services.model.ClusterInfo import ClusterInfo
 from services.model.Workflow import Workflow
+from services.model.Link import Link
 from services.model.Metrics import Metrics
 from services.model.Clock import Clock
+from services.model.TrigWriter import TrigWriter, NativeTerms, format_block, bnode_label, WAVES_NS, XSD_NS, RESOLVED_BASE
+from services.model.NquadsWriter import NquadsTerms, format_quad
+from services.model.ComponentSchema import SCHEMA, LABEL, IGNORED, MULTI_VALUE_SEPARATOR
+from services.model.TrigImporter import TrigImporter
+from services.model.TrigReader import StatementTerms
+
+# Version of the project json file written by to_ref_dict
+#   1 : links contain full copies of their source and target components
+#   2 : links refer to their source and target components by id
+FORMAT_VERSION = 2
+
+# Components written as blank nodes
+BLANK_NODE_TYPES  = ["RdfStore", "SparqlFeed", "RdfFeed", "RSSFeed", \
+                     "FacebookFeed", "TwitterFeed", "OpenDataFeed"]
+# Components written with the type Filter
+FILTER_TYPES      = ['Filter', 'Strider', 'DRSS']
 
 class Project(object):
     
@@ -35,6 +53,43 @@ class Project(object):
         
         return info
     
+    def to_ref_dict(self):
+        
+        """ Parse information -> python dictionary in the project file format (v2)
+
+        Same as to_dict, except that the links refer to the components by id
+        and the dictionary carries the format version.
+
+        :return: python dictionary which contains the information of model
+        """
+        
+        info = self.to_dict()
+        
+        info['version']     = FORMAT_VERSION
+        info['workflow']    = self.workflow.to_ref_dict()
+        
+        return info
+    
+    def upgrade_dict(self, info):
+        """ Upgrade a project dictionary read from a project file to the current format
+
+        :param info: python dictionary in any supported format version
+        :return: python dictionary in the current format version
+        """
+        
+        if info.get('version', 1) >= FORMAT_VERSION:
+            return info
+        
+        link = Link()
+        
+        info = dict(info)
+        info['version']     = FORMAT_VERSION
+        info['workflow']    = dict(info['workflow'])
+        info['workflow']['link_list'] = [link.upgrade_dict( link_dict ) 
+                                         for link_dict in info['workflow']['link_list']]
+        
+        return info
+    
     def parse_from_dict(self, info):
         """ From python dictionary fetch information and build this object
 
@@ -58,20 +113,266 @@ class Project(object):
         
         return project
     
-    def parse_trig(self):
+    def parse_from_trig(self, stream):
+        """ From a TriG configuration fetch information and build this object
+
+        The statements are read one by one, see services.model.TrigImporter
+
+        :param stream: text stream of the TriG, i.e. opened waves.trig file
+        :return: Object that contains the information of the TriG
+        :raise ValueError: if the TriG is not valid or has no installation
+        """
+        
+        importer = TrigImporter().load(stream)
+        
+        return Project(importer.projectInfo, importer.clusterInfo, 
+                       importer.workflow, importer.metrics, importer.clock)
+    
+    def parse_trig(self, cache=None, engine=None):
+        """ Parse the project -> TriG string
+
+        :param cache: TrigCache, only used by the native engine, see write_trig
+        :param engine: "native" or "rdflib", TrigSetting.engine by default
+        :return: TriG string
+        """
+        
+        if engine is None:
+            engine = TrigSetting.engine
+        
+        if engine == 'rdflib':
+            return self._parse_trig_rdflib()
+        
+        stream = io.StringIO()
+        self.write_trig(stream, cache=cache, engine=engine)
+        return stream.getvalue()
+    
+    def write_trig(self, stream, cache=None, engine=None):
+        """ Write the project as TriG to a text stream
+        
+        With the native engine the TriG is written block by block while the triples are generated:
+            - one for the installation, the cluster, the metrics and the clock
+            - one for each component, with its settings
+            - one for each link, with the triples that connect the two components
+        With a cache, the block of a component or a link is kept in it, keyed by a hash of what 
+        it is generated from, so only the components and links that changed since the last call 
+        are generated again.
+        
+        The result is the same graph as the one of the rdflib engine, except that the subjects 
+        may be split over several blocks and blank nodes are written with labels instead of [ ].
+        The labels are made from the ids of the components, i.e. _:F-3_S-1, and the triples are 
+        written in the order of the workflow and of the setting names, so the same project is 
+        always written as the same bytes.
+
+        :param stream: text stream, i.e. opened file, io.StringIO
+        :param cache: TrigCache, optional
+        :param engine: "native" or "rdflib", TrigSetting.engine by default
+        """
+        
+        if engine is None:
+            engine = TrigSetting.engine
+        
+        if engine == 'rdflib':
+            stream.write( self._parse_trig_rdflib() )
+            return
+        if engine != 'native':
+            raise ValueError('Unknown TriG engine ' + engine)
+        
+        def cached(key_parts, build):
+            return build() if cache is None else cache.get(_hash_key(*key_parts), build)
+        
+        base_str = self._base_str()
+        terms    = NativeTerms(base_str)
+        writer   = TrigWriter(stream, base_str, self._graph_uri())
+        installation = terms.uri(base_str + "installation")
+        
+        writer.write_header()
+        
+        # SETP 1, 2, 4 & 5: Project info, cluster info, metrics and clock are small and 
+        # the creation date changes at each call, no need to cache them
+        writer.write_triples( self._installation_triples(terms, installation) + 
+                              self._metrics_clock_triples(terms, installation) + 
+                              self._imported_triples(terms, base_str) )
+        
+        # STEP 3: Components
+        cmpt_nodes = {}
+        for cmpt in self.workflow.cmpt_list:
+            key_parts = ('cmpt', base_str, cmpt.id, cmpt.cmptType, cmpt.settings)
+            
+            def build():
+                node = self._cmpt_node(terms, cmpt, base_str)
+                return node, format_block(self._cmpt_triples(terms, cmpt, node, installation, base_str))
+            
+            node, block = cached(key_parts, build)
+            cmpt_nodes[cmpt] = node
+            writer.write_block( block )
+        
+        # Links
+        for link in self.workflow.link_list:
+            srcNode = cmpt_nodes[link.srcCmpt]
+            trgNode = cmpt_nodes[link.trgCmpt]
+            key_parts = ('link', base_str, srcNode, trgNode, 
+                         link.srcCmpt.id, link.srcCmpt.cmptType, link.srcCmpt.settings.get('id'),
+                         link.trgCmpt.id, link.trgCmpt.cmptType, link.trgCmpt.settings.get('id'),
+                         link.settings)
+            
+            def build():
+                return format_block(self._link_triples(terms, link, srcNode, trgNode))
+            
+            writer.write_block( cached(key_parts, build) )
+        
+        writer.write_footer()
+    
+    def iter_triples(self, terms=None):
+        """ Generate the triples of the project one by one, in the order of the TriG: the 
+        installation, the metrics and the clock, then each component and each link
+        
+        Nothing is kept but the node of each component.
+        
+        :param terms: term factory built with the base uri of the project, i.e. NquadsTerms, 
+            by default the terms of TrigReader, to compare the project with a TriG file
+        :return: generator of (subject, predicate, object)
+        """
+        
+        base_str = self._base_str()
+        if terms is None:
+            terms = StatementTerms(base_str)
+        installation = terms.uri(base_str + "installation")
+        
+        for triple in self._installation_triples(terms, installation) + \
+                      self._metrics_clock_triples(terms, installation) + \
+                      self._imported_triples(terms, base_str):
+            yield triple
+        
+        cmpt_nodes = {}
+        for cmpt in self.workflow.cmpt_list:
+            node = cmpt_nodes[cmpt] = self._cmpt_node(terms, cmpt, base_str)
+            for triple in self._cmpt_triples(terms, cmpt, node, installation, base_str):
+                yield triple
+        
+        for link in self.workflow.link_list:
+            for triple in self._link_triples(terms, link, cmpt_nodes[link.srcCmpt], cmpt_nodes[link.trgCmpt]):
+                yield triple
+    
+    def iter_nquads(self):
+        """ Generate the project as N-Quads, one line per statement
+        
+        The lines are generated one by one while the triples are, see iter_triples, so they can 
+        be streamed to a file or a response, see services.model.NquadsWriter
+        
+        :return: generator of N-Quads lines, each ends with a new line
+        """
+        
+        graph = '<' + self._graph_uri() + '>'
+        for s, p, o in self.iter_triples(NquadsTerms(self._base_str())):
+            yield format_quad(s, p, o, graph)
+    
+    def write_nquads(self, stream):
+        """ Write the project as N-Quads to a text stream, see iter_nquads
+
+        :param stream: text stream, i.e. opened file
+        """
+        
+        for line in self.iter_nquads():
+            stream.write(line)
+    
+    def _parse_trig_rdflib(self):
+        """ Parse the project -> TriG string, with a rdflib Graph 
+        
+        rdflib is only imported here, the native engine does not need it
+        """
+        from rdflib import Graph, Namespace, URIRef
+        
         # Init a graph
         g = Graph()
+        terms = _RdflibTerms()
         
         # Handle Namespaces
-        waves = Namespace("http://www.waves-rsp.org/configuration#")
+        base_str = self._base_str()
         
-        waves_str = "http://www.waves-rsp.org/configuration#"
-        base_str = "http://localhost:9091/waves/" + self.projectInfo.name + "/"
+        g.bind('waves', WAVES_NS)
         
-        g.bind('waves', waves_str)
+        # SETP 1 & 2: Parse project info and cluster info
+        installation = URIRef(base_str + "installation")
+        for triple in self._installation_triples(terms, installation):
+            g.add( triple )
+        
+        # STEP 3: Add Workflow Info
+        # cmpt_nodes is for the following linkage usage
+        cmpt_nodes = {}
+        for cmpt in self.workflow.cmpt_list:
+            node = self._cmpt_node(terms, cmpt, base_str)
+            cmpt_nodes[cmpt] = node
+            for triple in self._cmpt_triples(terms, cmpt, node, installation, base_str):
+                g.add( triple )
+        
+        # Iterate links to add linkage information and linkage settings
+        for link in self.workflow.link_list:
+            for triple in self._link_triples(terms, link, cmpt_nodes[link.srcCmpt], cmpt_nodes[link.trgCmpt]):
+                g.add( triple )
+        
+        # SETP 4 & 5: Parse Metrics and Clock info
+        for triple in self._metrics_clock_triples(terms, installation) + self._imported_triples(terms, base_str):
+            g.add( triple )
+            
+        serialize_result = g.serialize(format='trig', base=Namespace(base_str), encoding='utf-8').decode('utf-8')
+        
+        # The rdflib api has a bug with base uri & graph uri
+        # The generated string is like this:
+        #
+        # @prefix ns1: <http://www.waves-rsp.org/configuration#> .
+        # ...
+        # @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+        #
+        # _:N1567dc0bb37d47e6926ac110de3235fa {
+        #       <installation> a ns1:Installation ;
+        # ...
+        # }
+        #
+        # Need to do some small string replacement for add the base uri
+        # I have tried many times but the base uri is always not working so have to do the replacement
+        
+        # rdflib >= 6 only writes the uris without "/" after the base as relative uris, i.e. 
+        # <http://localhost:9091/waves/NAME/filter/3>, write them all relative as rdflib 5 does
+        lines = [line if line.startswith('@base') else line.replace('<' + base_str, '<')
+                 for line in serialize_result.split('\n')]
+        length = len(lines)
+        
+        for index, line in enumerate(lines):
+            if index > 0 and index < length-1:
+                # Judge by lines to see if the string need to be changed
+                prev_line = lines[index-1]
+                curr_line = lines[index]
+                next_line = lines[index+1]
+                
+                # Conditions
+                # 1: previous line has prefix value
+                # 2: current line is empty
+                # 3: Next line contains "{"
+                if "prefix" in prev_line and not curr_line and "{" in next_line:
+                    lines[index+1] = "<http://localhost:9091/waves/" + self.projectInfo.name + "> {"
+                    lines.insert( index, "@base <http://localhost:9091/waves/versailles/> .")
+        
+        trig = '\n'.join(lines)
+
+        # TODO: Replace '\r\n' with '\n' in TriG string
+
+        return trig
+    
+    """
+        Triples of each part of the project
+    """
+    
+    def _base_str(self):
+        """ Base uri of the project """
+        return "http://localhost:9091/waves/" + self.projectInfo.name + "/"
+    
+    def _graph_uri(self):
+        """ Uri of the named graph of the project """
+        return "http://localhost:9091/waves/" + self.projectInfo.name
+    
+    def _installation_triples(self, t, installation):
+        """ Triples of the project info and cluster info
         
-        # SETP 1: Parse project info
-        """
             Output like :
             #Installation Global Settings
               <installation>
@@ -80,36 +381,68 @@ class Project(object):
                 ..                      ..
                 rdfs:label              "installation" ;
                 ..                      ..
-        """
-        installation = URIRef(base_str + "installation")
-        
-        g.add( (installation, RDF.type,            URIRef(waves.Installation)) )
-        g.add( (installation, RDFS.label,          Literal("installation")) )
-        g.add( (installation, waves.name,          Literal(self.projectInfo.name)) )
-        g.add( (installation, waves.description,   Literal(self.projectInfo.description)) )
-        g.add( (installation, waves.license,       Literal(self.projectInfo.license)) )
-        g.add( (installation, waves.version,       Literal(self.projectInfo.version)) )
-        g.add( (installation, waves.createdAt,     Literal(self.projectInfo.createdAt)) )
-        
-        # SETP 2: Parse cluster info
-        """
-            Output like :
-                ..                      ..
                 waves:zookeeperHosts    "localhost:port" ;
                 waves:redisHost         "localhost:port" ;
                 waves:mongoHost         "localhost:port" ;
                 waves:influxHost        "localhost:port" ;
         """
-        g.add( (installation, waves.redisHost,     Literal(self.clusterInfo.redisHost) ) )
-        g.add( (installation, waves.mongoHost,     Literal(self.clusterInfo.mongoHost) ) )
-        g.add( (installation, waves.influxHost,    Literal(self.clusterInfo.influxHost) ) )
+        triples = []
+        
+        triples.append( (installation, t.TYPE,                       t.waves('Installation')) )
+        triples.append( (installation, t.LABEL,                      t.literal("installation")) )
+        triples.append( (installation, t.waves('name'),              t.literal(self.projectInfo.name)) )
+        triples.append( (installation, t.waves('description'),       t.literal(self.projectInfo.description)) )
+        triples.append( (installation, t.waves('license'),           t.literal(self.projectInfo.license)) )
+        triples.append( (installation, t.waves('version'),           t.literal(self.projectInfo.version)) )
+        triples.append( (installation, t.waves('createdAt'),         t.literal(self.projectInfo.createdAt)) )
+        
+        triples.append( (installation, t.waves('redisHost'),         t.literal(self.clusterInfo.redisHost) ) )
+        triples.append( (installation, t.waves('mongoHost'),         t.literal(self.clusterInfo.mongoHost) ) )
+        triples.append( (installation, t.waves('influxHost'),        t.literal(self.clusterInfo.influxHost) ) )
         for zookeeperHost in self.clusterInfo.zookeeperHosts:
-            g.add( (installation, waves.zookeeperHosts , Literal(zookeeperHost) ) )
+            triples.append( (installation, t.waves('zookeeperHosts') , t.literal(zookeeperHost) ) )
         for kafkaHost in self.clusterInfo.kafkaHosts:
-            g.add( (installation, waves.kafkaHosts , Literal(kafkaHost) ) )
+            triples.append( (installation, t.waves('kafkaHosts') , t.literal(kafkaHost) ) )
         
-        # STEP 3: Add Workflow Info
+        return triples
+    
+    def _cmpt_node(self, t, cmpt, base_str):
+        """ Node of a component 
+        
+            Output like :
+                - <componentType/wavesId>
+                - or a blank node for the stores and feeds, labelled with the component id 
+                  i.e. _:sparqlFeed-cmpt_4
+                - or the node it was imported with, see services.model.TrigImporter
         """
+        
+        lower_first = lambda s: s[:1].lower() + s[1:] if s else ''
+        
+        imported = cmpt.settings.get('trig')
+        if imported is not None:
+            if imported['node'] is None:
+                return t.bnode(lower_first(cmpt.cmptType) + '-' + str(cmpt.id))
+            return t.uri(base_str + imported['node'])
+        
+        if cmpt.cmptType in BLANK_NODE_TYPES:
+            return t.bnode(lower_first(cmpt.cmptType) + '-' + str(cmpt.id))
+        
+        # For Filter, Strider and DRSS, they all have the same component type Filter
+        if cmpt.cmptType in FILTER_TYPES:
+            name = 'filter'
+        else:
+            # Lower case first letter
+            name = lower_first(cmpt.cmptType)
+        if 'id' in cmpt.settings:
+            # Appendix ex. : <stream/1>
+            appendix = cmpt.settings['id']
+            return t.uri(base_str + name + '/' + appendix)
+        else:
+            return t.uri(base_str + name)
+    
+    def _cmpt_triples(self, t, cmpt, node, installation, base_str):
+        """ Triples of a component and its settings
+        
             Output like :
                 - N component each component like :
                 <componentType/wavesId>
@@ -129,77 +462,44 @@ class Project(object):
                     waves:consumesStreams   _:FId_SId ;
                     waves:staticFeed        _:bx ;
         """
+        triples = []
         
-        blank_node_types = ["RdfStore", "SparqlFeed", "RdfFeed", "RSSFeed", \
-                            "FacebookFeed", "TwitterFeed", "OpenDataFeed"]
-        duration_props   = ["stepRate", "duration", "frequency", "windowSpan", \
-                            "refreshInterval", "eventRate", "allowedDuration", "initTime"]
-        datetime_props   = ["startDate", "endDate"]
-        time_props       = ["allowedDuration", "initTime"]
-        integer_props    = ["numTasks", "workers", "id", "samplingParameter", \
-                            "broadcastThreshold", "concurrentJobs", "numberRepartitions", "shuffledPartitions"]
-        double_props     = []
-
-        # Iterate to attach configuration parameters to component 
-        # cmpt_nodes is for the following linkage usage
-        cmpt_nodes = {}
-        for cmpt in self.workflow.cmpt_list:
-            
-            lower_first = lambda s: s[:1].lower() + s[1:] if s else ''
-            
-            if cmpt.cmptType in blank_node_types:
-                node = BNode()
-            else:
-                # For Filter, Strider and DRSS, they all have the same component type Filter
-                if cmpt.cmptType in ['Filter', 'Strider', 'DRSS']:
-                    name = 'filter'
-                else:
-                    # Lower case first letter
-                    name = lower_first(cmpt.cmptType)
-                if 'id' in cmpt.settings:
-                    # Appendix ex. : <stream/1>
-                    appendix = cmpt.settings['id']
-                    node = URIRef(base_str + name + '/' + appendix)
-                else:
-                    node = URIRef(base_str + name)
-                # Add installation
-                g.add( (node, waves.installation , installation ) )
-            
-            cmpt_nodes[cmpt] = node
-            
-            # Add type for each component
-            if cmpt.cmptType in ['Filter', 'Strider', 'DRSS']:
-                # For Filter, Strider and DRSS, they all have the same component type Filter
-                g.add((node, RDF.type, URIRef(waves_str + 'Filter')))
-            else:
-                g.add( (node, RDF.type , URIRef(waves_str + cmpt.cmptType ) ) )
-            
-            # Iterate each settings to add into configuration
-            for key, value in cmpt.settings.items():
-                if key == "label":
-                    g.add( (node, RDFS.label, Literal(value) ) )
-                elif key in duration_props:
-                    g.add( (node, URIRef(waves_str + key ), Literal(value, datatype=XSD.duration) ) )
-                elif key in datetime_props:
-                    g.add( (node, URIRef(waves_str + key ), Literal(value, datatype=XSD.dateTime) ) )
-                elif key in time_props:
-                    g.add((node, URIRef(waves_str + key), Literal(value, datatype=XSD.time)))
-                elif key in integer_props:
-                    g.add( (node, URIRef(waves_str + key ), Literal(value, datatype=XSD.int) ) )
-                elif key in double_props:
-                    g.add( (node, URIRef(waves_str + key ), Literal(value, datatype=XSD.double) ) )
-                elif key == "cmpt_type":
-                    pass # do nothing
-                elif key in ["locations", "pages", "hashTags"]:
-                    for v in value.split(" || "):
-                        g.add( (node, URIRef(waves_str + key ), Literal(v) ) )
-                else:
-                    g.add( (node, URIRef(waves_str + key ), Literal(value) ) )
-        
-        # print( self.workflow.link_list )        
+        # What the settings of an imported component cannot tell, see services.model.TrigImporter
+        imported = cmpt.settings.get('trig', {})
+        
+        if imported.get('installation', cmpt.cmptType not in BLANK_NODE_TYPES):
+            # Add installation
+            triples.append( (node, t.waves('installation') , installation ) )
+        
+        # Add type for each component
+        if cmpt.cmptType in FILTER_TYPES:
+            # For Filter, Strider and DRSS, they all have the same component type Filter
+            triples.append( (node, t.TYPE, t.waves('Filter')) )
+        else:
+            triples.append( (node, t.TYPE , t.waves(cmpt.cmptType) ) )
+        
+        # Iterate each settings to add into configuration, in the order of their names so the 
+        # order in which they were saved does not matter
+        # The kind of each setting is given by the compiled table of the component type
+        table = SCHEMA.get_table(cmpt.cmptType)
+        datatypes = imported.get('datatypes', {})
+        for key, value in sorted(cmpt.settings.items()):
+            prop = table.get(key)
+            if prop is not None and prop.kind == IGNORED:
+                continue
+            pred = t.LABEL if prop is not None and prop.kind == LABEL else t.waves(key)
+            for v, datatype in _typed_values(prop, value, datatypes.get(key)):
+                triples.append( (node, pred, t.literal(v, datatype) ) )
+        
+        # The other statements of an imported component, i.e. a stream that is not a component
+        for predicate, term in imported.get('statements', []):
+            triples.append( (node, _imported_term(t, base_str, ['uri', predicate]), _imported_term(t, base_str, term)) )
+        
+        return triples
+    
+    def _link_triples(self, t, link, srcNode, trgNode):
+        """ Triples of a link between two components
         
-        # Iterate links to add linkage information and linkage settings
-        """
             Add properties for connection between components :
                 - waves:consumesStreams   _:FId_SId
                 -  [
@@ -208,105 +508,171 @@ class Project(object):
                     - waves:windowSpan	"PT900S"^^xsd:duration
                 ]
         """
-        for link in self.workflow.link_list:
+        imported = link.settings.get('trig')
+        if imported is not None:
+            return self._imported_link_triples(t, link, imported, srcNode, trgNode)
+        
+        triples = []
+        
+        srcCmpt = link.srcCmpt
+        trgCmpt = link.trgCmpt
+        
+        if srcCmpt.cmptType == 'Stream' and trgCmpt.cmptType in ["Filter", "Strider"]:
             
-            srcCmpt = link.srcCmpt
-            trgCmpt = link.trgCmpt
-            srcNode = cmpt_nodes[srcCmpt]
-            trgNode = cmpt_nodes[trgCmpt]
+            # Add label, label equals {FILTER_ID}_{STREAM_ID} ex. : F-3_S-1
+            b_label = ''
+            if 'id' in trgCmpt.settings and 'id' in srcCmpt.settings:
+                b_label = 'F-' + trgCmpt.settings['id'] + '_' + 'S-' + srcCmpt.settings['id']
             
-            if srcCmpt.cmptType == 'Stream' and trgCmpt.cmptType in ["Filter", "Strider"]:
-                
-                # Use a blank node to save the connection and give window span settings
-                bnode = BNode()
-                # Add connections
-                g.add( (bnode, waves.stream, srcNode ) )
-                g.add( (trgNode, waves.consumesStream, bnode ) )
-                
-                # Add label, label equals {FILTER_ID}_{STREAM_ID} ex. : F-3_S-1
-                b_label = ''
-                if 'id' in trgCmpt.settings and 'id' in srcCmpt.settings:
-                    b_label = 'F-' + trgCmpt.settings['id'] + '_' + 'S-' + srcCmpt.settings['id']
-                g.add( (bnode, RDFS.label, Literal(b_label) ) )
-                # Add settings
-                for key, value in link.settings.items():
-                    g.add( (bnode, URIRef(waves_str + key ), Literal(value) ) )
+            # Use a blank node to save the connection and give window span settings
+            # The blank node has the same label, or the component ids of the link without waves ids
+            bnode = t.bnode(b_label or 'W-' + str(trgCmpt.id) + '_' + str(srcCmpt.id))
+            # Add connections
+            triples.append( (bnode, t.waves('stream'), srcNode ) )
+            triples.append( (trgNode, t.waves('consumesStream'), bnode ) )
             
-            if srcCmpt.cmptType in ['Stream'] :
-                g.add( (trgNode, waves.consumesStreams, srcNode ) )
-            elif srcCmpt.cmptType in ['RawStream'] :
-                g.add( (trgNode, waves.consumesStream, srcNode ) )
-            elif trgCmpt.cmptType in ['Stream', 'RawStream'] :
-                g.add( (srcNode, waves.producesStream, trgNode ) )
-            elif srcCmpt.cmptType == 'RdfStore' and trgCmpt.cmptType == "Filter":
-                g.add( (trgNode, waves.rdfStore, srcNode ) )
-            elif srcCmpt.cmptType == 'Sink' and trgCmpt.cmptType == "RdfStore":
-                g.add((srcNode, waves.rdfStore, trgNode))
-            elif srcCmpt.cmptType in ['SparqlFeed', 'RdfFeed'] and trgCmpt.cmptType == "Filter":
-                g.add( (trgNode, waves.staticFeed, srcNode ) )
-            elif trgCmpt.cmptType == "Scouter":
-                g.add( (trgNode, waves.staticFeed, srcNode ) )
-            elif srcCmpt.cmptType == 'AnomalyDetection' and trgCmpt.cmptType == "RdfStore":
-                g.add((srcNode, waves.store, trgNode))
-            else:
-                # Temporal use linksTo predicate for connection of nodes
-                g.add( (srcNode, waves.linksTo, trgNode ) )
-        
-        # SETP 4: Parse Metrics info
-        metrics = BNode()
-        g.add( (installation, waves.metrics , metrics) )
-        g.add( (metrics, waves.frequency , Literal(self.metrics.frequency, datatype=XSD.duration) ) )
-        g.add( (metrics, waves.reporters , Literal(self.metrics.reporters) ) )
-        
-        # SETP 5: Parse Clock info
-        clock = BNode()
-        g.add( (installation, waves.clock , clock) )
-        g.add( (clock, waves.localTimeZone , Literal(self.clock.localTimeZone) ) )
-        if self.clock.localTimeZone == "True":
-            g.add( (clock, waves.startDate , Literal(self.clock.startDate, datatype=XSD.dateTime) ) )
-            g.add( (clock, waves.endDate ,   Literal(self.clock.endDate, datatype=XSD.dateTime) ) )
-            g.add( (clock, waves.duration ,  Literal(self.clock.duration, datatype=XSD.duration) ) )
+            triples.append( (bnode, t.LABEL, t.literal(b_label) ) )
+            # Add settings, in the order of their names
+            for key, value in sorted(link.settings.items()):
+                triples.append( (bnode, t.waves(key), t.literal(value) ) )
+        
+        if srcCmpt.cmptType in ['Stream'] :
+            triples.append( (trgNode, t.waves('consumesStreams'), srcNode ) )
+        elif srcCmpt.cmptType in ['RawStream'] :
+            triples.append( (trgNode, t.waves('consumesStream'), srcNode ) )
+        elif trgCmpt.cmptType in ['Stream', 'RawStream'] :
+            triples.append( (srcNode, t.waves('producesStream'), trgNode ) )
+        elif srcCmpt.cmptType == 'RdfStore' and trgCmpt.cmptType == "Filter":
+            triples.append( (trgNode, t.waves('rdfStore'), srcNode ) )
+        elif srcCmpt.cmptType == 'Sink' and trgCmpt.cmptType == "RdfStore":
+            triples.append( (srcNode, t.waves('rdfStore'), trgNode) )
+        elif srcCmpt.cmptType in ['SparqlFeed', 'RdfFeed'] and trgCmpt.cmptType == "Filter":
+            triples.append( (trgNode, t.waves('staticFeed'), srcNode ) )
+        elif trgCmpt.cmptType == "Scouter":
+            triples.append( (trgNode, t.waves('staticFeed'), srcNode ) )
+        elif srcCmpt.cmptType == 'AnomalyDetection' and trgCmpt.cmptType == "RdfStore":
+            triples.append( (srcNode, t.waves('store'), trgNode) )
         else:
-            g.add( (clock, waves.startDate , Literal(self.clock.startDate, datatype=XSD.dateTime) ) )
-            g.add( (clock, waves.acceleration , Literal( self.clock.acceleration, datatype=XSD.float) ) )
-            
-        serialize_result = g.serialize(format='trig', base=Namespace(base_str) ).decode('utf-8')
+            # Temporal use linksTo predicate for connection of nodes
+            triples.append( (srcNode, t.waves('linksTo'), trgNode ) )
         
-        # The rdflib api has a bug with base uri & graph uri
-        # The generated string is like this:
-        #
-        # @prefix ns1: <http://www.waves-rsp.org/configuration#> .
-        # ...
-        # @prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
-        #
-        # _:N1567dc0bb37d47e6926ac110de3235fa {
-        #       <installation> a ns1:Installation ;
-        # ...
-        # }
-        #
-        # Need to do some small string replacement for add the base uri
-        # I have tried many times but the base uri is always not working so have to do the replacement
+        return triples
+    
+    def _imported_link_triples(self, t, link, imported, srcNode, trgNode):
+        """ Triples of a link imported from a TriG, with the predicates it was read from, see 
+            services.model.TrigImporter
+        """
+        triples = []
         
-        lines = serialize_result.split('\n')
-        length = len(lines)
+        nodes = {'src': (srcNode, trgNode), 'trg': (trgNode, srcNode)}
+        for holder, name in imported['predicates']:
+            node, other = nodes[holder]
+            triples.append( (node, t.waves(name), other) )
         
-        for index, line in enumerate(lines):
-            if index > 0 and index < length-1:
-                # Judge by lines to see if the string need to be changed
-                prev_line = lines[index-1]
-                curr_line = lines[index]
-                next_line = lines[index+1]
-                
-                # Conditions
-                # 1: previous line has prefix value
-                # 2: current line is empty
-                # 3: Next line contains "{"
-                if "prefix" in prev_line and not curr_line and "{" in next_line:
-                    lines[index+1] = "<http://localhost:9091/waves/" + self.projectInfo.name + "> {"
-                    lines.insert( index, "@base <http://localhost:9091/waves/versailles/> .")
+        window = imported.get('window')
+        if window is not None:
+            bnode = t.bnode('W-' + str(link.trgCmpt.id) + '_' + str(link.srcCmpt.id))
+            triples.append( (bnode, t.waves('stream'), srcNode ) )
+            triples.append( (trgNode, t.waves(window['predicate']), bnode ) )
+            if window['label'] is not None:
+                triples.append( (bnode, t.LABEL, t.literal(window['label']) ) )
+            for key, value in sorted(link.settings.items()):
+                if key == 'trig':
+                    continue
+                for v, datatype in _typed_values(None, value, window['datatypes'].get(key)):
+                    triples.append( (bnode, t.waves(key), t.literal(v, datatype) ) )
         
-        trig = '\n'.join(lines)
+        return triples
+    
+    def _metrics_clock_triples(self, t, installation):
+        """ Triples of the metrics and the clock, both are blank nodes of the installation """
+        triples = []
+        
+        # Metrics
+        metrics = t.bnode('metrics')
+        triples.append( (installation, t.waves('metrics') , metrics) )
+        triples.append( (metrics, t.waves('frequency') , t.literal(self.metrics.frequency, 'duration') ) )
+        triples.append( (metrics, t.waves('reporters') , t.literal(self.metrics.reporters) ) )
+        
+        # Clock
+        clock = t.bnode('clock')
+        triples.append( (installation, t.waves('clock') , clock) )
+        triples.append( (clock, t.waves('localTimeZone') , t.literal(self.clock.localTimeZone) ) )
+        if self.clock.localTimeZone == "True":
+            triples.append( (clock, t.waves('startDate') , t.literal(self.clock.startDate, 'dateTime') ) )
+            triples.append( (clock, t.waves('endDate') ,   t.literal(self.clock.endDate, 'dateTime') ) )
+            triples.append( (clock, t.waves('duration') ,  t.literal(self.clock.duration, 'duration') ) )
+        else:
+            triples.append( (clock, t.waves('startDate') , t.literal(self.clock.startDate, 'dateTime') ) )
+            triples.append( (clock, t.waves('acceleration') , t.literal( self.clock.acceleration, 'double') ) )
+        
+        return triples
+    
+    def _imported_triples(self, t, base_str):
+        """ Triples of an imported TriG that are not part of the project, i.e. a blank node no 
+            component refers to, see services.model.TrigImporter
+        """
+        return [(_imported_term(t, base_str, s), _imported_term(t, base_str, ['uri', p]), _imported_term(t, base_str, o))
+                for s, p, o in self.projectInfo.trig]
 
-        # TODO: Replace '\r\n' with '\n' in TriG string
 
-        return trig
\ No newline at end of file
+"""
+    Terms of the rdflib engine
+"""
+
+class _RdflibTerms(object):
+    """ Build the terms of the triples as rdflib terms, same methods as TrigWriter.NativeTerms """
+    
+    def __init__(self):
+        import rdflib
+        self.rdflib = rdflib
+        self.TYPE   = rdflib.RDF.type
+        self.LABEL  = rdflib.RDFS.label
+    
+    def uri(self, uri):
+        return self.rdflib.URIRef(uri)
+    
+    def waves(self, name):
+        return self.rdflib.URIRef(WAVES_NS + name)
+    
+    def literal(self, value, datatype=None):
+        if datatype is None:
+            return self.rdflib.Literal(value)
+        return self.rdflib.Literal(value, datatype=self.rdflib.URIRef(XSD_NS + datatype))
+    
+    def bnode(self, label):
+        return self.rdflib.BNode(bnode_label(label))
+
+def _imported_term(t, base_str, term):
+    """ Term of a statement of an imported TriG, see services.model.TrigImporter
+
+    :param term: ["uri", uri], ["bnode", label] or ["literal", value, xsd datatype or None], the 
+        uris are read with the base TrigWriter.RESOLVED_BASE
+    """
+    if term[0] == 'literal':
+        return t.literal(term[1], term[2])
+    if term[0] == 'bnode':
+        return t.bnode(term[1])
+    if term[1].startswith(RESOLVED_BASE) and len(term[1]) > len(RESOLVED_BASE):
+        return t.uri(base_str + term[1][len(RESOLVED_BASE):])
+    return t.uri(term[1])
+
+def _typed_values(prop, value, datatypes=None):
+    """ Values of a setting with their xsd datatype, one literal is written for each of them
+
+    :param prop: Property of the setting, see ComponentSchema, None for a plain setting
+    :param datatypes: xsd datatypes of the values of an imported setting, one per value, they are 
+        kept while the setting has as many values, see services.model.TrigImporter
+    :return: list of (value, datatype)
+    """
+    if datatypes is not None:
+        values = value.split(MULTI_VALUE_SEPARATOR) if len(datatypes) > 1 else [value]
+        if len(values) == len(datatypes):
+            return list(zip(values, datatypes))
+    if prop is None:
+        return [(value, None)]
+    return [(v, prop.datatype) for v in prop.split(value)]
+
+def _hash_key(*parts):
+    """ Hash of the parts a block is generated from """
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
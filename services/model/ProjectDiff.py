@@ -0,0 +1,273 @@
+""" Project Diff
+
+Compare two versions of a project at the level of the triples of their configuration. Each
+version is a Project or a text stream of its TriG, i.e. the saved PROJECT_NAME.trig:
+
+    with open(handler.get_project_trig_path(name)) as saved:
+        diff = ProjectDiff(saved, edited_project)
+    diff.added      # set of triples only in the new version
+    diff.removed    # set of triples only in the old version
+    diff.to_dict()  # the triples grouped by component
+
+The blank nodes have different labels in each version, random ones in the TriG files written
+before they were labelled by the project, so they are replaced by a canonical label computed from
+their content: the hash of a blank node is refined from the hashes of its neighbours, like the
+color refinement of a graph isomorphism test, until the partition of the blank nodes is stable.
+Each round is linear in the number of triples, and the configurations only have shallow blank
+nodes (windows, feeds, stores, metrics and clock), so it takes a few rounds. Blank nodes that
+cannot be told apart, i.e. two stores with the same settings, get the same label. Since the label
+of a blank node is made from its content, a blank node whose settings changed gets another label,
+it is matched with its old version by its type and rdfs:label, or by the node that refers to it,
+so only the settings that changed are reported.
+
+A triple belongs to the component of its subject. The blank nodes without type belong to the
+component that refers to them, i.e. the window of a link belongs to its filter and the clock to
+the installation.
+
+"""
+
+from collections import OrderedDict
+import hashlib
+
+from services.model.TrigReader import TrigReader, Iri, BNode, Literal, RDF_NS
+from services.model.TrigWriter import RESOLVED_BASE, RDFS_NS
+
+RDF_TYPE   = RDF_NS + 'type'
+RDFS_LABEL = RDFS_NS + 'label'
+
+# Rounds of refinement of the blank node hashes, more than the depth of the blank nodes
+MAX_ROUNDS = 8
+
+class ProjectDiff(object):
+
+    def __init__(self, old, new):
+        """ Initial function, compare the two versions
+
+        Params:
+            self.added   : Set of the triples (subject, predicate, object) only in the new version
+            self.removed : Set of the triples only in the old version
+            self._owners : node -> name of the component the triples of the node belong to
+
+        :param old: Project or text stream of a TriG
+        :param new: Project or text stream of a TriG
+        :raise TrigSyntaxError: if a TriG is not valid
+        """
+        old_triples, new_triples = canonical_triples(_triples(old), _triples(new))
+        
+        # A blank node whose content changed has another label in the new version, give it back
+        # its old label so that only the triples that changed are reported
+        renamed = _match_bnodes(old_triples, new_triples)
+        if renamed:
+            new_triples = set( (renamed.get(s, s), p, renamed.get(o, o)) for s, p, o in new_triples )
+
+        self.added   = new_triples - old_triples
+        self.removed = old_triples - new_triples
+        self._owners = _owners(old_triples | new_triples)
+
+    def is_empty(self):
+        """ Check if the two versions have the same triples """
+        return not self.added and not self.removed
+
+    def groups(self):
+        """ Added and removed triples grouped by component
+
+        :return: ordered dictionary component name -> {'added': [triples], 'removed': [triples]},
+            sorted by component name, the triples are sorted too
+        """
+        groups = {}
+        for key, triples in (('added', self.added), ('removed', self.removed)):
+            for triple in triples:
+                name = self._owners.get(triple[0], _name(triple[0]))
+                group = groups.setdefault(name, {'added': [], 'removed': []})
+                group[key].append(triple)
+
+        result = OrderedDict()
+        for name in sorted(groups):
+            result[name] = {key: sorted(triples, key=_line) for key, triples in groups[name].items()}
+        return result
+
+    def to_dict(self):
+        """ Parse information -> python dictionary, the triples are written as N-Triples lines
+
+        :return: python dictionary which contains the information of model
+        """
+
+        info = {}
+
+        info['added']      = len(self.added)
+        info['removed']    = len(self.removed)
+        info['components'] = OrderedDict()
+        for name, group in self.groups().items():
+            info['components'][name] = {key: [_line(triple) for triple in triples]
+                                        for key, triples in group.items()}
+
+        return info
+
+
+def canonical_triples(*versions):
+    """ Replace the labels of the blank nodes by canonical labels, see the module documentation
+
+    The versions are refined together, with the same number of rounds, so the same blank node
+    gets the same label in all of them.
+
+    :param versions: iterables of (subject, predicate, object)
+    :return: list of sets of triples, one per version
+    """
+    versions = [list(triples) for triples in versions]
+
+    # For each version, blank node -> list of (index of the triple, position of the blank node in it)
+    edges = []
+    for triples in versions:
+        version_edges = {}
+        for index, (s, p, o) in enumerate(triples):
+            if isinstance(s, BNode):
+                version_edges.setdefault(s, []).append( (index, 0) )
+            if isinstance(o, BNode):
+                version_edges.setdefault(o, []).append( (index, 2) )
+        edges.append(version_edges)
+
+    colors = [dict.fromkeys(version_edges, '') for version_edges in edges]
+    counts = [1 if version_edges else 0 for version_edges in edges]
+    for _ in range(MAX_ROUNDS):
+        refined = []
+        for triples, version_edges, version_colors in zip(versions, edges, colors):
+            version_refined = {}
+            for node, node_edges in version_edges.items():
+                signature = sorted(_signature(triples[index], position, version_colors)
+                                   for index, position in node_edges)
+                version_refined[node] = _hash(version_colors[node] + '\n' + '\n'.join(signature))
+            refined.append(version_refined)
+        colors = refined
+        # Stop when the refinement doesn't split any group of blank nodes anymore
+        refined_counts = [len(set(version_colors.values())) for version_colors in colors]
+        if refined_counts == counts:
+            break
+        counts = refined_counts
+
+    result = []
+    for triples, version_colors in zip(versions, colors):
+        label = lambda term: BNode('c' + version_colors[term][:16]) if isinstance(term, BNode) else term
+        result.append(set( (label(s), p, label(o)) for s, p, o in triples ))
+    return result
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _triples(version):
+    """ Triples of a version of the project, a Project or a TriG stream """
+    if hasattr(version, 'iter_triples'):
+        return version.iter_triples()
+    return ( (s, p, o) for s, p, o, graph in TrigReader(version).statements() )
+
+def _hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _signature(triple, position, colors):
+    """ Triple seen from one of its blank nodes, the blank nodes are replaced by their color """
+    s, p, o = triple
+    term = lambda t: '_:' + colors[t] if isinstance(t, BNode) else _term(t)
+    if position == 0:
+        return 'out ' + p + ' ' + term(o)
+    return 'in ' + p + ' ' + term(s)
+
+def _term(term):
+    """ N-Triples string of a term """
+    if isinstance(term, BNode):
+        return '_:' + term
+    if isinstance(term, Literal):
+        value = term.value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        if term.lang:
+            return '"' + value + '"@' + term.lang
+        if term.datatype:
+            return '"' + value + '"^^<' + term.datatype + '>'
+        return '"' + value + '"'
+    return '<' + term + '>'
+
+def _line(triple):
+    """ N-Triples line of a triple """
+    return ' '.join(_term(t) for t in triple) + ' .'
+
+def _name(node):
+    """ Name of a component node, i.e. filter/3 """
+    if isinstance(node, Iri) and node.startswith(RESOLVED_BASE):
+        return node[len(RESOLVED_BASE):]
+    return _term(node)
+
+def _match_bnodes(old_triples, new_triples):
+    """ Match the blank nodes only in the new version with the ones only in the old version
+
+    A blank node is matched when it is the only one with the same type and rdfs:label in both
+    versions, or else the only one with the same type referred to by the same node and predicate.
+
+    :return: dictionary new blank node -> old blank node
+    """
+    old_nodes = _describe(old_triples)
+    new_nodes = _describe(new_triples)
+    only_old = set(old_nodes) - set(new_nodes)
+    only_new = set(new_nodes) - set(old_nodes)
+
+    renamed = {}
+    for key in (lambda d: (d['type'], d['label']), lambda d: (d['type'], d['parent'])):
+        old_keys = {}
+        new_keys = {}
+        for nodes, keys, remaining in ((old_nodes, old_keys, only_old), (new_nodes, new_keys, only_new)):
+            for node in remaining:
+                keys.setdefault(key(nodes[node]), []).append(node)
+        for k, new_list in new_keys.items():
+            old_list = old_keys.get(k, [])
+            if len(new_list) == 1 and len(old_list) == 1 and None not in k[1:]:
+                renamed[new_list[0]] = old_list[0]
+                only_new.discard(new_list[0])
+                only_old.discard(old_list[0])
+    return renamed
+
+def _describe(triples):
+    """ Type, rdfs:label and (referring node, predicate) of each blank node, None when it has none """
+    nodes = {}
+    for s, p, o in triples:
+        for node in (s, o):
+            if isinstance(node, BNode) and node not in nodes:
+                nodes[node] = {'type': None, 'label': None, 'parent': None}
+        if isinstance(s, BNode):
+            if p == RDF_TYPE:
+                nodes[s]['type'] = o
+            elif p == RDFS_LABEL and isinstance(o, Literal) and o.value:
+                nodes[s]['label'] = o.value
+        if isinstance(o, BNode):
+            nodes[o]['parent'] = (s, p)
+    return nodes
+
+def _owners(triples):
+    """ Name of the component each node belongs to
+
+    :param triples: set of canonical triples of both versions
+    :return: dictionary node -> component name
+    """
+    types = {}
+    labels = {}
+    parents = {}
+    for s, p, o in triples:
+        if p == RDF_TYPE:
+            types.setdefault(s, o.rsplit('#', 1)[-1])
+        elif p == RDFS_LABEL and isinstance(o, Literal):
+            labels.setdefault(s, o.value)
+        elif isinstance(o, BNode):
+            parents.setdefault(o, s)
+
+    owners = {}
+    for node in set(types) | set(parents):
+        owner = node
+        seen = set()
+        # Up to the first node with a type, or an uri
+        while isinstance(owner, BNode) and owner not in types and owner in parents and owner not in seen:
+            seen.add(owner)
+            owner = parents[owner]
+        if isinstance(owner, BNode) and owner in types:
+            # i.e. SparqlFeed "feed 1"
+            name = types[owner] + (' "' + labels[owner] + '"' if owner in labels else ' ' + _term(owner))
+        else:
+            name = _name(owner)
+        owners[node] = name
+    return owners
@@ -1,4 +1,9 @@
-""" Project Global Information """
+""" Project Global Information
+
+The statements of an imported TriG that are not part of the project are kept in trig, they are
+written back as they were read, see services.model.TrigImporter
+
+"""
 
 class ProjectInfo(object):
     
@@ -8,6 +13,7 @@ class ProjectInfo(object):
         self.license     = license
         self.version     = version
         self.createdAt   = ""
+        self.trig        = []
         
     def to_dict(self):
         
@@ -23,6 +29,7 @@ class ProjectInfo(object):
         info['license']     = self.license
         info['version']     = self.version
         info['createdAt']   = self.createdAt
+        info['trig']        = self.trig
         
         return info
     
@@ -40,5 +47,6 @@ class ProjectInfo(object):
         projectInfo.license     = info['license'] 
         projectInfo.version     = info['version'] 
         projectInfo.createdAt   = info['createdAt'] 
+        projectInfo.trig        = info.get('trig', [])
         
         return projectInfo
\ No newline at end of file
@@ -0,0 +1,52 @@
+""" TriG Cache
+
+Cache of the TriG text generated for each component and link of a project, used by 
+Project.write_trig with the native engine. The entries are keyed by a hash of what the text is generated 
+from (component type, settings etc.), so an entry never needs to be invalidated: a modified 
+component simply gets a new key. The least recently used entries are dropped when there are
+more than maxEntries.
+
+"""
+
+from collections import OrderedDict
+import threading
+
+class TrigCache(object):
+    
+    def __init__(self, maxEntries=100000):
+        self.maxEntries = maxEntries
+        self.hits       = 0
+        self.misses     = 0
+        self._entries   = OrderedDict()
+        self._lock      = threading.Lock()
+    
+    def get(self, key, build):
+        """ Get the cached value of the key, build and cache it if it is not in the cache
+
+        :param key: hash of what the value is generated from
+        :param build: function without argument that generates the value
+        :return: cached value
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        
+        value = build()
+        
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        
+        return value
+    
+    def clear(self):
+        """ Drop all the entries """
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
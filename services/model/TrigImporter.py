@@ -0,0 +1,405 @@
+""" TriG Importer
+
+Rebuild the project information, the components and the links from a TriG configuration, the
+inverse of Project.write_trig. The statements are read one by one with TrigReader and the
+statements of each node are kept until the end of the stream, since a node may be used before it
+is described, i.e. the blank node of a waves:consumesStream. There is no graph:
+
+    importer = TrigImporter()
+    importer.load(stream)
+    importer.workflow   # components and links
+    importer.clock      # and projectInfo, clusterInfo, metrics
+
+The mapping back from the triples is:
+    - the installation node      -> project info, cluster info, its clock and metrics blank nodes
+    - a node with a type         -> component, the type is its component type, i.e. <stream/1>
+                                    a waves:Stream. A node without type but with a waves:installation
+                                    gets the type from its uri, i.e. <source/1> -> Source
+    - a literal of a component   -> setting, rdfs:label is the label, the values of a multi-value
+                                    setting are joined with " || "
+    - a component of a component -> link, i.e. waves:consumesStreams, waves:staticFeed. The blank
+                                    node of waves:consumesStream gives the stream of the link and
+                                    its other properties are the settings of the link, i.e. windowSpan
+
+The TriG is written back as it was read. What the settings cannot tell is kept in the hidden
+setting "trig" of each component and link, see Project._cmpt_node and Project._link_triples:
+    - components : node, i.e. "stream/1i" for <stream/1i> or None for a blank node, whether it
+                   has a waves:installation, the xsd datatype of each value of each setting and
+                   its other statements, i.e. waves:producesStream <stream/6g> when there is no
+                   component <stream/6g>
+    - links      : predicates between the two components, and the predicate, label and xsd
+                   datatypes of the blank node of the window
+The other statements, i.e. waves:local.timezone of the clock or a blank node that no component
+refers to, are kept in ProjectInfo.trig. Each term of these statements is ["uri", uri],
+["bnode", label] or ["literal", value, xsd datatype or None].
+
+The installation, the clock and the metrics are written with all the fields of the project, the
+missing ones get their default value, and the components get their rdf:type and waves:installation.
+A TriG that can not be written back is rejected with a ValueError, i.e. a literal with a language,
+or two names for the installation.
+
+Filter, Strider and DRSS are all written as waves:Filter, they are imported as Filter. The
+components get the html ids "1", "2", .. in the order they appear in the TriG, and are laid out
+on a grid since the TriG has no position.
+
+"""
+
+import re
+
+from services.model.ProjectInfo import ProjectInfo
+from services.model.ClusterInfo import ClusterInfo
+from services.model.Workflow import Workflow
+from services.model.Component import Component
+from services.model.Link import Link
+from services.model.Metrics import Metrics
+from services.model.Clock import Clock
+from services.model.TrigReader import TrigReader, Iri, BNode, Literal, RDF_NS
+from services.model.TrigWriter import WAVES_NS, RDFS_NS, XSD_NS, RESOLVED_BASE
+from services.model.ComponentSchema import MULTI_VALUE_SEPARATOR
+
+RDF_TYPE   = RDF_NS + 'type'
+RDFS_LABEL = RDFS_NS + 'label'
+
+# Predicates of the links where the component holding the predicate is the target, it is the
+# source for the others, i.e. waves:producesStream, waves:store, waves:linksTo
+LINKS_IN   = ['consumesStreams', 'consumesStream', 'staticFeed']
+
+# Literals of the installation, the clock and the metrics -> xsd datatype they are written with,
+# see Project._installation_triples and Project._metrics_clock_triples
+INSTALLATION_PROPS = dict((name, None) for name in ['name', 'description', 'license', 'version',
+                          'createdAt', 'zookeeperHosts', 'kafkaHosts', 'redisHost', 'mongoHost', 'influxHost'])
+CLOCK_PROPS   = {'startDate': 'dateTime', 'endDate': 'dateTime', 'duration': 'duration',
+                 'localTimeZone': None, 'acceleration': 'double'}
+METRICS_PROPS = {'frequency': 'duration', 'reporters': None}
+
+# The only literals written once for each value
+HOSTS_PROPS = ['zookeeperHosts', 'kafkaHosts']
+
+# Local name of a xsd datatype, it is written as xsd:name
+_XSD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+
+# Layout of the imported components
+GRID_COLUMNS = 8
+GRID_LEFT    = 160
+GRID_TOP     = 120
+
+class TrigImporter(object):
+
+    def __init__(self):
+        """ Initial function
+
+        Params:
+            self.projectInfo : ProjectInfo of the installation
+            self.clusterInfo : ClusterInfo of the installation
+            self.workflow    : Workflow with the components and links
+            self.metrics     : Metrics of the installation
+            self.clock       : Clock of the installation
+            self.cmptCounter : Highest waves id of the components, the next component gets the next one
+            self._nodes      : node -> list of (predicate, object), in the order they are read
+            self._types      : node -> local name of its waves type
+            self._labels     : blank node -> label it is written with, i.e. the clock
+            self._kept       : blank nodes written as they were read, see _term
+        """
+        self.projectInfo = ProjectInfo()
+        self.clusterInfo = ClusterInfo(zookeeperHosts=[], kafkaHosts=[])
+        self.workflow    = Workflow()
+        self.metrics     = Metrics()
+        self.clock       = Clock()
+        self.cmptCounter = 0
+        self._nodes      = {}
+        self._types      = {}
+        self._labels     = {}
+        self._kept       = set()
+
+    def load(self, stream):
+        """ Read a TriG configuration and rebuild the project from it
+
+        :param stream: text stream of the TriG
+        :return: this importer
+        :raise TrigSyntaxError: if the stream is not valid TriG
+        :raise ValueError: if there is no installation in the TriG, or if it can not be written
+            back as it was read
+        """
+        graphName = None
+        for s, p, o, graph in TrigReader(stream).statements():
+            if graphName is None:
+                graphName = graph
+            if p == RDF_TYPE and isinstance(o, Iri) and o.startswith(WAVES_NS) and s not in self._types:
+                self._types[s] = o[len(WAVES_NS):]
+            else:
+                self._nodes.setdefault(s, []).append( (p, o) )
+            self._nodes.setdefault(s, [])
+
+        installation = self._find_installation()
+        if installation is None:
+            raise ValueError('No waves:Installation in the TriG')
+        if installation != RESOLVED_BASE + 'installation':
+            raise ValueError('The installation must be <installation>, not <{}>'.format(installation))
+        described = self._load_installation(installation, graphName)
+
+        cmpts = self._load_cmpts(installation)
+        windows = self._load_links(cmpts)
+        described.update(cmpts)
+        described.update(windows)
+
+        # The statements of the other nodes are written as they were read
+        for node, props in self._nodes.items():
+            if node in described:
+                continue
+            if node in self._types:
+                props = [(RDF_TYPE, Iri(WAVES_NS + self._types[node]))] + props
+            for p, o in props:
+                self.projectInfo.trig.append( [self._term(node), p, self._term(o)] )
+
+        if windows & self._kept:
+            raise ValueError('The window {} is used twice, it can not be imported'.format(
+                             ', '.join('_:' + node for node in sorted(windows & self._kept))))
+        return self
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _find_installation(self):
+        for node, cmptType in self._types.items():
+            if cmptType == 'Installation':
+                return node
+        for props in self._nodes.values():
+            for p, o in props:
+                if p == WAVES_NS + 'installation':
+                    return o
+        return None
+
+    def _term(self, node):
+        """ Term of a statement written as it was read, see ProjectInfo.trig
+
+        :raise ValueError: for a component or a window written as a blank node, they are written
+            with other labels, or a literal that can not be written back, see _datatype
+        """
+        if isinstance(node, Literal):
+            return ['literal', node.value, _datatype(node)]
+        if isinstance(node, BNode):
+            if node in self._types:
+                raise ValueError('The component _:{} is used by a statement that is not a link, '
+                                 'it can not be imported'.format(node))
+            self._kept.add(node)
+            return ['bnode', self._labels.get(node, 'trig-' + node)]
+        return ['uri', str(node)]
+
+    def _values(self, node, props, written=()):
+        """ Setting name -> list of values of the literals of the installation, the clock or the
+        metrics, their other statements are kept in the project info
+
+        :param props: setting name -> xsd datatype it is written with, see INSTALLATION_PROPS
+        :param written: other (predicate, object) written by the project, i.e. the rdfs:label
+        :raise ValueError: for a value that would not be written back as it was read
+        """
+        values = {}
+        for p, o in self._nodes.get(node, []):
+            name = p[len(WAVES_NS):] if p.startswith(WAVES_NS) else None
+            if isinstance(o, Literal) and name in props:
+                if _datatype(o) != props[name] or (name in values and name not in HOSTS_PROPS):
+                    raise ValueError('{} of the {} can not be imported, it must be a single "value"{}'.format(
+                                     name, self._labels.get(node, 'installation'),
+                                     '^^xsd:' + props[name] if props[name] else ''))
+                values.setdefault(name, []).append(o.value)
+            elif (p, o) not in written:
+                self.projectInfo.trig.append( [self._term(node), p, self._term(o)] )
+        return values
+
+    def _load_installation(self, installation, graphName):
+        """ Read the project info, the cluster info, the metrics and the clock
+
+        :return: the installation and its metrics and clock nodes
+        """
+        # The metrics and the clock, the other blank nodes are written as they were read
+        written = [(RDFS_LABEL, Literal('installation'))]
+        for p, o in self._nodes[installation]:
+            name = p[len(WAVES_NS):]
+            if p in (WAVES_NS + 'metrics', WAVES_NS + 'clock') and isinstance(o, BNode) and \
+                    o not in self._types and name not in self._labels.values():
+                self._labels[o] = name
+                written.append( (p, o) )
+        nodes = dict((name, node) for node, name in self._labels.items())
+
+        values = self._values(installation, INSTALLATION_PROPS, written)
+        first = lambda name, default: values[name][0] if name in values else default
+
+        projectInfo = self.projectInfo
+        projectInfo.name        = first('name', _local_name(graphName) if graphName else '')
+        projectInfo.description = first('description', projectInfo.description)
+        projectInfo.license     = first('license', projectInfo.license)
+        projectInfo.version     = first('version', projectInfo.version)
+        projectInfo.createdAt   = first('createdAt', projectInfo.createdAt)
+
+        clusterInfo = self.clusterInfo
+        clusterInfo.zookeeperHosts = values.get('zookeeperHosts', ["localhost:2181"])
+        clusterInfo.kafkaHosts     = values.get('kafkaHosts', ["localhost:9092"])
+        clusterInfo.redisHost      = first('redisHost', clusterInfo.redisHost)
+        clusterInfo.mongoHost      = first('mongoHost', clusterInfo.mongoHost)
+        clusterInfo.influxHost     = first('influxHost', clusterInfo.influxHost)
+
+        if 'metrics' in nodes:
+            values = self._values(nodes['metrics'], METRICS_PROPS)
+            self.metrics.frequency = values.get('frequency', [self.metrics.frequency])[0]
+            self.metrics.reporters = values.get('reporters', [self.metrics.reporters])[0]
+        if 'clock' in nodes:
+            # The clock is written with an end date and a duration in local time, with an
+            # acceleration otherwise, the others are kept as they were read
+            localTimeZone = [o for p, o in self._nodes[nodes['clock']] if p == WAVES_NS + 'localTimeZone']
+            clockProps = dict(CLOCK_PROPS)
+            for name in (['acceleration'] if localTimeZone == [Literal('True')] else ['endDate', 'duration']):
+                del clockProps[name]
+            for name, value in self._values(nodes['clock'], clockProps).items():
+                setattr(self.clock, name, value[0])
+
+        return set([installation] + list(nodes.values()))
+
+    def _load_cmpts(self, installation):
+        """ Add the components to the workflow, with their settings
+
+        :return: node -> Component
+        """
+        cmpts = {}
+        for node, props in self._nodes.items():
+            cmptType = self._types.get(node)
+            uriName, appendix = _split_uri(node)
+            if cmptType is None:
+                if (WAVES_NS + 'installation', installation) not in props:
+                    continue
+                cmptType = uriName[:1].upper() + uriName[1:]
+            if cmptType == 'Installation':
+                continue
+
+            if isinstance(node, Iri) and not node.startswith(RESOLVED_BASE):
+                raise ValueError('The component <{}> can not be imported, its uri must be relative'.format(node))
+            trig = {
+                'node'         : node[len(RESOLVED_BASE):] if isinstance(node, Iri) else None,
+                'installation' : (WAVES_NS + 'installation', installation) in props,
+                'datatypes'    : {},
+                'statements'   : [],
+            }
+            settings = {}
+            for p, o in props:
+                if not isinstance(o, Literal):
+                    continue
+                if p == RDFS_LABEL:
+                    name = 'label'
+                elif p.startswith(WAVES_NS):
+                    name = p[len(WAVES_NS):]
+                else:
+                    trig['statements'].append( [p, self._term(o)] )
+                    continue
+                if name in settings:
+                    settings[name] += MULTI_VALUE_SEPARATOR + o.value
+                else:
+                    settings[name] = o.value
+                trig['datatypes'].setdefault(name, []).append(_datatype(o))
+            settings['trig'] = trig
+            for cmptId in (settings.get('id'), appendix):
+                if cmptId is not None and cmptId.isdigit():
+                    self.cmptCounter = max(self.cmptCounter, int(cmptId))
+
+            position = len(cmpts)
+            cmpt = Component(str(position + 1), cmptType, settings,
+                             str(20 + GRID_LEFT * (position % GRID_COLUMNS)) + 'px',
+                             str(20 + GRID_TOP * (position // GRID_COLUMNS)) + 'px')
+            cmpts[node] = cmpt
+
+        self.workflow.cmpt_list = list(cmpts.values())
+        return cmpts
+
+    def _load_links(self, cmpts):
+        """ Add the links between the components to the workflow, each link once, with the
+        predicates they are written with
+
+        :return: the blank nodes of the windows
+        """
+        links = {}
+        windows = set()
+
+        def link(srcNode, trgNode):
+            key = (srcNode, trgNode)
+            if key not in links:
+                links[key] = Link(cmpts[srcNode], cmpts[trgNode], {'trig': {'predicates': []}})
+            return links[key]
+
+        for node, cmpt in cmpts.items():
+            trig = cmpt.settings['trig']
+            for p, o in self._nodes[node]:
+                if isinstance(o, Literal) or p == WAVES_NS + 'installation':
+                    continue
+                name = p[len(WAVES_NS):] if p.startswith(WAVES_NS) else None
+                window = self._window(o, cmpts) if name is not None and o not in windows else None
+                if window is not None:
+                    stream, label, settings, datatypes = window
+                    windowLink = link(stream, node)
+                    windowLink.settings.update(settings)
+                    windowLink.settings['trig']['window'] = {'predicate': name, 'label': label, 'datatypes': datatypes}
+                    windows.add(o)
+                elif name is None or o not in cmpts:
+                    # i.e. waves:producesStream <stream/6g> when there is no component <stream/6g>
+                    trig['statements'].append( [p, self._term(o)] )
+                elif name in LINKS_IN or (name == 'rdfStore' and cmpt.cmptType != 'Sink'):
+                    # i.e. Filter consumesStreams Stream, RdfStore -> Filter
+                    link(o, node).settings['trig']['predicates'].append( ['trg', name] )
+                else:
+                    # i.e. Sink -> RdfStore
+                    link(node, o).settings['trig']['predicates'].append( ['src', name] )
+
+        self.workflow.link_list = list(links.values())
+        return windows
+
+    def _window(self, node, cmpts):
+        """ Stream, label, settings and their datatypes of the blank node of a waves:consumesStream,
+        None for another node, i.e. a blank node with a statement a link can not be written with """
+        if not isinstance(node, BNode) or node in self._types:
+            return None
+        stream = label = None
+        settings = {}
+        datatypes = {}
+        for p, o in self._nodes.get(node, []):
+            if p == WAVES_NS + 'stream' and stream is None and o in cmpts:
+                stream = o
+            elif p == RDFS_LABEL and label is None and isinstance(o, Literal) and o.datatype is None and o.lang is None:
+                label = o.value
+            elif p.startswith(WAVES_NS) and isinstance(o, Literal) and p[len(WAVES_NS):] not in settings:
+                settings[p[len(WAVES_NS):]] = o.value
+                datatypes[p[len(WAVES_NS):]] = [_datatype(o)]
+            else:
+                return None
+        if stream is None:
+            return None
+        return stream, label, settings, datatypes
+
+
+def _local_name(uri):
+    """ Last part of an uri, i.e. http://www.waves-rsp.org/configuration#windowSpan -> windowSpan """
+    return uri.rsplit('#', 1)[-1].rsplit('/', 1)[-1]
+
+def _datatype(literal):
+    """ Local name of the xsd datatype of a literal, i.e. integer, None for a plain literal
+
+    :raise ValueError: for a literal with a language or another datatype, they are not written
+    """
+    if literal.lang is not None:
+        raise ValueError('"{}"@{} can not be imported, the literals have no language'.format(literal.value, literal.lang))
+    if literal.datatype is None:
+        return None
+    if not literal.datatype.startswith(XSD_NS) or not _XSD_NAME.match(literal.datatype[len(XSD_NS):]):
+        raise ValueError('"{}"^^<{}> can not be imported, only the xsd datatypes are'.format(literal.value, literal.datatype))
+    return literal.datatype[len(XSD_NS):]
+
+def _split_uri(node):
+    """ Type name and appendix of the uri of a component, see Project._cmpt_node
+
+        - <.../stream/1>  -> ('stream', '1'), the appendix has a digit
+        - <.../sink>      -> ('sink', None)
+        - a blank node    -> ('', None)
+    """
+    if not isinstance(node, Iri):
+        return '', None
+    parts = node.rstrip('/').split('/')
+    if len(parts) > 1 and any(c.isdigit() for c in parts[-1]):
+        return parts[-2], parts[-1]
+    return parts[-1], None
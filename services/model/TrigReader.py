@@ -0,0 +1,436 @@
+""" TriG Reader
+
+Native streaming TriG reader, the counterpart of TrigWriter. It reads a text stream chunk by
+chunk and yields its statements one by one, without building a graph and without rdflib:
+
+    reader = TrigReader(stream)
+    for s, p, o, graph in reader.statements():
+        ...
+
+The terms of the statements are:
+    - Iri       : absolute uri, a str
+    - BNode     : label of a blank node, a str, i.e. "F-3f_S-1i", generated for [ ]
+    - Literal   : value, datatype uri or None, language or None
+
+StatementTerms builds the triples of a Project with the same terms, see Project.iter_triples.
+
+It reads the Turtle and TriG syntax: @prefix / @base and PREFIX / BASE, named graphs with or
+without GRAPH, comments, relative uris, prefixed names, "a", literals with their datatype or
+language, long literals in triple quotes, numbers, booleans, blank node labels, [ ] and ( ).
+
+"""
+
+from urllib.parse import urljoin
+import re
+
+from services.model.TrigWriter import WAVES_NS, RDF_NS, RDFS_NS, XSD_NS, RESOLVED_BASE, bnode_label
+
+# Size of the chunks read from the stream
+CHUNK_SIZE = 64 * 1024
+
+class Iri(str):
+    """ Absolute uri """
+    __slots__ = ()
+
+class BNode(str):
+    """ Label of a blank node """
+    __slots__ = ()
+
+class Literal(object):
+
+    __slots__ = ('value', 'datatype', 'lang')
+
+    def __init__(self, value, datatype=None, lang=None):
+        self.value    = value
+        self.datatype = datatype
+        self.lang     = lang
+
+    def __eq__(self, other):
+        return isinstance(other, Literal) and (self.value, self.datatype, self.lang) == \
+                                              (other.value, other.datatype, other.lang)
+
+    def __hash__(self):
+        return hash((self.value, self.datatype, self.lang))
+
+    def __repr__(self):
+        return 'Literal(%r, %r, %r)' % (self.value, self.datatype, self.lang)
+
+
+_RDF_TYPE = Iri(RDF_NS + 'type')
+
+
+class StatementTerms(object):
+    """ Build the terms of the triples of a project as the terms of the statements read by
+    TrigReader, same methods as TrigWriter.NativeTerms, so a project can be compared with a TriG """
+
+    TYPE  = _RDF_TYPE
+    LABEL = Iri(RDFS_NS + 'label')
+
+    def __init__(self, base_str):
+        """ Initial function
+
+        :param base_str: base uri of the project, the uris inside it get the base they are read
+            with, see TrigWriter.RESOLVED_BASE
+        """
+        self.base_str = base_str
+
+    def uri(self, uri):
+        if uri.startswith(self.base_str) and len(uri) > len(self.base_str):
+            uri = RESOLVED_BASE + uri[len(self.base_str):]
+        return Iri(uri)
+
+    def waves(self, name):
+        return Iri(WAVES_NS + name)
+
+    def literal(self, value, datatype=None):
+        return Literal(str(value), XSD_NS + datatype if datatype is not None else None)
+
+    def bnode(self, label):
+        return BNode(bnode_label(label))
+
+
+class TrigSyntaxError(ValueError):
+    """ The text is not valid TriG, the message gives the line of the error """
+
+
+# Tokens, the first alternative that matches is used, after the spaces and comments
+_TOKENS = [
+    ('IRI',          r'<[^<>"{}|^`\\\x00-\x20]*>'),
+    ('LONG_STRING',  r'"""((?:[^"\\]|\\.|"(?!""))*)"""|\'\'\'((?:[^\'\\]|\\.|\'(?!\'\'))*)\'\'\''),
+    ('STRING',       r'"((?:[^"\\\r\n]|\\.)*)"|\'((?:[^\'\\\r\n]|\\.)*)\''),
+    ('DIRECTIVE',    r'@(?:prefix|base)\b'),
+    ('LANG',         r'@[A-Za-z]+(?:-[A-Za-z0-9]+)*'),
+    ('DATATYPE',     r'\^\^'),
+    ('BNODE',        r'_:(?:[A-Za-z0-9_]|\\.)(?:[A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?'),
+    ('PNAME',        r'(?:[A-Za-z](?:[A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?)?:'
+                     r'(?:(?:[A-Za-z0-9_:%\-]|\\.)(?:(?:[A-Za-z0-9_.:%\-]|\\.)*(?:[A-Za-z0-9_:%\-]|\\.))?)?'),
+    ('DOUBLE',       r'[+-]?(?:[0-9]+\.[0-9]*[eE][+-]?[0-9]+|\.?[0-9]+[eE][+-]?[0-9]+)'),
+    ('DECIMAL',      r'[+-]?[0-9]*\.[0-9]+'),
+    ('INTEGER',      r'[+-]?[0-9]+'),
+    ('KEYWORD',      r'(?:a|true|false|PREFIX|BASE|GRAPH|prefix|base|graph)(?![A-Za-z0-9_:\-])'),
+    ('PUNCT',        r'[{}\[\]().,;]'),
+]
+# A comment must end with its line, otherwise a token could be found inside a comment cut by the
+# end of the buffer, only the last comment of the text may end without a new line
+_SKIP  = re.compile(r'(?:[ \t\r\n]+|#[^\r\n]*)*')
+_TOKEN = re.compile(r'(?:[ \t\r\n]+|#[^\r\n]*[\r\n])*(?:' + '|'.join('(?P<%s>%s)' % token for token in _TOKENS) + ')')
+
+_ABSOLUTE = re.compile(r'[A-Za-z][A-Za-z0-9+.\-]*:')
+
+_LOCAL_ESCAPE = re.compile(r'\\(.)')
+
+_ESCAPE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))', re.S)
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+def _unescape(text):
+    def replace(m):
+        if m.group(1) or m.group(2):
+            return chr(int(m.group(1) or m.group(2), 16))
+        return _ESCAPES.get(m.group(3), m.group(3))
+    return _ESCAPE.sub(replace, text) if '\\' in text else text
+
+
+class TrigReader(object):
+
+    def __init__(self, stream, base=None):
+        """ Initial function
+
+        Params:
+            self.stream   : Text stream to read from, i.e. opened file, io.StringIO
+            self.base     : Base uri of the relative uris
+            self.prefixes : prefix -> namespace uri
+            self._buffer  : Text read from the stream and not tokenized yet, from self._pos
+            self._eof     : True when the whole stream has been read
+            self._line    : Line number of the start of self._buffer, for the error messages
+            self._bnodes  : Number of blank nodes generated for [ ] and ( )
+            self._peeked  : Next token, read by _peek and not taken yet
+            self._iris    : Text of an IRI or PNAME token -> Iri, cleared when a prefix or the base changes
+        """
+        self.stream   = stream
+        self.base     = base or ''
+        self.prefixes = {}
+        self._buffer  = ''
+        self._pos     = 0
+        self._eof     = False
+        self._line    = 1
+        self._bnodes  = 0
+        self._peeked  = None
+        self._iris    = {}
+
+    def statements(self):
+        """ Read the statements of the stream
+
+        :return: generator of (subject, predicate, object, graph), graph is None for the default graph
+        :raise TrigSyntaxError: if the text is not valid TriG
+        """
+        while self._peek() is not None:
+            yield from self._statement()
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    """
+        Tokens, a token is (kind, text, match)
+    """
+
+    def _fill(self):
+        """ Read the next chunk of the stream, return False at the end of the stream """
+        if self._eof:
+            return False
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._line += self._buffer.count('\n', 0, self._pos)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_token(self):
+        """ Read the next token, skipping the spaces and comments
+
+        :return: (kind, text, match) or None at the end of the stream
+        """
+        while True:
+            m = _TOKEN.match(self._buffer, self._pos)
+            # A token touching the end of the buffer may continue in the next chunk, and so may
+            # a long string when the buffer ends in its opening quotes
+            if (m is None or m.end() == len(self._buffer) or self._open_long_string(m)) and self._fill():
+                continue
+            if m is None:
+                if _SKIP.match(self._buffer, self._pos).end() == len(self._buffer):
+                    self._pos = len(self._buffer)
+                    return None
+                raise self._error('unexpected "{}"'.format(self._buffer[self._pos:self._pos + 20].strip()))
+            self._pos = m.end()
+            kind = m.lastgroup
+            return kind, m.group(kind), m
+
+    def _open_long_string(self, m):
+        """ Check if an empty string is the start of a long string, i.e. "" then " """
+        return m.lastgroup == 'STRING' and m.end() - m.start('STRING') == 2 \
+            and self._buffer[m.end():m.end() + 1] == self._buffer[m.start('STRING')]
+
+    def _peek(self):
+        if self._peeked is None:
+            self._peeked = self._next_token()
+        return self._peeked
+
+    def _take(self):
+        token = self._peek()
+        self._peeked = None
+        if token is None:
+            raise self._error('unexpected end of the text')
+        return token
+
+    def _is_punct(self, token, char):
+        return token is not None and token[1] == char and token[0] == 'PUNCT'
+
+    def _expect(self, char):
+        kind, text, m = self._take()
+        if text != char:
+            raise self._error('expected "{}" instead of "{}"'.format(char, text))
+
+    def _error(self, message):
+        line = self._line + self._buffer.count('\n', 0, self._pos)
+        return TrigSyntaxError('line {}: {}'.format(line, message))
+
+    """
+        Terms
+    """
+
+    def _new_bnode(self):
+        self._bnodes += 1
+        return BNode('g' + str(self._bnodes))
+
+    def _iri(self, kind, text):
+        """ Iri of an IRI or PNAME token """
+        iri = self._iris.get(text)
+        if iri is None:
+            if kind == 'IRI':
+                iri = self._resolve(_unescape(text[1:-1]))
+            else:
+                prefix, _, local = text.partition(':')
+                if prefix not in self.prefixes:
+                    raise self._error('unknown prefix "{}"'.format(prefix))
+                iri = Iri(self.prefixes[prefix] + (_LOCAL_ESCAPE.sub(r'\1', local) if '\\' in local else local))
+            self._iris[text] = iri
+        return iri
+
+    def _resolve(self, iri):
+        """ Absolute uri of an uri relative to the base """
+        if not self.base or _ABSOLUTE.match(iri):
+            return Iri(iri)
+        # urljoin drops an empty fragment, i.e. the # of a namespace
+        if iri.endswith('#'):
+            return Iri(urljoin(self.base, iri[:-1]) + '#')
+        return Iri(urljoin(self.base, iri))
+
+    def _term(self, token):
+        """ Term of a single token: iri, blank node label, literal or "a" """
+        kind, text, m = token
+        if kind == 'IRI' or kind == 'PNAME':
+            return self._iri(kind, text)
+        if kind == 'BNODE':
+            return BNode(text[2:])
+        if kind == 'KEYWORD' and text == 'a':
+            return _RDF_TYPE
+        if kind == 'KEYWORD' and text in ('true', 'false'):
+            return Literal(text, XSD_NS + 'boolean')
+        if kind == 'INTEGER':
+            return Literal(text, XSD_NS + 'integer')
+        if kind == 'DECIMAL':
+            return Literal(text, XSD_NS + 'decimal')
+        if kind == 'DOUBLE':
+            return Literal(text, XSD_NS + 'double')
+        if kind == 'STRING' or kind == 'LONG_STRING':
+            index = m.re.groupindex[kind]
+            value = m.group(index + 1)
+            value = _unescape(value if value is not None else m.group(index + 2))
+            following = self._peek()
+            if following is not None and following[0] == 'LANG':
+                self._take()
+                return Literal(value, lang=following[1][1:])
+            if following is not None and following[0] == 'DATATYPE':
+                self._take()
+                kind, text, m = self._take()
+                if kind != 'IRI' and kind != 'PNAME':
+                    raise self._error('expected a datatype after ^^')
+                return Literal(value, self._iri(kind, text))
+            return Literal(value)
+        raise self._error('unexpected "{}"'.format(text))
+
+    """
+        Statements
+    """
+
+    def _statement(self):
+        kind, text, m = self._peek()
+
+        if kind == 'DIRECTIVE' or (kind == 'KEYWORD' and text.upper() in ('PREFIX', 'BASE')):
+            self._take()
+            self._directive(text.lstrip('@').lower(), kind == 'DIRECTIVE')
+            return
+
+        if kind == 'KEYWORD' and text.upper() == 'GRAPH':
+            self._take()
+            graph = self._term(self._take())
+            self._expect('{')
+            yield from self._graph(graph)
+            return
+
+        if self._is_punct(self._peek(), '{'):
+            self._take()
+            yield from self._graph(None)
+            return
+
+        if kind in ('IRI', 'PNAME', 'BNODE'):
+            subject = self._term(self._take())
+            if self._is_punct(self._peek(), '{'):
+                self._take()
+                yield from self._graph(subject)
+                return
+            yield from self._predicate_objects(subject, None)
+        else:
+            yield from self._triples(None)
+        self._expect('.')
+
+    def _directive(self, name, turtle_style):
+        if name == 'prefix':
+            kind, text, m = self._take()
+            if kind != 'PNAME' or not text.endswith(':'):
+                raise self._error('expected a prefix name')
+            kind_iri, text_iri, m = self._take()
+            if kind_iri != 'IRI':
+                raise self._error('expected the uri of the prefix')
+            self.prefixes[text[:-1]] = self._iri(kind_iri, text_iri)
+        else:
+            kind_iri, text_iri, m = self._take()
+            if kind_iri != 'IRI':
+                raise self._error('expected the base uri')
+            self.base = self._iri(kind_iri, text_iri)
+        self._iris = {}
+        if turtle_style:
+            self._expect('.')
+
+    def _graph(self, graph):
+        """ Statements of a graph, after the "{" """
+        while not self._is_punct(self._peek(), '}'):
+            yield from self._triples(graph)
+            if self._is_punct(self._peek(), '.'):
+                self._take()
+        self._take()
+
+    def _triples(self, graph):
+        token = self._take()
+        if self._is_punct(token, '['):
+            subject = self._new_bnode()
+            yield from self._property_list(subject, graph)
+            following = self._peek()
+            if following is not None and not self._is_punct(following, '.') \
+                    and not self._is_punct(following, '}'):
+                yield from self._predicate_objects(subject, graph)
+            return
+        if self._is_punct(token, '('):
+            subject = self._new_bnode()
+            yield from self._collection(subject, graph)
+        else:
+            subject = self._term(token)
+        yield from self._predicate_objects(subject, graph)
+
+    def _property_list(self, subject, graph):
+        """ Statements of a [ ... ] blank node, after the "[" """
+        if not self._is_punct(self._peek(), ']'):
+            yield from self._predicate_objects(subject, graph)
+        self._expect(']')
+
+    def _predicate_objects(self, subject, graph):
+        while True:
+            predicate = self._term(self._take())
+            while True:
+                obj = yield from self._object(graph)
+                yield subject, predicate, obj, graph
+                if not self._is_punct(self._peek(), ','):
+                    break
+                self._take()
+            # Several ; may follow each other, and the last one may be followed by nothing
+            if not self._is_punct(self._peek(), ';'):
+                return
+            while self._is_punct(self._peek(), ';'):
+                self._take()
+            following = self._peek()
+            if following is None or following[0] == 'PUNCT' and following[1] in '.]}':
+                return
+
+    def _object(self, graph):
+        token = self._take()
+        if token[0] == 'PUNCT':
+            if token[1] == '[':
+                node = self._new_bnode()
+                yield from self._property_list(node, graph)
+                return node
+            if token[1] == '(':
+                node = self._new_bnode()
+                yield from self._collection(node, graph)
+                return node
+        return self._term(token)
+
+    def _collection(self, node, graph):
+        """ Statements of a ( ... ) collection, after the "(" """
+        if self._is_punct(self._peek(), ')'):
+            self._take()
+            # The empty collection is rdf:nil, written with the node as its first element
+            yield node, Iri(RDF_NS + 'rest'), Iri(RDF_NS + 'nil'), graph
+            return
+        current = node
+        while True:
+            obj = yield from self._object(graph)
+            yield current, Iri(RDF_NS + 'first'), obj, graph
+            if self._is_punct(self._peek(), ')'):
+                self._take()
+                yield current, Iri(RDF_NS + 'rest'), Iri(RDF_NS + 'nil'), graph
+                return
+            following = self._new_bnode()
+            yield current, Iri(RDF_NS + 'rest'), following, graph
+            current = following
@@ -0,0 +1,167 @@
+""" TriG Writer
+
+Native TriG writer for the Waves configuration. It writes the triples of a project straight to a
+text stream, without building an rdflib Graph and without rdflib at all:
+- NativeTerms : Build the terms of the triples, each term is already its TriG string,
+                i.e. <filter/2>, waves:id, "2"^^xsd:int, _:F-2_S-1
+- TrigWriter  : Write the header, the blocks of triples and the end of the named graph
+
+The output is the same graph as the one serialized by rdflib in Project.parse_trig, except that
+the literals are written as they are given instead of being normalized, e.g. "80"^^xsd:double
+instead of "80.0"^^xsd:double, which is the same value.
+
+The labels of the blank nodes are given by the project, see bnode_label, and the triples are
+written in the order of the project, so the same project is always written as the same bytes.
+
+"""
+
+import hashlib
+import re
+
+WAVES_NS = "http://www.waves-rsp.org/configuration#"
+RDF_NS   = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS_NS  = "http://www.w3.org/2000/01/rdf-schema#"
+XSD_NS   = "http://www.w3.org/2001/XMLSchema#"
+
+PREFIXES = [('rdfs', RDFS_NS), ('waves', WAVES_NS), ('xsd', XSD_NS)]
+
+# Second base of the header, the relative uris of the TriG are resolved against it
+RESOLVED_BASE = "http://localhost:9091/waves/versailles/"
+
+# Local name that can be written with a prefix
+_LOCAL_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+
+# Blank node label written as it is, the others are replaced by their hash
+_BNODE_LABEL = re.compile(r'^[A-Za-z][A-Za-z0-9_-]*$')
+
+# Characters to escape in a string literal
+_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+_TO_ESCAPE = re.compile(r'[\\"\n\r]')
+
+class NativeTerms(object):
+
+    TYPE  = 'a'
+    LABEL = 'rdfs:label'
+
+    def __init__(self, base_str):
+        """ Initial function
+
+        :param base_str: base uri of the project, the uris inside it are written relative to it
+        """
+        self.base_str = base_str
+        self._waves   = {}
+
+    def uri(self, uri):
+        """ Term of an uri
+
+        :param uri: absolute uri
+        :return: relative uri, prefixed name or absolute uri
+        """
+        if uri.startswith(self.base_str) and len(uri) > len(self.base_str):
+            return '<' + uri[len(self.base_str):] + '>'
+        for prefix, ns in PREFIXES:
+            if uri.startswith(ns) and _LOCAL_NAME.match(uri[len(ns):]):
+                return prefix + ':' + uri[len(ns):]
+        return '<' + uri + '>'
+
+    def waves(self, name):
+        """ Term of an uri in the waves namespace """
+        term = self._waves.get(name)
+        if term is None:
+            term = self._waves[name] = self.uri(WAVES_NS + name)
+        return term
+
+    def literal(self, value, datatype=None):
+        """ Term of a literal
+
+        :param value: value of the literal, written as it is
+        :param datatype: local name of a xsd datatype, i.e. int, duration
+        :return: literal string
+        """
+        term = '"' + _TO_ESCAPE.sub(lambda m: _ESCAPES[m.group(0)], str(value)) + '"'
+        if datatype is not None:
+            term = term + '^^xsd:' + datatype
+        return term
+
+    def bnode(self, label):
+        """ Term of a blank node, see bnode_label """
+        return '_:' + bnode_label(label)
+
+
+class TrigWriter(object):
+
+    def __init__(self, stream, base_str, graph_uri):
+        """ Initial function
+
+        :param stream: text stream to write to, i.e. opened file, io.StringIO
+        :param base_str: base uri of the project
+        :param graph_uri: uri of the named graph of the project
+        """
+        self.stream    = stream
+        self.base_str  = base_str
+        self.graph_uri = graph_uri
+
+    def write_header(self):
+        """ Write the base, the prefixes and open the named graph
+
+        The same header as the one written by Project.parse_trig with rdflib: it adds
+        @base <http://localhost:9091/waves/versailles/> after the project base, the relative uris
+        are resolved against it, so it is kept here to describe the same graph.
+        """
+        lines = ['@base <' + self.base_str + '> .']
+        for prefix, ns in PREFIXES:
+            lines.append('@prefix ' + prefix + ': <' + ns + '> .')
+        lines.append('@base <' + RESOLVED_BASE + '> .')
+        lines.append('')
+        lines.append('<' + self.graph_uri + '> {')
+        self.stream.write('\n'.join(lines) + '\n')
+
+    def write_triples(self, triples):
+        """ Write triples made of NativeTerms, see format_block """
+        self.stream.write(format_block(triples) + '\n')
+
+    def write_block(self, block):
+        """ Write a block already formatted by format_block """
+        self.stream.write(block + '\n')
+
+    def write_footer(self):
+        """ Close the named graph """
+        self.stream.write('}\n')
+
+
+def bnode_label(label):
+    """ Label of a blank node written in the TriG or the N-Quads
+
+    The label is made from the content and the position of the blank node by the project, i.e.
+    F-3_S-1 for the window of the link from the stream 1 to the filter 3, so it is the same each
+    time the project is written. A label with other characters than letters, digits, _ and - is
+    replaced by a hash of it.
+
+    :param label: label given by the project
+    :return: label that can be written after _:
+    """
+    if _BNODE_LABEL.match(label):
+        return label
+    return 'H' + hashlib.sha1(label.encode('utf-8')).hexdigest()[:20]
+
+
+def format_block(triples):
+    """ Format triples made of NativeTerms, the triples of a subject are written together
+
+        <filter/2> a waves:Filter ;
+            waves:id "2"^^xsd:int .
+
+    :param triples: list of (subject, predicate, object)
+    :return: TriG string
+    """
+    by_subject = {}
+    for s, p, o in triples:
+        if s in by_subject:
+            by_subject[s].append(p + ' ' + o)
+        else:
+            by_subject[s] = [p + ' ' + o]
+
+    lines = []
+    for s, statements in by_subject.items():
+        lines.append('    ' + s + ' ' + ' ;\n        '.join(statements) + ' .\n')
+    return ''.join(lines)
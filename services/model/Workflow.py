@@ -5,17 +5,172 @@ It consists of two parts of informations:
     - List of components in the workflow
     - List of links between components in the workflow
 
+Components and links are kept in id-keyed indexes so that the lookups done on
+every editor action (drag, save settings, link) do not scan the whole workflow:
+    - _cmpts     : component id -> component, in insertion order
+    - _links     : link -> None, an insertion ordered set of links
+    - _links_out : component id -> links whose source is this component
+    - _links_in  : component id -> links whose target is this component
+
+Every modification increases the revision number of the workflow and is recorded
+as a change, so that a client knowing a revision can ask for the changes since then.
+A change is a JSON-Patch like record on the id-keyed view of the workflow:
+    - {"op": "add",     "path": "/cmpts/<cmptId>",              "value": component dict}
+    - {"op": "replace", "path": "/cmpts/<cmptId>",              "value": component dict}
+    - {"op": "remove",  "path": "/cmpts/<cmptId>"}
+    - {"op": "add",     "path": "/links/<srcCmptId>/<trgCmptId>", "value": link settings}
+    - {"op": "replace", "path": "/links/<srcCmptId>/<trgCmptId>", "value": link settings}
+    - {"op": "remove",  "path": "/links/<srcCmptId>/<trgCmptId>"}
+The same records are accepted by apply_patch.
+
 """
 
 from services.model.Component import Component
 from services.model.Link import Link
+from collections import deque
 import os
 
+# Number of changes kept to answer get_changes_since
+MAX_CHANGES = 1000
+
 class Workflow(object):
     
-    def __init__(self, cmpt_list = [], link_list = []):
-        self.cmpt_list = cmpt_list
-        self.link_list = link_list
+    def __init__(self, cmpt_list = None, link_list = None, revision = 0):
+        self._set_cmpts(cmpt_list if cmpt_list is not None else [])
+        self._set_links(link_list if link_list is not None else [])
+        self.revision = revision
+        self._changes = deque(maxlen=MAX_CHANGES)
+    
+    """
+        Indexed lists
+    """
+    
+    @property
+    def cmpt_list(self):
+        """ List of components in the order they were added """
+        return list(self._cmpts.values())
+    
+    @cmpt_list.setter
+    def cmpt_list(self, cmpt_list):
+        """ Replace all the components, the links between the remaining components are kept """
+        self._set_cmpts(cmpt_list)
+        self._set_links([link for link in self._links 
+                         if link.srcCmpt.id in self._cmpts and link.trgCmpt.id in self._cmpts])
+        self._reset_changes()
+    
+    def _set_cmpts(self, cmpt_list):
+        self._cmpts = {}
+        for cmpt in cmpt_list:
+            self._cmpts[cmpt.id] = cmpt
+    
+    @property
+    def link_list(self):
+        """ List of links in the order they were added """
+        return list(self._links)
+    
+    @link_list.setter
+    def link_list(self, link_list):
+        """ Replace all the links and rebuild the adjacency indexes """
+        self._set_links(link_list)
+        self._reset_changes()
+    
+    def _set_links(self, link_list):
+        self._links = {}
+        self._links_out = {}
+        self._links_in = {}
+        for link in link_list:
+            self._index_link(link)
+    
+    """
+        Revisions and changes
+    """
+    
+    def _record(self, op, path, value=None):
+        """ Increase the revision and record the change """
+        self.revision += 1
+        change = {'op': op, 'path': '/' + '/'.join(_escape(p) for p in path)}
+        if op != 'remove':
+            change['value'] = value
+        self._changes.append( (self.revision, change) )
+    
+    def _reset_changes(self):
+        """ Increase the revision and forget the changes, used when the whole workflow is replaced """
+        self.revision += 1
+        self._changes.clear()
+    
+    def get_changes_since(self, revision):
+        """ Get the changes made after a given revision
+
+        :param revision: revision known by the client
+        :return: list of changes in the order they were made, 
+            None if the changes since this revision are no longer recorded
+        """
+        if revision > self.revision:
+            return None
+        if revision == self.revision:
+            return []
+        if not self._changes or self._changes[0][0] > revision + 1:
+            return None
+        return [change for rev, change in self._changes if rev > revision]
+    
+    def apply_patch(self, changes):
+        """ Apply a list of changes, see the module documentation for the format of a change
+
+        Removing a component also removes its links. Adding a component or a link that already
+        exists raises ValueError, as a change on a missing component or link raises KeyError.
+        Each change is recorded as one change, plus the removal of the links of a removed
+        component, so that replaying the recorded changes of a workflow on a copy of it
+        reaches the same revision.
+        The changes are applied one by one, the caller is in charge of applying the patch
+        on a copy if it must be applied entirely or not at all.
+
+        :param changes: list of changes
+        :return:
+        """
+        for change in changes:
+            op = change['op']
+            path = [_unescape(p) for p in change['path'].split('/')[1:]]
+            value = change.get('value')
+            
+            if len(path) == 2 and path[0] == 'cmpts':
+                cmptId = path[1]
+                if op == 'add':
+                    cmpt = Component().parse_from_dict( dict(value, id=cmptId) )
+                    self.add_cmpt(cmpt)
+                elif op == 'replace':
+                    # Any of cmptType, settings, ui_left and ui_top, recorded as a single change
+                    cmpt = self._cmpts[cmptId]
+                    cmpt.cmptType = value.get('cmptType', cmpt.cmptType)
+                    cmpt.settings = value.get('settings', cmpt.settings)
+                    cmpt.ui_left  = value.get('ui_left', cmpt.ui_left)
+                    cmpt.ui_top   = value.get('ui_top', cmpt.ui_top)
+                    self._record('replace', ('cmpts', cmptId), cmpt.to_dict())
+                elif op == 'remove':
+                    self.del_cmpt( self._cmpts[cmptId] )
+                else:
+                    raise ValueError('Unknown operation ' + op)
+            
+            elif len(path) == 3 and path[0] == 'links':
+                srcCmptId, trgCmptId = path[1], path[2]
+                if op == 'add':
+                    link = Link(self._cmpts[srcCmptId], self._cmpts[trgCmptId], value or {})
+                    self.add_link(link)
+                elif op == 'replace':
+                    self.save_link_settings(self._get_link(srcCmptId, trgCmptId), value)
+                elif op == 'remove':
+                    self.del_link( self._get_link(srcCmptId, trgCmptId) )
+                else:
+                    raise ValueError('Unknown operation ' + op)
+            
+            else:
+                raise ValueError('Unknown path ' + change['path'])
+    
+    def _get_link(self, srcCmptId, trgCmptId):
+        """ Same as get_link_by_cmpt_ids but raise KeyError if the link doesn't exist """
+        link = self.get_link_by_cmpt_ids(srcCmptId, trgCmptId)
+        if link is None:
+            raise KeyError(srcCmptId + '/' + trgCmptId)
+        return link
     
     def to_dict(self):
         """ Parse information -> python dictionary
@@ -28,9 +183,9 @@ class Workflow(object):
         cmpt_dict_list = []
         link_dict_list = []
         
-        for cmpt in self.cmpt_list:
+        for cmpt in self._cmpts.values():
             cmpt_dict_list.append(cmpt.to_dict())
-        for link in self.link_list:
+        for link in self._links:
             link_dict_list.append(link.to_dict())
         
         info['cmpt_list'] = cmpt_dict_list
@@ -38,31 +193,44 @@ class Workflow(object):
         
         return info
     
+    def to_ref_dict(self):
+        """ Parse information -> python dictionary where links refer to components by id
+
+        This is the format saved in the project json file (v2), every component is written once.
+
+        :return: python dictionary which contains the information of model
+        """
+        
+        info = {}
+        
+        info['cmpt_list'] = [cmpt.to_dict() for cmpt in self._cmpts.values()]
+        info['link_list'] = [link.to_ref_dict() for link in self._links]
+        
+        return info
+    
     def parse_from_dict(self, info):
         """ From python dictionary fetch information and build this object
 
+        Both link formats are accepted, full component copies (v1) and component ids (v2).
+        In both cases the links are bound to the components of the returned workflow.
+
         :param info: python dictionary that contains the key-value format of the object
         :return: Object that contains the information of json
         """
         
-        workflow = Workflow()
-        
-        workflow.cmpt_list = []
-        workflow.link_list = []
-        
         cmpt = Component()
         link = Link()
         
         cmpt_dict_list = info['cmpt_list']
         link_dict_list = info['link_list']
         
-        # Iterate each component and list to append to workflow
-        for cmpt_dict in cmpt_dict_list:
-            workflow.cmpt_list.append( cmpt.parse_from_dict( cmpt_dict ) )
-        for link_dict in link_dict_list:
-            workflow.link_list.append( link.parse_from_dict( link_dict ) )
+        # Iterate each component and list to build the workflow
+        cmpt_list = [cmpt.parse_from_dict( cmpt_dict ) for cmpt_dict in cmpt_dict_list]
+        cmpts = {c.id: c for c in cmpt_list}
+        link_list = [link.parse_from_ref_dict( link.upgrade_dict( link_dict ), cmpts )
+                     for link_dict in link_dict_list]
         
-        return workflow
+        return Workflow(cmpt_list, link_list)
     
     """
         Component related processing
@@ -73,19 +241,36 @@ class Workflow(object):
         
         Args:
             cmpt: Component: a new component that will be added to the current workflow
+        Raises:
+            ValueError: if a component with the same id is already in the workflow, its links
+                would keep pointing at the replaced component
         """
-        self.cmpt_list.append( cmpt )
+        if cmpt.id in self._cmpts:
+            raise ValueError('Component ' + str(cmpt.id) + ' already exists')
+        self._cmpts[cmpt.id] = cmpt
+        self._record('add', ('cmpts', cmpt.id), cmpt.to_dict())
         print( "Add Component", cmpt.id )
     
     def del_cmpt(self, cmpt):
-        """ Delete the component from workflow
+        """ Delete the component and all its links from workflow
         
         Args:
             cmpt: Component: the component that will be deleted from the workflow
         """
-        self.cmpt_list.remove(cmpt)
+        self.del_all_links(cmpt.id)
+        del self._cmpts[cmpt.id]
+        self._record('remove', ('cmpts', cmpt.id))
         print( "Delete Component", cmpt.id )
     
+    def clear(self):
+        """ Delete all the components and their links
+
+        Unlike replacing cmpt_list, each removal is recorded, so a client knowing a revision
+        gets the removals with the changes since then.
+        """
+        for cmpt in self.cmpt_list:
+            self.del_cmpt(cmpt)
+    
     def del_cmpt_by_id(self, cmptId):
         """ Delete the component by id
 
@@ -102,10 +287,7 @@ class Workflow(object):
         :param cmptId: id of the component to get
         :return: component
         """
-        for cmpt in self.cmpt_list:
-            if cmpt.id == cmptId:
-                return cmpt
-        return None
+        return self._cmpts.get(cmptId)
     
     def update_component_location(self, cmptId, ui_left, ui_top):
         """ Update component location in the UI
@@ -115,11 +297,12 @@ class Workflow(object):
         :param ui_top:  Component location to the top of workflow space
         :return:
         """
-        for index, cmpt in enumerate(self.cmpt_list):
-            if cmpt.id == cmptId:
-                self.cmpt_list[index].ui_left = ui_left
-                self.cmpt_list[index].ui_top = ui_top
-                print( "Update Component Location : ", cmpt.id, cmpt.ui_left ,cmpt.ui_top )
+        cmpt = self.get_cmpt_by_id(cmptId)
+        if cmpt != None:
+            cmpt.ui_left = ui_left
+            cmpt.ui_top = ui_top
+            self._record('replace', ('cmpts', cmpt.id), cmpt.to_dict())
+            print( "Update Component Location : ", cmpt.id, cmpt.ui_left ,cmpt.ui_top )
     
     def save_component_settings(self, cmptId, settings):
         """ Save component settings
@@ -128,22 +311,59 @@ class Workflow(object):
         :param settings: Key-value dictionary of the settings to be setted for component
         :return:
         """
-        for index, cmpt in enumerate(self.cmpt_list):
-            if cmpt.id == cmptId:
-                self.cmpt_list[index].settings = settings
-                print( "Save Component Settings : ", cmpt.id, cmpt.settings )
+        cmpt = self.get_cmpt_by_id(cmptId)
+        if cmpt != None:
+            cmpt.settings = settings
+            self._record('replace', ('cmpts', cmpt.id), cmpt.to_dict())
+            print( "Save Component Settings : ", cmpt.id, cmpt.settings )
     
     """
         Links related processing
     """
     
+    def _index_link(self, link):
+        """ Register the link in the link set and in the adjacency indexes """
+        self._links[link] = None
+        self._links_out.setdefault(link.srcCmpt.id, {})[link] = None
+        self._links_in.setdefault(link.trgCmpt.id, {})[link] = None
+    
+    def _unindex_link(self, link):
+        """ Remove the link from the link set and from the adjacency indexes """
+        del self._links[link]
+        for index, cmptId in ((self._links_out, link.srcCmpt.id), (self._links_in, link.trgCmpt.id)):
+            links = index.get(cmptId)
+            if links is not None:
+                links.pop(link, None)
+                if not links:
+                    del index[cmptId]
+    
+    def get_links_from(self, cmptId):
+        """ Get the links that take the component as source component
+
+        :param cmptId: id of the source component
+        :return: list of links
+        """
+        return list(self._links_out.get(cmptId, ()))
+    
+    def get_links_to(self, cmptId):
+        """ Get the links that take the component as target component
+
+        :param cmptId: id of the target component
+        :return: list of links
+        """
+        return list(self._links_in.get(cmptId, ()))
+    
     def add_link(self, link):
         """ Append a new link to the current workflow
 
         :param link: Link to be added
         :return:
+        :raise ValueError: if there is already a link between the same components
         """
-        self.link_list.append( link )
+        if self.get_link_by_cmpt_ids(link.srcCmpt.id, link.trgCmpt.id) is not None:
+            raise ValueError('Link ' + str(link.srcCmpt.id) + '/' + str(link.trgCmpt.id) + ' already exists')
+        self._index_link( link )
+        self._record('add', ('links', link.srcCmpt.id, link.trgCmpt.id), link.settings)
         print( "Add link", link.srcCmpt.id, link.trgCmpt.id )
     
     def add_link_with_cmpts(self, srcCmpt, trgCmpt):
@@ -162,6 +382,7 @@ class Workflow(object):
         :param srcCmptId: id of source component
         :param trgCmptId: id of target component
         :return:
+        :raise ValueError: if the link already exists, see add_link
         """
         srcCmpt = self.get_cmpt_by_id(srcCmptId)
         trgCmpt = self.get_cmpt_by_id(trgCmptId)
@@ -171,12 +392,14 @@ class Workflow(object):
     def get_link_by_cmpt_ids(self, srcCmptId, trgCmptId):
         """ Get the link by giving source component and target component ids
 
+        Only the links going out of the source component are visited.
+
         :param srcCmptId: id of source component
         :param trgCmptId: id of target component
         :return: The link which connects two components
         """
-        for link in self.link_list:
-            if link.srcCmpt == self.get_cmpt_by_id(srcCmptId) and link.trgCmpt == self.get_cmpt_by_id(trgCmptId):
+        for link in self._links_out.get(srcCmptId, ()):
+            if link.trgCmpt.id == trgCmptId:
                 return link
     
     def del_link(self, link):
@@ -185,7 +408,8 @@ class Workflow(object):
         :param link: link to be deleted from workflow
         :return:
         """
-        self.link_list.remove(link)
+        self._unindex_link(link)
+        self._record('remove', ('links', link.srcCmpt.id, link.trgCmpt.id))
         print( "Delete Link", link.srcCmpt.id, link.trgCmpt.id )
         
     def del_link_by_src_cmpt(self, srcCmpt):
@@ -194,9 +418,8 @@ class Workflow(object):
         :param srcCmpt: Source component where the links are dragged out
         :return:
         """
-        for link in self.link_list:
-            if link.srcCmpt == srcCmpt:
-                self.del_link(link)
+        if srcCmpt != None:
+            self.del_link_by_src_cmpt_id(srcCmpt.id)
         
     def del_link_by_src_cmpt_id(self, srcCmptId):
         """ Delete all the links that comes from the source component with srcCmptId as its id
@@ -204,8 +427,8 @@ class Workflow(object):
         :param srcCmptId: Id of the source component
         :return:
         """
-        srcCmpt = self.get_cmpt_by_id(srcCmptId)
-        self.del_link_by_src_cmpt(srcCmpt)
+        for link in self.get_links_from(srcCmptId):
+            self.del_link(link)
         
     def del_all_links(self, cmptId):
         """ Delete all the links that either comes from the component or links to the component
@@ -213,10 +436,8 @@ class Workflow(object):
         :param cmptId: Id of the the component
         :return:
         """
-        cmpt = self.get_cmpt_by_id(cmptId)
-        
-        for link in self.link_list:
-            if link.srcCmpt == cmpt or link.trgCmpt == cmpt:
+        for link in self.get_links_from(cmptId) + self.get_links_to(cmptId):
+            if link in self._links:
                 self.del_link(link)
         
     def save_link_settings(self, link, settings):
@@ -228,10 +449,10 @@ class Workflow(object):
         :param settings: Settings of the link
         :return:
         """
-        for index, i_link in enumerate(self.link_list):
-            if i_link == link:
-                print( "Save Link Settings : ", link.srcCmpt.id, link.trgCmpt.id, settings )
-                self.link_list[index].settings = settings
+        if link in self._links:
+            print( "Save Link Settings : ", link.srcCmpt.id, link.trgCmpt.id, settings )
+            link.settings = settings
+            self._record('replace', ('links', link.srcCmpt.id, link.trgCmpt.id), settings)
                 
     def save_link_settings_by_cmpt_ids(self, srcCmptId, trgCmptId, settings):
         """ Save link settings by the link source id and target id
@@ -254,4 +475,13 @@ class Workflow(object):
         dir_path = os.path.dirname(os.path.realpath(__file__))
         with open( dir_path + '/default_workflow.json', 'r') as file:
             data=file.read()
-        return data
\ No newline at end of file
+        return data
+
+
+def _escape(token):
+    """ Escape a path token, see RFC 6901 (JSON Pointer) """
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+def _unescape(token):
+    """ Unescape a path token, see RFC 6901 (JSON Pointer) """
+    return token.replace('~1', '/').replace('~0', '~')
@@ -5,4 +5,12 @@ from services.model.Workflow import Workflow
 from services.model.Component import Component
 from services.model.Link import Link
 from services.model.Metrics import Metrics
-from services.model.Clock import Clock
\ No newline at end of file
+from services.model.Clock import Clock
+from services.model.EditorState import EditorState
+from services.model.TrigCache import TrigCache
+from services.model.TrigWriter import TrigWriter, NativeTerms
+from services.model.ComponentSchema import ComponentSchema
+from services.model.TrigReader import TrigReader, TrigSyntaxError
+from services.model.TrigImporter import TrigImporter
+from services.model.NquadsWriter import NquadsTerms
+from services.model.ProjectDiff import ProjectDiff
\ No newline at end of file
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+""" BlobStore keeps each uploaded data file once, whatever the number of projects using it
+
+The uploads are hashed while they are streamed to the disk, and stored by their sha256 in the
+store folder inside the project space folder:
+
+        /{user.home}/Documents/waves_project_spaces/.blobs/ab/cdef0123...
+
+The file of the project, i.e. tmp/instance/Data/RawSource/Q DT01.csv, is then a hardlink to the
+blob, so the same sensor dump uploaded to dozens of projects takes the disk once. The blobs are
+read-only since they are shared by the projects.
+
+The reference count of a blob is its number of hardlinks, minus the one of the store: it is kept
+by the file system, it can not drift when a project folder is deleted or moved by hand. collect
+frees the blobs no project refers to anymore, it is called when a project or the tmp folder is
+deleted. If the file system has no hardlinks, the upload is copied to the project and the blob
+is freed by the next collect.
+
+A large upload can also be sent in chunks, it survives the interruptions of the connection:
+
+        upload_id = store.open_upload(path, size)      # path: file of the project
+        store.write_upload(upload_id, 0, stream)       # chunk of the bytes 0.., returns the offset
+        store.get_upload(upload_id)['offset']          # after an interruption, resume from there
+        store.write_upload(upload_id, offset, stream)  # the last chunk links the file to the project
+
+The chunks are appended to a part file in the store folder, hashed while they are written, and
+the complete file is linked to the blob and to the project, so it is written to the disk once.
+The hash of each upload is kept in memory between its chunks, it is computed again from the part
+file only if the server restarted. The uploads not written for UPLOAD_MAX_AGE are deleted by collect.
+The chunks of an upload are written one at a time, by any thread or process, under a file lock on
+its part file: a retried chunk sent while the first one is still being written waits for it, then
+gets the new offset.
+"""
+
+from contextlib import contextmanager
+from os.path import expanduser
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_AGE = 24 * 3600
+
+# Upload id -> (offset, sha256 of the bytes before the offset), shared by the stores of the process
+_upload_hashes = {}
+_upload_lock   = threading.Lock()
+
+class UploadOffsetError(ValueError):
+    """ A chunk does not start at the offset of the upload, the client has to resume from offset """
+
+    def __init__(self, offset):
+        ValueError.__init__(self, 'The upload is at offset ' + str(offset))
+        self.offset = offset
+
+class BlobStore(object):
+
+    def __init__(self, directory=None):
+        """ Initial function
+
+        Params:
+            self.directory : Folder of the blobs, one sub folder per first 2 characters of the hash
+            self.tmpDir    : Folder of the uploads being written
+            self.uploadDir : Folder of the chunked uploads, a part file and a json file per upload
+        """
+        if directory is None:
+            directory = expanduser("~") + "/Documents/waves_project_spaces/.blobs"
+        self.directory = directory
+        self.tmpDir    = directory + '/tmp'
+        self.uploadDir = directory + '/uploads'
+
+    def put(self, stream, path):
+        """ Store an upload and link it to a file of a project
+
+        :param stream: binary stream of the upload, i.e. FileStorage.stream
+        :param path: file of the project, replaced if it exists
+        :return: sha256 of the upload
+        """
+        digest, tmp_path = self._write(stream)
+        try:
+            self._link(digest, tmp_path, path)
+            return digest
+        finally:
+            os.remove(tmp_path)
+
+    def get_path(self, digest):
+        """ Get the path of a blob from its sha256 """
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def refcount(self, digest):
+        """ Number of files linked to a blob, 0 if it is not stored """
+        try:
+            return os.stat(self.get_path(digest)).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def collect(self):
+        """ Delete the blobs that are not linked to any file
+
+        :return: number of bytes freed
+        """
+        freed = 0
+        if not os.path.isdir(self.directory):
+            return freed
+        freed += self._collect_uploads()
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir() or len(prefix.name) != 2:
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    st = entry.stat()
+                    if st.st_nlink == 1:
+                        os.remove(entry.path)
+                        freed += st.st_size
+                except FileNotFoundError:
+                    pass
+        return freed
+
+    """
+        Chunked uploads
+    """
+
+    def open_upload(self, path, size):
+        """ Start a chunked upload
+
+        :param path: file of the project the upload is linked to once complete
+        :param size: size of the upload in bytes
+        :return: id of the upload
+        """
+        if size < 0:
+            raise ValueError('The size of the upload must be positive')
+        os.makedirs(self.uploadDir, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        open(self._part_path(upload_id), 'wb').close()
+        with open(self._upload_path(upload_id), 'w') as file:
+            json.dump({'path': path, 'size': size}, file)
+        with _upload_lock:
+            _upload_hashes[upload_id] = (0, hashlib.sha256())
+        return upload_id
+
+    def get_upload(self, upload_id):
+        """ Get the state of a chunked upload
+
+        :return: {'id': .., 'size': .., 'offset': ..}, the offset is the number of bytes received
+        :raise KeyError: if there is no such upload
+        """
+        try:
+            with open(self._upload_path(upload_id), 'r') as file:
+                info = json.load(file)
+            offset = os.path.getsize(self._part_path(upload_id))
+        except (FileNotFoundError, ValueError):
+            raise KeyError(upload_id)
+        return {'id': upload_id, 'size': info['size'], 'offset': offset}
+
+    def write_upload(self, upload_id, offset, stream, length=None):
+        """ Append a chunk to an upload, the last chunk completes the upload
+
+        :param offset: position of the first byte of the chunk, the offset of the upload
+        :param stream: binary stream of the chunk, read until its end or the end of the upload
+        :param length: number of bytes of the chunk, at most this number of bytes is read if it is given
+        :return: {'id': .., 'size': .., 'offset': .., 'sha256': ..}, the sha256 once complete
+        :raise KeyError: if there is no such upload
+        :raise UploadOffsetError: if the chunk does not start at the offset of the upload
+        """
+        with self._lock_upload(upload_id):
+            info = self.get_upload(upload_id)
+            if offset != info['offset']:
+                raise UploadOffsetError(info['offset'])
+
+            sha = self._upload_hash(upload_id, offset)
+            remaining = info['size'] - offset
+            wanted = remaining if length is None else min(length, remaining)
+            if wanted > 0:
+                try:
+                    with open(self._part_path(upload_id), 'ab') as file:
+                        while wanted > 0:
+                            chunk = stream.read(min(CHUNK_SIZE, wanted))
+                            if not chunk:
+                                break
+                            file.write(chunk)
+                            sha.update(chunk)
+                            offset += len(chunk)
+                            remaining -= len(chunk)
+                            wanted -= len(chunk)
+                finally:
+                    # The bytes written are kept even if the connection is lost during the chunk
+                    with _upload_lock:
+                        _upload_hashes[upload_id] = (offset, sha)
+
+            info['offset'] = offset
+            if remaining == 0:
+                info['sha256'] = self._complete_upload(upload_id, sha.hexdigest())
+            return info
+
+    def abort_upload(self, upload_id):
+        """ Delete a chunked upload and its part file, once the chunk being written is done
+
+        :raise KeyError: if there is no such upload
+        """
+        try:
+            with self._lock_upload(upload_id):
+                self._remove_upload(upload_id)
+        except KeyError:
+            # No part file, the json file may be left
+            if not os.path.exists(self._upload_path(upload_id)):
+                raise
+            self._remove_upload(upload_id)
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _link(self, digest, tmp_path, path):
+        """ Store a temporary file as the blob of digest, if it is not stored yet, and link the
+        blob to the file of the project
+        """
+        blob_path = self.get_path(digest)
+        # Retry if the blob is collected between the check and the link
+        for _ in range(3):
+            try:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.link(tmp_path, blob_path)
+            except FileExistsError:
+                # Same content already stored, the upload is dropped
+                pass
+            try:
+                _replace_with_link(blob_path, path)
+                return
+            except FileNotFoundError:
+                if os.path.exists(blob_path):
+                    # The folder of the project file is missing
+                    raise
+        raise FileNotFoundError(blob_path)
+
+    @contextmanager
+    def _lock_upload(self, upload_id):
+        """ Hold the lock of an upload for all the threads and processes
+
+        :raise KeyError: if there is no such upload
+        """
+        try:
+            lock_file = open(self._part_path(upload_id), 'rb')
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+        with lock_file:
+            # Released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _remove_upload(self, upload_id):
+        """ Delete the files of an upload, must be called with the lock of the upload """
+        with _upload_lock:
+            _upload_hashes.pop(upload_id, None)
+        for path in (self._part_path(upload_id), self._upload_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.uploadDir, _check_id(upload_id) + '.part')
+
+    def _upload_path(self, upload_id):
+        return os.path.join(self.uploadDir, _check_id(upload_id) + '.json')
+
+    def _upload_hash(self, upload_id, offset):
+        """ Hash of the first offset bytes of an upload, computed from the part file if the hash
+        kept in memory is not at this offset, i.e. after a restart of the server
+        """
+        with _upload_lock:
+            hashed, sha = _upload_hashes.get(upload_id, (None, None))
+        if hashed == offset:
+            return sha
+
+        sha = hashlib.sha256()
+        with open(self._part_path(upload_id), 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        return sha
+
+    def _complete_upload(self, upload_id, digest):
+        """ Link the part file of a complete upload to its blob and to the file of the project """
+        with open(self._upload_path(upload_id), 'r') as file:
+            path = json.load(file)['path']
+        part_path = self._part_path(upload_id)
+        os.chmod(part_path, 0o444)
+        # If the link fails the upload is kept, an empty chunk at its end completes it again
+        self._link(digest, part_path, path)
+        self._remove_upload(upload_id)
+        return digest
+
+    def _collect_uploads(self):
+        """ Delete the chunked uploads not written for UPLOAD_MAX_AGE
+
+        :return: number of bytes freed
+        """
+        freed = 0
+        if not os.path.isdir(self.uploadDir):
+            return freed
+        for entry in os.scandir(self.uploadDir):
+            if not entry.name.endswith('.json'):
+                continue
+            upload_id = entry.name[:-len('.json')]
+            try:
+                st = os.stat(self._part_path(upload_id))
+                if time.time() - st.st_mtime < UPLOAD_MAX_AGE:
+                    continue
+                freed += st.st_size
+            except FileNotFoundError:
+                pass
+            try:
+                self.abort_upload(upload_id)
+            except KeyError:
+                # Completed or aborted meanwhile
+                pass
+        return freed
+
+    def _write(self, stream):
+        """ Write a stream to a temporary read-only file while hashing it
+
+        :return: (sha256, path of the temporary file)
+        """
+        os.makedirs(self.tmpDir, exist_ok=True)
+        tmp_path = os.path.join(self.tmpDir, uuid.uuid4().hex)
+        sha = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as file:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+                    file.write(chunk)
+            os.chmod(tmp_path, 0o444)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha.hexdigest(), tmp_path
+
+
+def _check_id(upload_id):
+    """ Check that an upload id is an id given by open_upload, it is used in paths """
+    if len(upload_id) != 32 or any(c not in '0123456789abcdef' for c in upload_id):
+        raise KeyError(upload_id)
+    return upload_id
+
+def _replace_with_link(blob_path, path):
+    """ Replace a file by a hardlink to a blob, or a copy of it if the file system has no hardlinks
+
+    :raise FileNotFoundError: if the blob does not exist
+    """
+    tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+    try:
+        os.link(blob_path, tmp_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(blob_path, tmp_path)
+    os.replace(tmp_path, path)
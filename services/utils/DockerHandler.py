@@ -7,8 +7,9 @@ This class is used for doing three things:
 - Stop   docker containers
 - Remove docker containers
 
+The docker SDK is only imported when the client is first used.
+
 """
-import docker
 import subprocess
 
 from services.config import DeploySetting
@@ -20,11 +21,19 @@ class DockerHandler(object):
         """ Initial functions
             
         Params:
-            self.client   : The entry point for Docker Python API
+            self._client  : The entry point for Docker Python API, see client
             self.fhandler : File handler, we need this because we need to knwo the location of dockerfiles 
         """
-        self.client = docker.from_env()
+        self._client = None
         self.fhandler = FileHandler()
+    
+    @property
+    def client(self):
+        """ The entry point for Docker Python API, created on first use """
+        if self._client is None:
+            import docker
+            self._client = docker.from_env()
+        return self._client
         
     """
         Launch docker container
@@ -4,21 +4,44 @@
 
 This class is used for:
     - Set Up Project Space / Project Folder at Local Directory
+    - Keep a tmp workspace per editor session, the uploads of a session are not seen by the others
     - Get list of existing projects
-    - Save uploaded files from stream sources, static feed
-    - Save the workflow UI in html tags in text file
-    - Load project from files -> Project model format, TriG format and Json format
+    - Save uploaded files from stream sources, static feed, each content once in the blob store
+    - Save the workflow UI in html tags in compressed files
+    - Load project from files -> Project model format, TriG format, N-Quads file and Json format
     - Delete project
 """
 
 from werkzeug.utils import secure_filename
 
+from concurrent.futures import ThreadPoolExecutor
 from os.path import expanduser
+import ctypes
+import errno
+import hashlib
 import os
 import shutil
 import json
+import time
+import uuid
+import zlib
 
 from services.model import Project
+from services.utils.ProjectTemplate import ProjectTemplate
+from services.utils.BlobStore import BlobStore
+from services.utils.ProjectCatalog import ProjectCatalog
+from services.utils import WorkflowUI
+from services.config import StorageSetting, SessionSetting
+
+# Buffer size of the files written by setup_project_folder
+WRITE_BUFFER = 1024 * 1024
+
+# Seconds after which a staging or trash directory is considered left by a crash
+STALE_AGE = 3600
+
+# renameat2 arguments, see _rename_exchange
+AT_FDCWD        = -100
+RENAME_EXCHANGE = 2
 
 class FileHandler(object):
     
@@ -26,9 +49,12 @@ class FileHandler(object):
         Init function
     """
     
-    def __init__(self):
+    def __init__(self, session_id=None):
         """ Initial function for some default directory locations
         
+        :param session_id: id of the editor session whose tmp workspace is used, see self.tmpDir,
+            the uploads and the project creation of different sessions do not share files
+        
         Params:
             self.directory: 
                 Project space directory
@@ -41,6 +67,10 @@ class FileHandler(object):
                     for example, the stream source files, static feeds etc. The tmpDir is where
                     we save there temp files. Once user click on create project button, all the temp
                     data will be moved to the project folder
+                Each editor session has its own tmp directory, a workspace inside the folder of
+                the workspaces, the one without session is "default"
+            self.workspacesDir:
+                Folder of the tmp directories of the sessions, /{user.home}/Documents/waves_project_spaces/tmp
             self.tmpDataDir:
                 Temporal data folder
                 Save the temp data files which are uploaded by users
@@ -50,13 +80,33 @@ class FileHandler(object):
                 Sub data folder for RDF Source
             self.tmpStaticFeedDir:
                 Sub data folder for Static Doc Feed
+            self.template:
+                Docker folder materialized in the tmp folder and the project folders, see ProjectTemplate
+            self.blobs:
+                Store of the uploaded data files, linked to the tmp folder and the project folders, see BlobStore
+            self.catalog:
+                Summaries of the projects of the project space, see ProjectCatalog
+            self.db:
+                ProjectDatabase where the projects are saved with the "sqlite" backend of StorageSetting,
+                None with the "files" backend
         """
         self.directory = expanduser("~") + "/Documents/waves_project_spaces"
-        self.tmpDir = self.directory + '/tmp'
+        self.workspacesDir = self.directory + '/tmp'
+        self.tmpDir = self.workspacesDir + '/' + _workspace_name(session_id)
         self.tmpDataDir = self.tmpDir + "/instance/Data"
         self.tmpRawSourceDir = self.tmpDataDir + "/RawSource"
         self.tmpRdfSourceDir = self.tmpDataDir + "/RdfSource"
         self.tmpStaticFeedDir = self.tmpDataDir + "/StaticFeed"
+        self.template = ProjectTemplate(directory=self.directory + "/.template")
+        self.blobs = BlobStore(directory=self.directory + "/.blobs")
+        self.catalog = ProjectCatalog(directory=self.directory)
+        if StorageSetting.backend == 'sqlite':
+            from services.utils.ProjectDatabase import ProjectDatabase
+            self.db = ProjectDatabase(StorageSetting.sqlitePath or self.directory + "/.projects.db")
+        elif StorageSetting.backend == 'files':
+            self.db = None
+        else:
+            raise ValueError('Unknown storage backend ' + StorageSetting.backend)
     
     """
         Set Up Project Space / Project Folders
@@ -69,9 +119,12 @@ class FileHandler(object):
         
         The set up process will do:
             - Create project space folder if it doesn't exist
-            - Copy docker folder to the tmp folder
-            - Empty all the tmp data folder
+            - Materialize the docker folder in the tmp folder of the session, its files are linked, not copied
+            - Empty all the tmp data folder of the session
+            - Remove the tmp folders of the sessions idle for more than SessionSetting.maxIdle, 
+                their editor states are evicted too
         
+        The tmp folders of the other sessions are kept, the uploads linked in them are not freed.
         """
         
         if not self._exists_dir( self.directory ):
@@ -81,11 +134,14 @@ class FileHandler(object):
             # If already exists, do nothing
             pass
         
-        self._empty_dir( self.tmpDir )
+        self._remove_dir( self.tmpDir )
+        self._remove_idle_workspaces()
+        # Free the uploads of the removed tmp folders that are in no project
+        self.blobs.collect()
+        self._remove_stale_dirs()
         
-        # Copy docker to tmp folder
-        docker_folder = os.path.join(os.path.dirname(__file__), 'docker-standalone')
-        self._copy_dir(docker_folder, self.tmpDir)
+        # Materialize docker in tmp folder, without the sample data
+        self.template.materialize( self.tmpDir, exclude=['instance/Data'] )
         
         # Empty the source data folder
         self._empty_dir( self.tmpDataDir )
@@ -94,19 +150,29 @@ class FileHandler(object):
         self._empty_dir( self.tmpStaticFeedDir )
         
         
-    def setup_project_folder(self, project):
+    def setup_project_folder(self, project, artifacts=None):
         """ Set up project folder
 
         When user create a new project, we need to save the project somewhere in his machine.
         We choose the project folder location as: /{user.home}/Documents/waves_project_space/NEW_PROJECT_NAME
 
-        Copy the tmp folder --> project folder
-        Write the project information as trig and json file
+        Move the tmp folder --> project folder, or materialize the docker folder if there is no tmp folder
+        Write the project information as trig, n-quads and json file
+        
+        The json, the trig and the n-quads are written by worker threads while the docker folder
+        is set up, in a staging directory next to the project directory. The staging directory
+        replaces the project directory once complete, so the project directory is either the old
+        one or the new one, never a half-built one.
 
+        With the "sqlite" backend of StorageSetting, the json and the trig are saved in the database
+        instead, see ProjectDatabase, only the docker folder is written.
+        
         After setop, the structure of directory is:
         | -- PROJECT_NAME.trig
+        | -- PROJECT_NAME.nq
         | -- PROJECT_NAME.json
-        | -- workflow.txt
+        | -- workflow.txt.gz
+        | -- workflow.html.gz
         | -- docker-standalone
             | -- docker-compose.yml
             | -- instance
@@ -115,38 +181,65 @@ class FileHandler(object):
                 | -- ....
 
         :param project: Project model
+        :param artifacts: TrigArtifactCache, if given the TriG is copied from it instead of 
+            being generated, i.e. the TriG already generated for the preview
         :return:
         """
         
         project_name = project.projectInfo.name
-        
-        # Create an empty project directory
         project_dir = self.directory + "/" + project_name
-        self._empty_dir( project_dir )
-        
-        # Create docker folder and copy the docker folder -> project space folder
-        docker_dir = project_dir + '/docker-standalone'
-        self._create_dir( docker_dir )
-        # Copy data to docker directory and remove the tmp directory
-        if self._exists_dir( self.tmpDir ):
-            self._copy_dir( self.tmpDir, docker_dir )
-            self._remove_dir( self.tmpDir )
-        
-        # Get project information in json and trig format
-        json_str = json.dumps(project.to_dict(), indent=5, sort_keys=True)
-        trig_str = project.parse_trig() 
-        
-        # Save json string in current project space
-        with open( project_dir + "/" + project_name + ".json", "w") as text_file:
-            text_file.write(json_str)
         
-        # Save trig string in current project space
-        with open( project_dir + "/" + project_name + ".trig", "w") as text_file:
-            text_file.write(trig_str)
-        
-        # Save trig string in docker folder
-        with open( project_dir + "/docker-standalone/instance/Configuration/TriG/waves.trig", "w") as file:
-            file.write(trig_str)
+        # Everything is written in a staging directory next to the project directory, then published
+        # in one step, so a crash never leaves a half-built project, see _publish_dir
+        stage_dir = self._sibling_dir( project_name, 'staging' )
+        docker_dir = stage_dir + '/docker-standalone'
+        self._create_dir( stage_dir )
+        
+        trig_path = stage_dir + "/" + project_name + ".trig"
+        docker_trig_path = docker_dir + "/instance/Configuration/TriG/waves.trig"
+        moved_tmp = False
+        
+        try:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                # Serialize the project in worker threads while the docker directory is set up
+                json_future = pool.submit( self._write_json, project, stage_dir + "/" + project_name + ".json" )
+                trig_future = pool.submit( self._write_trig, project, trig_path, artifacts )
+                if self.db is None:
+                    nquads_future = pool.submit( self._write_nquads, project, stage_dir + "/" + project_name + ".nq" )
+                
+                # Move the tmp directory with the uploaded data -> docker directory, a rename keeps the links
+                if self._exists_dir( self.tmpDir ):
+                    os.rename( self.tmpDir, docker_dir )
+                    moved_tmp = True
+                else:
+                    self.template.materialize( docker_dir, exclude=['instance/Data'] )
+                
+                project_dict, json_str = json_future.result()
+                trig = trig_future.result()
+                if self.db is None:
+                    nquads_future.result()
+            
+            if self.db is not None:
+                # Only the docker directory is kept as files, json and trig go to the database
+                os.remove( stage_dir + "/" + project_name + ".json" )
+                os.replace( trig_path, docker_trig_path )
+            else:
+                # The trig of the docker directory is the same file as the one of the project
+                self._replace_with_link( trig_path, docker_trig_path )
+            
+            self._publish_dir( stage_dir, project_dir )
+        except BaseException:
+            # Give the uploaded data back to the tmp directory
+            if moved_tmp and not self._exists_dir( self.tmpDir ):
+                os.rename( docker_dir, self.tmpDir )
+            self._remove_dir( stage_dir )
+            raise
+        
+        if self.db is not None:
+            # Save json and trig in one transaction
+            self.db.save_project( project_name, project_dict, json_str, trig )
+        else:
+            self.catalog.update( project_name, project_dict )
     
     """
         Get project space information
@@ -156,11 +249,15 @@ class FileHandler(object):
         """ Fetch list of project names
         
         The list of project name is the same as list of folder names inside the project space directory.
+        With the "sqlite" backend, it is the list of projects of the database.
         
         Returns:
             project_name_list: List of project names
         """
         
+        if self.db is not None:
+            return self.db.list_names()
+        
         # Get the list of directory names
         project_name_list = self._list_dir_name( self.directory )
         
@@ -172,6 +269,19 @@ class FileHandler(object):
         
         return project_name_list
     
+    def list_projects(self, offset=0, limit=None, sort='name', descending=False):
+        """ List the summaries of the projects from the catalog, without reading the project files
+        
+        See ProjectCatalog.list, the catalog is synced with the project folders first. With the
+        "sqlite" backend, the summaries are queried from the database.
+        
+        :return: (total number of projects, list of summaries)
+        """
+        
+        if self.db is not None:
+            return self.db.list(offset, limit, sort, descending)
+        return self.catalog.list(offset, limit, sort, descending)
+    
     """
         Save uploaded files
     """
@@ -179,30 +289,54 @@ class FileHandler(object):
     def save_raw_source_file(self, file):
         """ Save raw source file at temp raw source data file folder 
         
+        The file is stored once in the blob store and linked to the folder, see BlobStore
+        
         :param file: uploaded raw source file
+        :return: sha256 of the file
         """
         
         filename = secure_filename(file.filename)
-        file.save(self.tmpRawSourceDir + '/' + filename)
+        return self.blobs.put(file.stream, self.tmpRawSourceDir + '/' + filename)
         
     def save_rdf_source_file(self, file):
-        """ Save rdf source file at temp rdf source data file folder 
+        """ Save rdf source file at temp rdf source data file folder, see save_raw_source_file
 
         :param file: uploaded rdf source file
+        :return: sha256 of the file
         """
         
         filename = secure_filename(file.filename)
-        file.save(self.tmpRdfSourceDir + '/' + filename)
+        return self.blobs.put(file.stream, self.tmpRdfSourceDir + '/' + filename)
     
     def save_static_feed_file(self, file):
-        """ Save static feed file at temp static doc feed file folder 
+        """ Save static feed file at temp static doc feed file folder, see save_raw_source_file
         
         :param file: uploaded static document feed file
+        :return: sha256 of the file
         """
         
         filename = secure_filename(file.filename)
-        file.save(self.tmpStaticFeedDir + '/' + filename)
+        return self.blobs.put(file.stream, self.tmpStaticFeedDir + '/' + filename)
+
+    def open_upload(self, filename, kind, size):
+        """ Start a chunked upload of a data file, see BlobStore.open_upload
+
+        The chunks are written by BlobStore.write_upload, the complete file is linked to the temp
+        data folder of its kind, like the files saved by save_raw_source_file.
 
+        :param filename: name of the uploaded file
+        :param kind: "raw" source, "rdf" source or "static" feed
+        :param size: size of the file in bytes
+        :return: id of the upload
+        """
+        folders = {'raw': self.tmpRawSourceDir, 'rdf': self.tmpRdfSourceDir, 'static': self.tmpStaticFeedDir}
+        if kind not in folders:
+            raise ValueError('Unknown kind of upload: ' + str(kind))
+        filename = secure_filename(filename)
+        if not filename:
+            raise ValueError('Invalid file name')
+        return self.blobs.open_upload(folders[kind] + '/' + filename, size)
+    
     def get_static_feed_filename(self):
         """ Get the filename of static feed file
 
@@ -224,21 +358,33 @@ class FileHandler(object):
 
         
     """
-        Workflow UI tags read and write from text file
+        Workflow UI tags read and write from compressed files
     """
         
     def save_workflow_ui(self, workflow_ui, project_name):
-        """ Save workflow ui in HTML tags format into a text file 
+        """ Save workflow ui in HTML tags format into gzip compressed files
+        
+        The workflow ui is saved as it is in workflow.txt.gz, and normalized, as the front-end
+        inserts it, in workflow.html.gz, see services.utils.WorkflowUI
         
         :param workflow_ui: workflow structure in HTML tags in string format
         :param project_name: project name
         """
         
-        with open( self.directory + "/" + project_name + "/workflow.txt", "w") as file:
-            file.write(workflow_ui)
+        if self.db is not None:
+            self.db.save_document(project_name, 'workflow_ui', workflow_ui)
+            return
+        
+        project_dir = self.directory + "/" + project_name
+        self._write_file( project_dir + "/workflow.txt.gz", WorkflowUI.compress(workflow_ui) )
+        self._write_file( project_dir + "/workflow.html.gz", WorkflowUI.compress(WorkflowUI.normalize(workflow_ui)) )
+        
+        # Workflow ui saved as text by an older version
+        if os.path.isfile( project_dir + "/workflow.txt" ):
+            os.remove( project_dir + "/workflow.txt" )
     
     def get_workflow_ui(self, project_name):
-        """ Get workflow ui in HTML tags in string format from text file 
+        """ Get workflow ui in HTML tags in string format from the normalized file 
         
         The string will be send back to front-end to view the structure of workflow.
         
@@ -247,15 +393,36 @@ class FileHandler(object):
         :return: workflow_ui: HTML tags for workflow structure in string format
         """
         
-        workflow_ui = ""
+        data, encoding = self.get_workflow_ui_compressed(project_name)
+        if encoding == 'deflate':
+            return zlib.decompress(data).decode('utf-8')
+        return WorkflowUI.decompress(data)
+    
+    def get_workflow_ui_compressed(self, project_name):
+        """ Get the normalized workflow ui as it is stored, to send it without decompressing it
+        
+        :param project_name: Project name to fetch the workflow ui html tags
+        :return: (compressed bytes, encoding), the encoding is "gzip" or, with the "sqlite" backend, "deflate"
+        :raise FileNotFoundError: if the project has no workflow ui
+        """
         
-        # Read the file line by line
-        with open( self.directory + "/" + project_name + "/workflow.txt", "r") as file:
-            for line in file:
-                if line.rstrip() != "":
-                    workflow_ui = workflow_ui + line.replace("\n", "")
+        if self.db is not None:
+            try:
+                return self.db.get_compressed_document(project_name, 'workflow_ui_normalized'), 'deflate'
+            except FileNotFoundError:
+                # Saved before the normalized workflow ui was stored
+                workflow_ui = self.db.get_document(project_name, 'workflow_ui')
+                return WorkflowUI.compress(WorkflowUI.normalize(workflow_ui)), 'gzip'
         
-        return workflow_ui
+        project_dir = self.directory + "/" + project_name
+        try:
+            with open( project_dir + "/workflow.html.gz", "rb") as file:
+                return file.read(), 'gzip'
+        except FileNotFoundError:
+            # Saved as text by an older version
+            with open( project_dir + "/workflow.txt", "r") as file:
+                workflow_ui = file.read()
+            return WorkflowUI.compress(WorkflowUI.normalize(workflow_ui)), 'gzip'
     
     """
         Get project in Project, json or trig format
@@ -282,30 +449,90 @@ class FileHandler(object):
         :return: returned project in trig strng format
         """
         
-        trig = ""
+        if self.db is not None:
+            return self.db.get_document(project_name, 'trig')
         
-        # Read the file line by line
-        with open( self.directory + "/" + project_name + "/" + project_name + ".trig", "r") as file:
-            for line in file:
-                trig = trig + line
+        with open( self.get_project_trig_path(project_name), "r") as file:
+            return file.read()
+    
+    def get_project_trig_path(self, project_name):
+        """ Get the path of the project trig file, i.e. to read it as a stream
+
+        With the "sqlite" backend, it is the trig of the docker folder, the same as the one saved in
+        the database.
+
+        :param project_name: project_name of project
+        :return: path of the trig file
+        """
+        
+        if self.db is not None:
+            return self.directory + "/" + project_name + "/docker-standalone/instance/Configuration/TriG/waves.trig"
+        return self.directory + "/" + project_name + "/" + project_name + ".trig"
+    
+    def get_project_nquads_path(self, project_name):
+        """ Get the path of the project n-quads file, written by setup_project_folder
+
+        The projects created before the n-quads were written, and the projects of the "sqlite"
+        backend, have no such file
+
+        :param project_name: project_name of project
+        :return: path of the n-quads file
+        """
         
-        return trig
+        return self.directory + "/" + project_name + "/" + project_name + ".nq"
     
     def get_project_as_dict(self, project_name):
         """ Get the project as python dict
 
+        Project files written in an older format are upgraded to the current format,
+        see Project.upgrade_dict
+
         :param project_name: project_name of project to fetch
         :return: returned project in python dict format
         """
         
-        json_str = ""
+        if self.db is not None:
+            project_dict = json.loads(self.db.get_document(project_name, 'json'))
+        else:
+            with open( self.directory + "/" + project_name + "/" + project_name + ".json", "r") as file:
+                project_dict = json.load(file)
+        
+        project = Project()
+        return project.upgrade_dict(project_dict)
+    
+    def get_project_version(self, project_name):
+        """ Get the version of what the project is read from, it changes each time the project is saved
         
-        with open( self.directory + "/" + project_name + "/" + project_name + ".json", "r") as file:
-            json_str = "".join(file)
+        With the "files" backend it is made of the modification times and the sizes of the json, the
+        trig and the workflow UI files, with the "sqlite" backend of the time the project was saved.
         
-        project_dict = json.loads(json_str)
+        :param project_name: project_name of project
+        :return: (version string, modification time in seconds since the epoch)
+        :raise FileNotFoundError: if there is no such project
+        """
         
-        return project_dict
+        if self.db is not None:
+            modifiedAt = self.db.get_modified_at(project_name)
+            return repr(modifiedAt), modifiedAt
+        
+        project_dir = self.directory + "/" + project_name
+        parts = []
+        modifiedAt = 0
+        for path in ( project_dir + "/" + project_name + ".json", 
+                      project_dir + "/" + project_name + ".trig", 
+                      project_dir + "/workflow.html.gz",
+                      project_dir + "/workflow.txt" ):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                # The workflow UI is saved after the project folder, as text by an older version
+                if not path.startswith(project_dir + "/workflow."):
+                    raise
+                parts.append("-")
+                continue
+            parts.append( str(st.st_mtime_ns) + "-" + str(st.st_size) )
+            modifiedAt = max(modifiedAt, st.st_mtime)
+        return ":".join(parts), modifiedAt
     
     """
         Delete Project
@@ -314,21 +541,159 @@ class FileHandler(object):
     def delete_project(self, project_name):
         """ Delete Project
 
-        Delete project at waves project space local directory
+        Delete project at waves project space local directory, the uploaded data files that were
+        only in this project are freed from the blob store
 
         :param project_name: name of project to be deleted
         :return:
         """
         self._remove_dir( self.directory + '/' + project_name)
+        if self.db is not None:
+            self.db.delete_project( project_name )
+        else:
+            self.catalog.remove( project_name )
+        self.blobs.collect()
         
     # ====================================
     # Private functions
     # ====================================
     
+    """
+        Project serialization, run in the worker threads of setup_project_folder
+    """
+    
+    def _write_json(self, project, path):
+        """ Write the project json, in the reference based format, see Project.to_ref_dict
+        
+        :return: (python dictionary of the project, json string)
+        """
+        project_dict = project.to_ref_dict()
+        json_str = json.dumps(project_dict, indent=5, sort_keys=True)
+        with open( path, "w", buffering=WRITE_BUFFER ) as text_file:
+            text_file.write(json_str)
+        return project_dict, json_str
+    
+    def _write_trig(self, project, path, artifacts=None):
+        """ Write the project trig, copied from the artifacts if given, streamed while it is generated otherwise
+        
+        :return: trig string with the "sqlite" backend, None otherwise
+        """
+        if artifacts is not None:
+            artifacts.copy_to( project, path )
+        else:
+            with open( path, "w", buffering=WRITE_BUFFER ) as text_file:
+                project.write_trig(text_file)
+        if self.db is not None:
+            with open( path, "r", newline='' ) as text_file:
+                return text_file.read()
+    
+    def _write_nquads(self, project, path):
+        """ Write the same statements as the trig as n-quads, line by line while they are generated """
+        with open( path, "w", buffering=WRITE_BUFFER ) as text_file:
+            project.write_nquads(text_file)
+    
     """
         Directory processing 
     """
     
+    def _write_file(self, path, data):
+        """ Replace a file by bytes, written to a temporary file first so the file is always complete """
+        tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+        try:
+            with open( tmp_path, "wb" ) as file:
+                file.write(data)
+            os.replace( tmp_path, path )
+        except BaseException:
+            if os.path.exists( tmp_path ):
+                os.remove( tmp_path )
+            raise
+    
+    def _sibling_dir(self, project_name, kind):
+        """ Path of a hidden directory next to the project directory, i.e. .NAME.3f2a..staging """
+        return self.directory + "/." + project_name + "." + uuid.uuid4().hex + "." + kind
+    
+    def _publish_dir(self, stage_dir, project_dir):
+        """ Replace the project directory by the staging directory
+        
+        The two directories are swapped in one step (renameat2 with RENAME_EXCHANGE), so the project
+        directory always exists, then the old one is removed. If the system can't swap them, the
+        old project directory is renamed to a trash directory first, then removed once the new one
+        is in place, a trash directory left by a crash in between is restored by _remove_stale_dirs.
+        """
+        if not self._exists_dir( project_dir ):
+            os.rename( stage_dir, project_dir )
+            return
+        
+        if _rename_exchange( stage_dir, project_dir ):
+            # The staging directory is now the old project directory
+            self._remove_dir( stage_dir )
+            return
+        
+        trash_dir = self._sibling_dir( os.path.basename(project_dir), 'trash' )
+        os.rename( project_dir, trash_dir )
+        try:
+            os.rename( stage_dir, project_dir )
+        except OSError:
+            os.rename( trash_dir, project_dir )
+            raise
+        self._remove_dir( trash_dir )
+    
+    def _remove_stale_dirs(self):
+        """ Remove the staging and trash directories left by a crash, after STALE_AGE seconds 
+        
+        A trash directory whose project directory is missing is the project itself, left by a crash
+        while it was replaced, it is renamed back to the project directory instead.
+        """
+        if not self._exists_dir( self.directory ):
+            return
+        for entry in os.scandir( self.directory ):
+            if not entry.name.startswith('.') or not entry.is_dir():
+                continue
+            if entry.name.endswith('.trash'):
+                # .NAME.UUID.trash, see _sibling_dir
+                project_dir = self.directory + "/" + entry.name[1:-len('.trash')].rsplit('.', 1)[0]
+                if not self._exists_dir( project_dir ):
+                    os.rename( entry.path, project_dir )
+                    continue
+            if entry.name.endswith(('.staging', '.trash')):
+                if time.time() - entry.stat().st_mtime > STALE_AGE:
+                    self._remove_dir( entry.path )
+    
+    def _remove_idle_workspaces(self):
+        """ Remove the tmp folders of the sessions not used for more than SessionSetting.maxIdle seconds
+        
+        A tmp folder is used when it is set up or when a file is uploaded to one of its data folders.
+        The files left by the shared tmp folder of older versions are removed the same way.
+        """
+        if not self._exists_dir( self.workspacesDir ):
+            return
+        limit = time.time() - SessionSetting.maxIdle
+        for entry in os.scandir( self.workspacesDir ):
+            if entry.path == self.tmpDir:
+                continue
+            data_dir = entry.path + "/instance/Data"
+            paths = [entry.path, data_dir] + [data_dir + "/" + kind for kind in ("RawSource", "RdfSource", "StaticFeed")]
+            try:
+                used = max( os.stat(path).st_mtime for path in paths if os.path.exists(path) )
+                if used >= limit:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    self._remove_dir( entry.path )
+                else:
+                    os.remove( entry.path )
+            except FileNotFoundError:
+                # Removed by another request
+                pass
+    
+    def _replace_with_link(self, src, dst):
+        """ Replace dst by a hardlink to src, or a copy if the file system has no hardlinks """
+        tmp_path = dst + '.' + uuid.uuid4().hex + '.tmp'
+        try:
+            os.link( src, tmp_path )
+        except OSError:
+            shutil.copyfile( src, tmp_path )
+        os.replace( tmp_path, dst )
+    
     def _create_dir(self, directory):       
         """ Create Directory """     
         os.makedirs(directory)
@@ -347,16 +712,6 @@ class FileHandler(object):
         """ Check if the directory exists """
         return os.path.exists(directory)
     
-    def _copy_dir(self, src, dst):
-        """ Copy folder from source to destination """
-        for item in os.listdir(src):
-            s = os.path.join(src, item)
-            d = os.path.join(dst, item)
-            if os.path.isdir(s):
-                shutil.copytree(s, d, False, None)
-            else:
-                shutil.copy2(s, d)
-                
     def _list_dir_name(self, parentDir):
         """ Get list of directory in parent directort  """
         name_list = []
@@ -368,4 +723,36 @@ class FileHandler(object):
                 if not name.startswith('.') :
                     name_list.append(name) 
         
-        return name_list
\ No newline at end of file
+        return name_list
+
+
+def _workspace_name(session_id):
+    """ Name of the tmp folder of a session, the session id comes from a cookie so it is hashed """
+    if session_id is None:
+        return 'default'
+    return hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]
+
+def _find_renameat2():
+    """ renameat2 of the C library, None if it has none, i.e. not Linux """
+    try:
+        function = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError):
+        return None
+    function.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return function
+
+_renameat2 = _find_renameat2()
+
+def _rename_exchange(path_a, path_b):
+    """ Swap two existing paths in one step, with renameat2(RENAME_EXCHANGE)
+
+    :return: True if they are swapped, False if the system or the file system can't, nothing is done then
+    """
+    if _renameat2 is None:
+        return False
+    if _renameat2(AT_FDCWD, os.fsencode(path_a), AT_FDCWD, os.fsencode(path_b), RENAME_EXCHANGE) == 0:
+        return True
+    code = ctypes.get_errno()
+    if code in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        return False
+    raise OSError(code, os.strerror(code), path_a, None, path_b)
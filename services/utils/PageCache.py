@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+""" PageCache keeps the rendered pages of the projects, as they are and gzip compressed
+
+A page is kept with the version of what it is rendered from, i.e. the modification times of the
+project files (see FileHandler.get_project_version). The page of a project is rendered and
+compressed again only when its version changed, the other requests get the bytes of the cache
+as they are:
+
+        body, gzipBody = pages.get(project_name, version, render)
+
+The least recently used pages are dropped when they take more than maxBytes.
+"""
+
+from collections import OrderedDict
+import gzip
+import threading
+
+class PageCache(object):
+
+    def __init__(self, maxBytes=32 * 1024 * 1024, compressLevel=6):
+        """ Initial function
+
+        Params:
+            self.maxBytes      : Max total size of the pages, compressed and not
+            self.compressLevel : gzip level of the compressed pages
+            self.hits          : Number of pages found in the cache
+            self.misses        : Number of pages rendered
+            self._entries      : key -> (version, body, gzip body), least recently used first
+            self._size         : Total size of the pages
+            self._lock         : Lock of the entries
+        """
+        self.maxBytes      = maxBytes
+        self.compressLevel = compressLevel
+        self.hits          = 0
+        self.misses        = 0
+        self._entries      = OrderedDict()
+        self._size         = 0
+        self._lock         = threading.Lock()
+
+    def get(self, key, version, build):
+        """ Get the page of a key at a version, build and compress it if it is not in the cache
+
+        :param key: key of the page, i.e. the project name
+        :param version: version of what the page is built from, the page of another version is replaced
+        :param build: function without argument that builds the page as bytes
+        :return: (body, gzip compressed body)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+
+        body = build()
+        gzipBody = gzip.compress(body, self.compressLevel, mtime=0)
+
+        with self._lock:
+            self.misses += 1
+            self._drop(key)
+            self._entries[key] = (version, body, gzipBody)
+            self._size += len(body) + len(gzipBody)
+            while self._size > self.maxBytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+        return body, gzipBody
+
+    def clear(self):
+        """ Drop all the pages """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1]) + len(entry[2])
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+""" ProjectCatalog keeps a summary of each project of the project space in a SQLite database
+
+The project space page only needs the project info and a few counts of each project, the
+catalog keeps them so the page does not read and parse the json file of every project:
+    - projects : name, description, license, version, createdAt, number of components and links,
+                 modification time and size of the json file of the project
+
+The catalog is updated by FileHandler.setup_project_folder and FileHandler.delete_project. It is
+also made consistent with the folders of the project space by sync, before each listing: the
+folders are scanned and only the json files whose modification time or size changed are read
+again, so a project copied, edited or deleted by hand is found, and a deleted catalog is rebuilt.
+
+The database is /{user.home}/Documents/waves_project_spaces/.catalog.sqlite by default.
+"""
+
+from contextlib import contextmanager
+from os.path import expanduser
+import json
+import os
+import sqlite3
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS projects (
+        name        TEXT PRIMARY KEY,
+        description TEXT,
+        license     TEXT,
+        version     TEXT,
+        createdAt   TEXT,
+        cmpts       INTEGER,
+        links       INTEGER,
+        modifiedAt  REAL,
+        mtimeNs     INTEGER,
+        size        INTEGER
+    );
+"""
+
+# Columns the projects can be sorted by
+SORT_KEYS = ['name', 'createdAt', 'modifiedAt', 'version', 'cmpts', 'links']
+
+# Folders of the project space that are not projects
+IGNORED = ['tmp']
+
+class ProjectCatalog(object):
+
+    def __init__(self, directory=None, path=None):
+        """ Initial function
+
+        Params:
+            self.directory : Project space folder, a project is a folder with a PROJECT_NAME.json file
+            self.path      : Path of the SQLite database
+        """
+        if directory is None:
+            directory = expanduser("~") + "/Documents/waves_project_spaces"
+        self.directory = directory
+        self.path      = path if path is not None else directory + "/.catalog.sqlite"
+
+    def update(self, project_name, info):
+        """ Add or replace the summary of a project, after its json file is written
+
+        :param project_name: name of the project
+        :param info: python dictionary of the project, as written in its json file
+        """
+        try:
+            st = os.stat(self._json_path(project_name))
+        except FileNotFoundError:
+            self.remove(project_name)
+            return
+        with self._connect() as conn:
+            self._upsert(conn, project_name, info, st)
+
+    def remove(self, project_name):
+        """ Remove the summary of a project """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM projects WHERE name = ?", (project_name,))
+
+    def sync(self):
+        """ Make the catalog consistent with the folders of the project space
+
+        :return: number of summaries added, updated or removed
+        """
+        files = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith('.') or entry.name in IGNORED or not entry.is_dir():
+                    continue
+                try:
+                    files[entry.name] = os.stat(self._json_path(entry.name))
+                except FileNotFoundError:
+                    pass
+
+        changes = 0
+        with self._connect() as conn:
+            known = dict( (name, (mtimeNs, size)) for name, mtimeNs, size in
+                          conn.execute("SELECT name, mtimeNs, size FROM projects") )
+            for name in known:
+                if name not in files:
+                    conn.execute("DELETE FROM projects WHERE name = ?", (name,))
+                    changes += 1
+            for name, st in files.items():
+                if known.get(name) == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    with open(self._json_path(name), 'r') as file:
+                        info = json.load(file)
+                except (IOError, ValueError) as e:
+                    print( "Project not in catalog : ", name, e )
+                    continue
+                self._upsert(conn, name, info, st)
+                changes += 1
+        return changes
+
+    def list(self, offset=0, limit=None, sort='name', descending=False):
+        """ List the summaries of the projects, see sync
+
+        :param offset: number of projects to skip
+        :param limit: max number of projects, all by default
+        :param sort: column to sort by, one of SORT_KEYS, then by name
+        :param descending: sort in descending order
+        :return: (total number of projects, list of summaries), a summary is
+            {'name': .., 'projectInfo': {'name', 'description', 'license', 'version', 'createdAt'},
+             'cmpts': .., 'links': .., 'modifiedAt': ..}
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError('Can not sort by ' + str(sort) + ', sort by one of ' + ', '.join(SORT_KEYS))
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError('The offset and the limit must be positive')
+
+        self.sync()
+        order = ' DESC' if descending else ' ASC'
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+            rows = conn.execute(
+                "SELECT name, description, license, version, createdAt, cmpts, links, modifiedAt "
+                "FROM projects ORDER BY " + sort + order + ", name" + order + " LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)).fetchall()
+
+        return total, [summary(row) for row in rows]
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    @contextmanager
+    def _connect(self):
+        """ Open the database for a transaction, committed at the end: with self._connect() as conn """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _json_path(self, project_name):
+        return os.path.join(self.directory, project_name, project_name + ".json")
+
+    def _upsert(self, conn, project_name, info, st):
+        conn.execute(
+            "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (project_name,) + summary_columns(info) + (st.st_mtime, st.st_mtime_ns, st.st_size))
+
+
+def summary_columns(info):
+    """ Columns of the summary of a project, from description to links
+
+    :param info: python dictionary of the project, as written in its json file
+    :return: (description, license, version, createdAt, cmpts, links)
+    """
+    projectInfo = info.get('projectInfo', {})
+    workflow    = info.get('workflow', {})
+    return (projectInfo.get('description'), projectInfo.get('license'),
+            projectInfo.get('version'), projectInfo.get('createdAt'),
+            len(workflow.get('cmpt_list', [])), len(workflow.get('link_list', [])))
+
+def summary(row):
+    """ Summary of a project from the row (name, description, license, version, createdAt, cmpts,
+    links, modifiedAt), see ProjectCatalog.list
+    """
+    name, description, license, version, createdAt, cmpts, links, modifiedAt = row
+    return {
+        'name'        : name,
+        'projectInfo' : {'name': name, 'description': description, 'license': license,
+                         'version': version, 'createdAt': createdAt},
+        'cmpts'       : cmpts,
+        'links'       : links,
+        'modifiedAt'  : modifiedAt,
+    }
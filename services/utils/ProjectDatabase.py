@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+""" ProjectDatabase keeps the projects of the project space in a SQLite database
+
+It is the "sqlite" backend of StorageSetting, used by FileHandler instead of the files of each
+project folder:
+    - projects  : name, the summary of the project (see ProjectCatalog) and the time it was saved,
+                  indexed by name, createdAt and modifiedAt
+    - documents : name of the project, kind and zlib compressed content of each document:
+                  "json" (the project json, see Project.to_ref_dict), "trig", "workflow_ui" and
+                  "workflow_ui_normalized" (see services.utils.WorkflowUI), saved with the workflow UI
+
+A project is saved in one transaction, so its json and its TriG are always of the same version,
+and listing the projects is a query on the projects table, the documents are not read. The docker
+folder of each project, with its TriG and its data, stays in the project folder to be launched.
+
+The database is opened in WAL mode so the readers do not wait for the writer, each thread keeps
+its connection.
+"""
+
+from contextlib import contextmanager
+from os.path import expanduser
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from services.config import StorageSetting
+from services.utils.ProjectCatalog import SORT_KEYS, summary, summary_columns
+from services.utils import WorkflowUI
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS projects (
+        name        TEXT PRIMARY KEY,
+        description TEXT,
+        license     TEXT,
+        version     TEXT,
+        createdAt   TEXT,
+        cmpts       INTEGER,
+        links       INTEGER,
+        modifiedAt  REAL
+    );
+    CREATE INDEX IF NOT EXISTS projects_createdAt  ON projects (createdAt, name);
+    CREATE INDEX IF NOT EXISTS projects_modifiedAt ON projects (modifiedAt, name);
+    CREATE TABLE IF NOT EXISTS documents (
+        name    TEXT NOT NULL,
+        kind    TEXT NOT NULL,
+        content BLOB NOT NULL,
+        PRIMARY KEY (name, kind)
+    );
+"""
+
+# Kinds of the documents of a project
+DOCUMENTS = ['json', 'trig', 'workflow_ui', 'workflow_ui_normalized']
+
+# Connection of each thread to each database
+_local = threading.local()
+
+class ProjectDatabase(object):
+
+    def __init__(self, path=None):
+        """ Initial function
+
+        Params:
+            self.path : Path of the SQLite database, StorageSetting.sqlitePath or
+                        /{user.home}/Documents/waves_project_spaces/.projects.db by default
+        """
+        if path is None:
+            path = StorageSetting.sqlitePath
+        if path is None:
+            path = expanduser("~") + "/Documents/waves_project_spaces/.projects.db"
+        self.path = path
+
+    def save_project(self, project_name, info, json_str, trig, workflow_ui=None, modifiedAt=None):
+        """ Save a project, replacing all its documents
+
+        :param project_name: name of the project
+        :param info: python dictionary of the project, see Project.to_ref_dict
+        :param json_str: info dumped as json
+        :param trig: TriG of the project
+        :param workflow_ui: workflow UI of the project, it is saved next by save_document otherwise
+        :param modifiedAt: time the project was saved, now by default
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM documents WHERE name = ?", (project_name,))
+            conn.execute("INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (project_name,) + summary_columns(info) + (modifiedAt or time.time(),))
+            self._put(conn, project_name, 'json', json_str)
+            self._put(conn, project_name, 'trig', trig)
+            if workflow_ui is not None:
+                self._put_workflow_ui(conn, project_name, workflow_ui)
+
+    def save_document(self, project_name, kind, content):
+        """ Save a document of a project, i.e. its workflow UI, the project is saved at this time
+
+        The normalized workflow UI is saved with the workflow UI, in the same transaction.
+
+        :param kind: one of DOCUMENTS
+        :raise FileNotFoundError: if there is no such project
+        """
+        if kind not in DOCUMENTS:
+            raise ValueError('Unknown document ' + str(kind))
+        with self._transaction() as conn:
+            if not conn.execute("UPDATE projects SET modifiedAt = ? WHERE name = ?",
+                                (time.time(), project_name)).rowcount:
+                raise FileNotFoundError('No project ' + project_name)
+            if kind == 'workflow_ui':
+                self._put_workflow_ui(conn, project_name, content)
+            else:
+                self._put(conn, project_name, kind, content)
+
+    def get_document(self, project_name, kind):
+        """ Get a document of a project
+
+        :return: content of the document
+        :raise FileNotFoundError: if there is no such project or document, like a missing file
+        """
+        return zlib.decompress(self.get_compressed_document(project_name, kind)).decode('utf-8')
+
+    def get_compressed_document(self, project_name, kind):
+        """ Get a document of a project as it is stored, i.e. to send it with Content-Encoding: deflate
+
+        :return: content of the document, zlib compressed
+        :raise FileNotFoundError: if there is no such project or document
+        """
+        row = self._connect().execute("SELECT content FROM documents WHERE name = ? AND kind = ?",
+                                      (project_name, kind)).fetchone()
+        if row is None:
+            raise FileNotFoundError('No ' + kind + ' for project ' + project_name)
+        return row[0]
+
+    def get_modified_at(self, project_name):
+        """ Get the time a project was last saved, by save_project or save_document
+
+        :return: seconds since the epoch
+        :raise FileNotFoundError: if there is no such project
+        """
+        row = self._connect().execute("SELECT modifiedAt FROM projects WHERE name = ?",
+                                      (project_name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError('No project ' + project_name)
+        return row[0]
+
+    def contains(self, project_name):
+        """ Check if a project is in the database """
+        return self._connect().execute("SELECT 1 FROM projects WHERE name = ?",
+                                       (project_name,)).fetchone() is not None
+
+    def list_names(self):
+        """ Names of the projects, sorted """
+        return [row[0] for row in self._connect().execute("SELECT name FROM projects ORDER BY name")]
+
+    def list(self, offset=0, limit=None, sort='name', descending=False):
+        """ List the summaries of the projects, same as ProjectCatalog.list
+
+        :return: (total number of projects, list of summaries)
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError('Can not sort by ' + str(sort) + ', sort by one of ' + ', '.join(SORT_KEYS))
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError('The offset and the limit must be positive')
+
+        order = ' DESC' if descending else ' ASC'
+        conn = self._connect()
+        total = conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+        rows = conn.execute(
+            "SELECT name, description, license, version, createdAt, cmpts, links, modifiedAt "
+            "FROM projects ORDER BY " + sort + order + ", name" + order + " LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)).fetchall()
+        return total, [summary(row) for row in rows]
+
+    def delete_project(self, project_name):
+        """ Delete a project and its documents """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM documents WHERE name = ?", (project_name,))
+            conn.execute("DELETE FROM projects WHERE name = ?", (project_name,))
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _connect(self):
+        """ Get the connection of the current thread, in autocommit mode """
+        conns = getattr(_local, 'conns', None)
+        if conns is None:
+            conns = _local.conns = {}
+        conn = conns.get(self.path)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conns[self.path] = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """ Write transaction, rolled back if the with block raises """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _put(self, conn, project_name, kind, content, level=6):
+        conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                     (project_name, kind, zlib.compress(content.encode('utf-8'), level)))
+
+    def _put_workflow_ui(self, conn, project_name, workflow_ui):
+        """ Save the workflow UI and its normalized variant, compressed harder since they are read more
+        than they are written
+        """
+        self._put(conn, project_name, 'workflow_ui', workflow_ui, WorkflowUI.COMPRESS_LEVEL)
+        self._put(conn, project_name, 'workflow_ui_normalized', WorkflowUI.normalize(workflow_ui),
+                  WorkflowUI.COMPRESS_LEVEL)
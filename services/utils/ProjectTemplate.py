@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+""" ProjectTemplate materializes the docker-standalone folder without copying it
+
+The docker-standalone folder (9.5 MB) is copied once per version in a store inside the project
+space folder, /{user.home}/Documents/waves_project_spaces/.template/VERSION, where its files are
+read-only. Then each tmp folder and each project folder is materialized from the store:
+    - the files written after the materialization (EDITED, i.e. the TriG) are real copies
+    - the other files are linked to the store, by a hardlink, else a reflink (copy-on-write
+      clone of btrfs, xfs), else a symlink, and only if all of them fail a copy
+
+So opening the editor or creating a project takes no more disk than the edited files. Since the
+linked files are shared with the store, they are read-only: a file of the template that has to
+be changed must be removed first or listed in EDITED.
+
+The version is a hash of the paths, sizes and modification times of the template files, a new
+version of the docker-standalone folder gets a new store. The old stores are kept, the projects
+created before may still have symlinks to them.
+"""
+
+from os.path import expanduser
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import uuid
+
+# Files written to after the materialization, they are not linked to the store
+EDITED = ['instance/Configuration/TriG/waves.trig']
+
+# ioctl of Linux to clone a file, see _reflink
+FICLONE = 0x40049409
+
+class ProjectTemplate(object):
+
+    def __init__(self, source=None, directory=None):
+        """ Initial function
+
+        Params:
+            self.source    : Folder of the template, services/utils/docker-standalone by default
+            self.directory : Folder of the stores, one sub folder per version of the template
+        """
+        if source is None:
+            source = os.path.join(os.path.dirname(__file__), 'docker-standalone')
+        if directory is None:
+            directory = expanduser("~") + "/Documents/waves_project_spaces/.template"
+        self.source    = source
+        self.directory = directory
+
+    def version(self):
+        """ Hash of the paths, sizes and modification times of the template files
+
+        :return: hex string
+        """
+        sha = hashlib.sha256()
+        for rel_path in sorted(self._files(self.source)):
+            st = os.stat(os.path.join(self.source, rel_path))
+            sha.update('{}\0{}\0{}\n'.format(rel_path, st.st_size, st.st_mtime_ns).encode('utf-8'))
+        return sha.hexdigest()[:16]
+
+    def get_store(self):
+        """ Get the store of the current version of the template, copied from the source the first time
+
+        :return: path of the store folder
+        """
+        store = os.path.join(self.directory, self.version())
+        if os.path.isdir(store):
+            return store
+
+        # Copy to a temporary folder then rename, so a store is always complete
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_store = store + '.' + uuid.uuid4().hex + '.tmp'
+        shutil.copytree(self.source, tmp_store)
+        for rel_path in self._files(tmp_store):
+            path = os.path.join(tmp_store, rel_path)
+            os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) & ~0o222)
+        try:
+            os.rename(tmp_store, store)
+        except OSError:
+            # Another process created the store at the same time
+            shutil.rmtree(tmp_store, ignore_errors=True)
+            if not os.path.isdir(store):
+                raise
+        return store
+
+    def materialize(self, dst, exclude=()):
+        """ Materialize the template in a folder
+
+        :param dst: folder to create, it must not exist
+        :param exclude: relative folders whose files are not materialized, the folders are created empty
+        :return: dictionary method -> number of files, the methods are copy, hardlink, reflink, symlink
+        """
+        store = self.get_store()
+        exclude = [folder.strip('/') + '/' for folder in exclude]
+        counts = {'copy': 0, 'hardlink': 0, 'reflink': 0, 'symlink': 0}
+
+        for dirpath, dirnames, filenames in os.walk(store):
+            rel_dir = os.path.relpath(dirpath, store)
+            rel_dir = '' if rel_dir == '.' else rel_dir.replace(os.sep, '/') + '/'
+            os.makedirs(os.path.join(dst, rel_dir), exist_ok=True)
+            if any(rel_dir.startswith(folder) for folder in exclude):
+                continue
+
+            for filename in filenames:
+                src = os.path.join(dirpath, filename)
+                target = os.path.join(dst, rel_dir, filename)
+                if rel_dir + filename in EDITED:
+                    shutil.copyfile(src, target)
+                    os.chmod(target, stat.S_IMODE(os.stat(src).st_mode) | stat.S_IWUSR)
+                    method = 'copy'
+                else:
+                    method = _link(src, target)
+                counts[method] += 1
+        return counts
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _files(self, folder):
+        """ Relative paths of the files of a folder, with / as separator """
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(folder):
+            rel_dir = os.path.relpath(dirpath, folder)
+            for filename in filenames:
+                path = filename if rel_dir == '.' else os.path.join(rel_dir, filename)
+                paths.append(path.replace(os.sep, '/'))
+        return paths
+
+
+def _link(src, dst):
+    """ Link dst to src by the cheapest method that works on this file system
+
+    :return: the method used, hardlink, reflink, symlink or copy
+    """
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    try:
+        _reflink(src, dst)
+        return 'reflink'
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return 'symlink'
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+def _reflink(src, dst):
+    """ Clone a file, the clone shares the blocks of src until one of them is modified
+
+    :raise OSError: if the file system or the platform can not clone files
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError('reflink is not supported on ' + sys.platform)
+    import fcntl
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copymode(src, dst)
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
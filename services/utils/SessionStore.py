@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+""" SessionStore keeps the editor state of each user session
+
+Each session has its own EditorState, the requests of a session are processed one at a time
+while the requests of different sessions run concurrently.
+
+There are two backends with the same interface:
+    - MemorySessionStore : the states are kept in the memory of the process,
+        for a server with a single process
+    - SqliteSessionStore : the states are kept in a SQLite database shared by all the 
+        worker processes, see services.utils.SqliteSessionStore
+create_session_store builds the backend chosen by SessionSetting.backend
+
+The memory store is bounded, the least recently used sessions are evicted when:
+    - a session has been idle for more than SessionSetting.maxIdle seconds
+    - there are more than SessionSetting.maxSessions sessions
+    - the estimated size of all the states is over SessionSetting.maxBytes
+A session being used by a request is never evicted.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import time
+
+from services.config import SessionSetting
+from services.model import EditorState
+
+def create_session_store():
+    """ Create the session store of the backend set in SessionSetting.backend
+
+    :return: SessionStore
+    """
+    if SessionSetting.backend == 'sqlite':
+        from services.utils.SqliteSessionStore import SqliteSessionStore
+        return SqliteSessionStore()
+    elif SessionSetting.backend == 'memory':
+        return MemorySessionStore()
+    else:
+        raise ValueError('Unknown session backend ' + SessionSetting.backend)
+
+
+class SessionStore(ABC):
+    """ Interface of the session store backends """
+    
+    @abstractmethod
+    def acquire(self, session_id):
+        """ Get the editor state of a session and hold the session while it is used
+
+        A new state is created if the session doesn't exist or has been evicted.
+        The modifications made on the state are saved when the with block exits.
+
+            with store.acquire(session_id) as state:
+                state.workflow.add_cmpt(cmpt)
+
+        :param session_id: id of the session
+        :return: context manager giving the EditorState of the session
+        """
+    
+    @abstractmethod
+    def __len__(self):
+        """ Number of sessions in the store """
+
+
+class MemorySessionStore(SessionStore):
+    
+    def __init__(self, maxSessions=None, maxIdle=None, maxBytes=None):
+        """ Initial function
+        
+        Params:
+            self.maxSessions : Max number of sessions kept in memory
+            self.maxIdle     : Max time in seconds a session is kept without being used
+            self.maxBytes    : Max estimated size of all the states, see EditorState.estimate_size
+            self._sessions   : session id -> _Session, from the least to the most recently used
+            self._lock       : Lock protecting self._sessions
+        """
+        self.maxSessions = maxSessions if maxSessions is not None else SessionSetting.maxSessions
+        self.maxIdle     = maxIdle     if maxIdle     is not None else SessionSetting.maxIdle
+        self.maxBytes    = maxBytes    if maxBytes    is not None else SessionSetting.maxBytes
+        self._sessions   = OrderedDict()
+        self._lock       = threading.Lock()
+    
+    @contextmanager
+    def acquire(self, session_id):
+        """ Get the editor state of a session and hold the session lock while it is used, 
+        see SessionStore.acquire """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session()
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.users += 1
+        
+        try:
+            with session.lock:
+                yield session.state
+                session.size = session.state.estimate_size()
+        finally:
+            with self._lock:
+                session.users -= 1
+                session.lastAccess = time.time()
+                self._evict()
+    
+    def __len__(self):
+        return len(self._sessions)
+    
+    def _evict(self):
+        """ Evict the idle and least recently used sessions, must be called with self._lock """
+        now = time.time()
+        total = sum(session.size for session in self._sessions.values())
+        count = len(self._sessions)
+        
+        for session_id, session in list(self._sessions.items()):
+            if session.users > 0:
+                continue
+            idle = now - session.lastAccess > self.maxIdle
+            if not idle and count <= self.maxSessions and total <= self.maxBytes:
+                break
+            del self._sessions[session_id]
+            total -= session.size
+            count -= 1
+
+
+class _Session(object):
+    """ Editor state of a session and its book-keeping """
+    
+    def __init__(self):
+        self.state      = EditorState()
+        self.lock       = threading.Lock()
+        self.size       = self.state.estimate_size()
+        self.users      = 0
+        self.lastAccess = time.time()
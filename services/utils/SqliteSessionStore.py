@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+""" SqliteSessionStore keeps the editor state of each user session in a SQLite database
+
+The database is shared by all the worker processes of the server, so that any worker can
+process any request of any session. It is opened in WAL mode so that readers and the writer
+do not block each other.
+
+A session is saved as a snapshot of its EditorState followed by a list of deltas:
+    - sessions : id, generation, seq of the snapshot, snapshot json, last access time
+    - deltas   : session id, seq, delta json
+A delta only contains what a request changed:
+    - changes     : the changes of the workflow, see services.model.Workflow, and its revision
+    - workflow    : the whole workflow and its revision, when the changes are not recorded,
+                    i.e. when the workflow has been replaced
+    - projectInfo, clusterInfo, metrics, clock, cmptCounter : when they changed
+Every COMPACT_EVERY deltas the snapshot is rewritten and the older deltas are deleted.
+
+Each process keeps the states it has already built in a LRU cache, and only reads the deltas
+written by the other processes since then. The generation of a session is a random token written
+when its row is created, a cached state is only used when the row still has the same generation:
+a session evicted and created again by another process starts again at seq 0, its seq alone
+can't tell that the cached state is from the old session. The cached states that have not been
+used for more than maxIdle seconds are dropped. A state is taken out of the cache while a request
+uses it, and built again from the snapshot if the new deltas can not be applied on it.
+
+The requests of a session are processed one at a time by taking a file lock (one of LOCK_STRIPES
+lock files is chosen from the session id), the database itself is only locked while reading the
+new deltas and while writing the delta of the request.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from os.path import expanduser
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from services.config import SessionSetting
+from services.model import EditorState, ProjectInfo, ClusterInfo, Workflow, Metrics, Clock
+from services.utils.SessionStore import SessionStore
+
+# Number of deltas after which the snapshot of a session is rewritten
+COMPACT_EVERY = 50
+
+# Number of saves of a process after which the idle sessions are deleted
+EVICT_EVERY = 100
+
+# Number of lock files used to process the requests of a session one at a time
+LOCK_STRIPES = 64
+
+# Parts of the editor state saved as a whole when they changed
+STATE_PARTS = {
+    'projectInfo' : ProjectInfo,
+    'clusterInfo' : ClusterInfo,
+    'metrics'     : Metrics,
+    'clock'       : Clock,
+}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id            TEXT PRIMARY KEY,
+        generation    TEXT NOT NULL DEFAULT '',
+        snapshot_seq  INTEGER NOT NULL,
+        snapshot      TEXT NOT NULL,
+        last_access   REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS deltas (
+        session_id    TEXT NOT NULL,
+        seq           INTEGER NOT NULL,
+        delta         TEXT NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    );
+    CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+"""
+
+class SqliteSessionStore(SessionStore):
+
+    def __init__(self, path=None, maxSessions=None, maxIdle=None, maxBytes=None):
+        """ Initial function
+
+        Params:
+            self.path        : Path of the SQLite database
+            self.lockDir     : Directory of the lock files
+            self.maxSessions : Max number of states kept in the cache of the process
+            self.maxIdle     : Max time in seconds a session is kept without being used
+            self.maxBytes    : Max estimated size of the states kept in the cache of the process
+            self._cache      : session id -> (generation, seq, EditorState, last use time),
+                               from the least to the most recently used
+            self._lock       : Lock protecting self._cache
+            self._local      : Connection of each thread
+            self._saves      : Number of saves since the idle sessions were last deleted
+        """
+        if path is None:
+            path = SessionSetting.sqlitePath
+        if path is None:
+            path = expanduser("~") + "/Documents/waves_project_spaces/.sessions.db"
+        self.path        = path
+        self.lockDir     = path + '-locks'
+        self.maxSessions = maxSessions if maxSessions is not None else SessionSetting.maxSessions
+        self.maxIdle     = maxIdle     if maxIdle     is not None else SessionSetting.maxIdle
+        self.maxBytes    = maxBytes    if maxBytes    is not None else SessionSetting.maxBytes
+        self._cache      = OrderedDict()
+        self._lock       = threading.Lock()
+        self._local      = threading.local()
+        self._saves      = 0
+
+        os.makedirs(self.lockDir, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+        if 'generation' not in columns:
+            # Database created before the generations
+            conn.execute("ALTER TABLE sessions ADD COLUMN generation TEXT NOT NULL DEFAULT ''")
+
+    @contextmanager
+    def acquire(self, session_id):
+        """ Get the editor state of a session and hold the session lock while it is used,
+        see SessionStore.acquire """
+        with self._session_lock(session_id):
+            # The state is taken out of the cache while it is used and only put back once saved,
+            # a request failing half way never leaves a half modified state in the cache
+            generation, seq, state = self._load(session_id)
+            before = _StateMark(state)
+            yield state
+            generation, seq = self._save(session_id, generation, seq, state, before.delta(state))
+
+            with self._lock:
+                self._cache[session_id] = (generation, seq, state, time.time())
+                self._cache.move_to_end(session_id)
+                self._trim_cache()
+                self._saves += 1
+                evict = self._saves >= EVICT_EVERY
+                if evict:
+                    self._saves = 0
+
+        if evict:
+            self.evict_idle()
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def evict_idle(self):
+        """ Delete the sessions that have not been used for more than maxIdle seconds
+
+        :return: number of deleted sessions
+        """
+        conn = self._connect()
+        limit = time.time() - self.maxIdle
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM deltas WHERE session_id IN "
+                         "(SELECT id FROM sessions WHERE last_access < ?)", (limit,))
+            count = conn.execute("DELETE FROM sessions WHERE last_access < ?", (limit,)).rowcount
+        return count
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _connect(self):
+        """ Get the connection of the current thread """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _session_lock(self, session_id):
+        """ Lock the session for all the threads and processes """
+        stripe = zlib.crc32(session_id.encode('utf-8')) % LOCK_STRIPES
+        with open(os.path.join(self.lockDir, str(stripe)), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self, session_id):
+        """ Take the state of the session out of the cache and apply the new deltas, or build it
+        from the snapshot and the deltas. If the deltas can not be applied on the cached state,
+        i.e. it is not the state they were written from, the state is built from the snapshot.
+
+        :return: (generation of the session, None for a new session,
+                  seq of the last applied delta, EditorState)
+        :raise ValueError: if the state can not be built from the snapshot and the deltas
+        """
+        conn = self._connect()
+
+        with self._lock:
+            cached = self._cache.pop(session_id, None)
+            if cached is not None and time.time() - cached[3] > self.maxIdle:
+                cached = None
+
+        with conn:
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT generation, snapshot_seq, snapshot FROM sessions WHERE id = ?",
+                               (session_id,)).fetchone()
+            if row is None:
+                # New or evicted session
+                return None, 0, EditorState()
+
+            generation, snapshot_seq, snapshot = row
+            # There are at most COMPACT_EVERY deltas after the snapshot
+            deltas = conn.execute("SELECT seq, delta FROM deltas WHERE session_id = ? AND seq > ? ORDER BY seq",
+                                  (session_id, snapshot_seq)).fetchall()
+
+        if cached is not None and cached[0] == generation and cached[1] >= snapshot_seq:
+            try:
+                return generation, _replay(cached[1], cached[2], deltas), cached[2]
+            except (KeyError, ValueError):
+                pass
+
+        state = EditorState().parse_from_dict(json.loads(snapshot))
+        try:
+            return generation, _replay(snapshot_seq, state, deltas), state
+        except (KeyError, ValueError) as e:
+            raise ValueError('The state of the session ' + session_id + ' can not be built from the database: '
+                             + '{}: {}'.format(type(e).__name__, e))
+
+    def _save(self, session_id, generation, seq, state, delta):
+        """ Write the delta of the request, and a new snapshot every COMPACT_EVERY deltas
+
+        :param generation: generation of the session when it was loaded, None for a new session
+        :return: (generation of the session, seq of the last delta)
+        """
+        conn = self._connect()
+        now = time.time()
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT generation, snapshot_seq FROM sessions WHERE id = ?",
+                               (session_id,)).fetchone()
+
+            if row is None or row[0] != generation:
+                # New session, or the session has been evicted while the request was processed
+                generation = uuid.uuid4().hex
+                conn.execute("DELETE FROM deltas WHERE session_id = ?", (session_id,))
+                conn.execute("INSERT OR REPLACE INTO sessions (id, generation, snapshot_seq, snapshot, last_access) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (session_id, generation, seq, _dumps(state.to_dict()), now))
+            elif not delta:
+                conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+            elif seq + 1 - row[1] >= COMPACT_EVERY:
+                seq = seq + 1
+                conn.execute("UPDATE sessions SET snapshot_seq = ?, snapshot = ?, last_access = ? WHERE id = ?",
+                             (seq, _dumps(state.to_dict()), now, session_id))
+                conn.execute("DELETE FROM deltas WHERE session_id = ?", (session_id,))
+            else:
+                seq = seq + 1
+                conn.execute("INSERT INTO deltas (session_id, seq, delta) VALUES (?, ?, ?)",
+                             (session_id, seq, _dumps(delta)))
+                conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+
+        return generation, seq
+
+    def _trim_cache(self):
+        """ Drop the idle and least recently used states from the cache, must be called with self._lock """
+        limit = time.time() - self.maxIdle
+        for session_id, entry in list(self._cache.items()):
+            if entry[3] >= limit:
+                break
+            del self._cache[session_id]
+
+        total = sum(entry[2].estimate_size() for entry in self._cache.values())
+        while self._cache and (len(self._cache) > self.maxSessions or total > self.maxBytes):
+            session_id, entry = self._cache.popitem(last=False)
+            total -= entry[2].estimate_size()
+
+
+class _StateMark(object):
+    """ What is needed to compute the delta of a state after a request """
+
+    def __init__(self, state):
+        self.revision    = state.workflow.revision
+        self.parts       = {name: getattr(state, name).to_dict() for name in STATE_PARTS}
+        self.cmptCounter = state.cmptCounter
+
+    def delta(self, state):
+        """ Get the delta between the marked state and the state
+
+        :param state: EditorState after the request
+        :return: delta as a python dictionary, empty if nothing changed
+        """
+        delta = {}
+
+        if state.workflow.revision != self.revision:
+            changes = state.workflow.get_changes_since(self.revision)
+            if changes is None:
+                delta['workflow'] = state.workflow.to_ref_dict()
+            else:
+                delta['changes'] = changes
+            delta['revision'] = state.workflow.revision
+
+        for name in STATE_PARTS:
+            info = getattr(state, name).to_dict()
+            if info != self.parts[name]:
+                delta[name] = info
+
+        if state.cmptCounter != self.cmptCounter:
+            delta['cmptCounter'] = state.cmptCounter
+
+        return delta
+
+
+def _replay(seq, state, deltas):
+    """ Apply the deltas after seq to the state
+
+    :param deltas: list of (seq, delta json) in the order of seq
+    :return: seq of the last applied delta
+    """
+    for deltaSeq, delta in deltas:
+        if deltaSeq > seq:
+            _apply_delta(state, json.loads(delta))
+            seq = deltaSeq
+    return seq
+
+def _apply_delta(state, delta):
+    """ Apply a delta written by another process to the state """
+    if 'workflow' in delta:
+        state.workflow = Workflow().parse_from_dict(delta['workflow'])
+    elif 'changes' in delta:
+        state.workflow.apply_patch(delta['changes'])
+    if 'revision' in delta:
+        state.workflow.revision = delta['revision']
+
+    for name, cls in STATE_PARTS.items():
+        if name in delta:
+            setattr(state, name, cls().parse_from_dict(delta[name]))
+
+    if 'cmptCounter' in delta:
+        state.cmptCounter = delta['cmptCounter']
+
+def _dumps(info):
+    """ Compact json """
+    return json.dumps(info, separators=(',', ':'))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+""" TrigArtifactCache keeps the TriG files already generated, keyed by the content of the project
+
+The key of a project is the sha256 of its canonical json, i.e. Project.to_dict() dumped with
+sorted keys and no spaces, so the same project always gets the same key whatever the order of
+its settings. The key also covers the TriG mapping (see mapping_fingerprint), so the files
+generated before a change of the mapping are not used anymore. The TriG of a key is written once in the cache folder and returned as it is for any
+identical project, without generating it again:
+    - the preview writes the artifact
+    - creating the project copies the artifact of the preview to the project folder
+
+The cache folder is inside the project space folder, /{user.home}/Documents/waves_project_spaces/.trig-cache
+by default, and holds at most maxBytes of TriG files. The modification time of a file is updated
+each time it is used, the least recently used files are deleted first.
+"""
+
+from os.path import expanduser
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+from services.config import TrigSetting
+
+# Modules the TriG and the N-Quads are generated with, the component schema gives the
+# predicates and the datatypes of the settings
+MAPPING_MODULES = ['services.model.Project', 'services.model.TrigWriter', 'services.model.NquadsWriter',
+                   'services.model.ComponentSchema']
+
+def mapping_fingerprint():
+    """ Hash of what the TriG is generated with: the TriG engine and the source of the mapping
+    modules, the TriG of every project changes with it
+
+    :return: hex string
+    """
+    sha = hashlib.sha256(TrigSetting.engine.encode('utf-8'))
+    for module in MAPPING_MODULES:
+        with open(importlib.import_module(module).__file__, 'rb') as file:
+            sha.update(file.read())
+    return sha.hexdigest()
+
+class TrigArtifactCache(object):
+
+    def __init__(self, directory=None, maxBytes=None, fragmentCache=None):
+        """ Initial function
+
+        Params:
+            self.directory     : Folder of the TriG files, one file per key
+            self.maxBytes      : Max total size of the TriG files
+            self.fragmentCache : TrigCache used to generate the missing artifacts, optional
+            self.mapping       : Fingerprint of the TriG mapping, see mapping_fingerprint
+            self.hits          : Number of artifacts found in the cache
+            self.misses        : Number of artifacts generated
+            self._lock         : Lock for the eviction
+        """
+        if directory is None:
+            directory = TrigSetting.cacheDir
+        if directory is None:
+            directory = expanduser("~") + "/Documents/waves_project_spaces/.trig-cache"
+        self.directory     = directory
+        self.maxBytes      = maxBytes if maxBytes is not None else TrigSetting.cacheMaxBytes
+        self.fragmentCache = fragmentCache
+        self.mapping       = mapping_fingerprint()
+        self.hits          = 0
+        self.misses        = 0
+        self._lock         = threading.Lock()
+
+    def key(self, project):
+        """ Canonical hash of the content of the project
+
+        :param project: Project model
+        :return: hex string
+        """
+        canonical = json.dumps(project.to_dict(), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256((self.mapping + canonical).encode('utf-8')).hexdigest()
+
+    def contains(self, project):
+        """ Check if the TriG of the project is already in the cache """
+        return os.path.isfile(self._path(self.key(project)))
+
+    def get_path(self, project):
+        """ Get the TriG file of the project, generated if it is not in the cache yet
+
+        The returned file must not be modified, copy it to use it elsewhere.
+
+        :param project: Project model
+        :return: path of the TriG file
+        """
+        path = self._path(self.key(project))
+
+        try:
+            # Mark as recently used
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file then rename, so a file in the cache is always complete
+        tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+        with open(tmp_path, 'w') as file:
+            project.write_trig(file, cache=self.fragmentCache)
+        os.replace(tmp_path, path)
+
+        self._evict(keep=path)
+        return path
+
+    def get(self, project):
+        """ Get the TriG of the project as string, see get_path """
+        with open(self.get_path(project), 'r') as file:
+            return file.read()
+
+    def copy_to(self, project, *paths):
+        """ Copy the TriG of the project to some files, see get_path """
+        src = self.get_path(project)
+        for path in paths:
+            shutil.copyfile(src, path)
+
+    def clear(self):
+        """ Delete all the TriG files of the cache """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # ====================================
+    # Private functions
+    # ====================================
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.trig')
+
+    def _evict(self, keep):
+        """ Delete the least recently used TriG files until they take less than maxBytes
+
+        :param keep: path of the file just written, never deleted
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.trig'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                total += stat.st_size
+                if entry.path != keep:
+                    entries.append( (stat.st_mtime, stat.st_size, entry.path) )
+
+            if total <= self.maxBytes:
+                return
+
+            for mtime, size, path in sorted(entries):
+                if total <= self.maxBytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
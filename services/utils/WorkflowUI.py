@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+""" Workflow UI of a project, the HTML snapshot of the jsPlumb workflow saved with the project
+
+The snapshot is large and made of the same tags over and over, it is stored compressed. It is
+stored twice:
+    - as it was sent by the editor, see FileHandler.save_workflow_ui
+    - normalized, the non-empty lines joined without new lines, as the project details page
+      inserts it, so it is served as it is stored, without decompressing it
+"""
+
+import gzip
+
+COMPRESS_LEVEL = 9
+
+def normalize(workflow_ui):
+    """ Join the lines of the workflow UI that are not empty
+
+    :param workflow_ui: HTML tags in string format
+    :return: HTML tags without new lines
+    """
+    lines = workflow_ui.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "".join( line for line in lines if line.rstrip() != "" )
+
+def compress(workflow_ui):
+    """ Compress the workflow UI as gzip, the same text always gives the same bytes
+
+    :return: bytes
+    """
+    return gzip.compress(workflow_ui.encode('utf-8'), COMPRESS_LEVEL, mtime=0)
+
+def decompress(data):
+    """ Decompress the workflow UI compressed by compress
+
+    :return: HTML tags in string format
+    """
+    return gzip.decompress(data).decode('utf-8')
@@ -1,2 +1,8 @@
 from services.utils.DockerHandler import DockerHandler
-from services.utils.FileHandler import FileHandler
\ No newline at end of file
+from services.utils.FileHandler import FileHandler
+from services.utils.SessionStore import SessionStore, MemorySessionStore, create_session_store
+from services.utils.TrigArtifactCache import TrigArtifactCache
+from services.utils.ProjectTemplate import ProjectTemplate
+from services.utils.BlobStore import BlobStore, UploadOffsetError
+from services.utils.ProjectCatalog import ProjectCatalog
+from services.utils.PageCache import PageCache
\ No newline at end of file
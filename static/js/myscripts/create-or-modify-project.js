@@ -173,30 +173,198 @@ function addCmpt($component){
     var ui_left = $component.attr('left');
     var ui_top = $component.attr('top');
     
-    // Append these information -> form data
-    var data = new FormData();
-    data.append('cmptType', cmptType);
-    data.append('id', id);
-    data.append('ui_left', ui_left);
-    data.append('ui_top', ui_top);
-    
-    var xhr = new XMLHttpRequest();
-    xhr.open("POST", "/create-project/add-component", true);
-    xhr.send(data);
+    // The id of the settings is given by the server
+    sendChanges([{
+        'op': 'add',
+        'path': cmptPath(id),
+        'value': {'cmptType': cmptType, 'ui_left': ui_left, 'ui_top': ui_top, 'settings': {}}
+    }]);
 }
 
 // Save new link in back-end
 function addLink(srcCmptId, trgCmptId){
-    // Save source component and target component ids
-    var data = new FormData();
-    data.append('srcCmptId', srcCmptId);
-    data.append('trgCmptId', trgCmptId);
-    // Send to server to save these informations
+    sendChanges([{
+        'op': 'add',
+        'path': linkPath(srcCmptId, trgCmptId),
+        'value': {}
+    }]);
+}
+
+// ----------------------------------------
+// Workflow Revisions
+// ----------------------------------------
+
+// The editor keeps the revision of the workflow it knows and a copy of the workflow at this 
+// revision. Its changes are sent with PATCH /create-project/workflow based on this revision, 
+// the changes made by the other requests (the links removed with a component, the settings 
+// saved, another tab) are fetched with GET /create-project/workflow?since=REVISION.
+// See services.model.Workflow for the format of the changes.
+var workflowRevision = null;
+var workflowCopy = {'cmpts': {}, 'links': {}};
+
+// Changes not sent yet, and changes being sent
+var pendingChanges = [];
+var sentChanges = null;
+
+// While a batch is started, the changes are queued and sent in one request by sendBatch
+var batching = false;
+
+function escapeToken(token){
+    // Escape a path token, see RFC 6901 (JSON Pointer)
+    return String(token).replace(/~/g, '~0').replace(/\//g, '~1');
+}
+
+function unescapeToken(token){
+    return token.replace(/~1/g, '/').replace(/~0/g, '~');
+}
+
+function cmptPath(cmptId){
+    return '/cmpts/' + escapeToken(cmptId);
+}
+
+function linkPath(srcCmptId, trgCmptId){
+    return '/links/' + escapeToken(srcCmptId) + '/' + escapeToken(trgCmptId);
+}
+
+// Apply changes to a copy of the workflow, as the server does
+function applyChanges(workflow, changes){
+    for(var change of changes){
+        var path = change['path'].split('/').slice(1).map(unescapeToken);
+        if( path[0] == 'cmpts' ){
+            if( change['op'] == 'remove' ){
+                delete workflow['cmpts'][path[1]];
+                // Removing a component removes its links
+                for(var key in workflow['links']){
+                    var link = workflow['links'][key];
+                    if( link['srcCmptId'] == path[1] || link['trgCmptId'] == path[1] ){
+                        delete workflow['links'][key];
+                    }
+                }
+            } else {
+                workflow['cmpts'][path[1]] = $.extend({}, workflow['cmpts'][path[1]], change['value'], {'id': path[1]});
+            }
+        } else if( path[0] == 'links' ){
+            var key = linkPath(path[1], path[2]);
+            if( change['op'] == 'remove' ){
+                delete workflow['links'][key];
+            } else {
+                workflow['links'][key] = {'srcCmptId': path[1], 'trgCmptId': path[2], 'settings': change['value']};
+            }
+        }
+    }
+}
+
+// Update the copy of the workflow from a response of GET or PATCH /create-project/workflow
+function loadWorkflow(info){
+    if( 'changes' in info ){
+        applyChanges(workflowCopy, info['changes']);
+    } else {
+        workflowCopy = {'cmpts': {}, 'links': {}};
+        for(var cmpt of info['workflow']['cmpt_list']){
+            workflowCopy['cmpts'][cmpt['id']] = cmpt;
+        }
+        for(var link of info['workflow']['link_list']){
+            workflowCopy['links'][linkPath(link['srcCmptId'], link['trgCmptId'])] = link;
+        }
+    }
+    workflowRevision = info['revision'];
+}
+
+// The workflow as the editor sees it: the copy with the changes not acknowledged yet
+function currentWorkflow(){
+    var workflow = {'cmpts': $.extend({}, workflowCopy['cmpts']), 'links': $.extend({}, workflowCopy['links'])};
+    applyChanges(workflow, (sentChanges || []).concat(pendingChanges));
+    return workflow;
+}
+
+// Fetch the changes since the known revision, the whole workflow the first time
+function fetchWorkflow(done){
     var xhr = new XMLHttpRequest();
-    xhr.open("POST", "/create-project/add-link", true);
-    xhr.send(data); 
+    if( workflowRevision === null ){
+        xhr.open("GET", "/create-project/workflow", true);
+    } else {
+        xhr.open("GET", "/create-project/workflow?since=" + workflowRevision, true);
+        xhr.setRequestHeader("If-None-Match", '"' + workflowRevision + '"');
+    }
+    xhr.onreadystatechange = (event) => {
+      if (xhr.readyState == XMLHttpRequest.DONE) {
+          // 304 : nothing has changed
+          if( xhr.status == 200 ){
+              loadWorkflow( JSON.parse(xhr.responseText) );
+          }
+          if( done ){
+              done();
+          }
+      }
+    }
+    xhr.send();
+}
+
+// Queue changes of the workflow, they are sent at once unless a batch is started
+function sendChanges(changes){
+    pendingChanges = pendingChanges.concat(changes);
+    flushChanges();
+}
+
+// Send the queued changes based on the known revision, one request at a time
+function flushChanges(){
+    if( sentChanges !== null || batching || pendingChanges.length == 0 ){
+        return;
+    }
+    sentChanges = pendingChanges;
+    pendingChanges = [];
+    
+    if( workflowRevision === null ){
+        // Nothing fetched yet
+        fetchWorkflow(retryChanges);
+        return;
+    }
+    
+    var xhr = new XMLHttpRequest();
+    xhr.open("PATCH", "/create-project/workflow", true);
+    xhr.setRequestHeader("Content-Type", "application/json");
+    xhr.setRequestHeader("If-Match", '"' + workflowRevision + '"');
+    xhr.onreadystatechange = (event) => {
+      if (xhr.readyState == XMLHttpRequest.DONE) {
+          if( xhr.status == 200 ){
+              // The changes since the base revision, the ones sent included
+              loadWorkflow( JSON.parse(xhr.responseText) );
+              sentChanges = null;
+              flushChanges();
+          } else if( xhr.status == 409 ){
+              // The workflow changed since the known revision, catch up and send again
+              fetchWorkflow(retryChanges);
+          } else {
+              // Nothing was applied, i.e. a change on a component removed by another tab
+              sentChanges = null;
+              bootbox.alert("Alert: the workflow could not be saved, " + JSON.parse(xhr.responseText).error);
+              fetchWorkflow(flushChanges);
+          }
+      }
+    }
+    xhr.send(JSON.stringify(sentChanges));
+}
+
+function retryChanges(){
+    pendingChanges = sentChanges.concat(pendingChanges);
+    sentChanges = null;
+    flushChanges();
+}
+
+function startBatch(){
+    batching = true;
+}
+
+// Send all the changes queued since startBatch in one request, applied entirely or not at all
+function sendBatch(){
+    batching = false;
+    flushChanges();
 }
 
+$(document).ready(function(){
+    fetchWorkflow();
+});
+
 // ----------------------------------------
 // Import Default Workflow
 // ----------------------------------------
@@ -204,16 +372,9 @@ function addLink(srcCmptId, trgCmptId){
 $("button#import_workflow").click(function(event) {
     
     // Clear workflow space before importing
+    // The workflow is cleared in back-end by default-workflow, the removals are fetched with its changes
     $("#panel div.component").each(function(){
-        
-        // Remove all components and links in the front-end
-        var id = $(this).attr('id');
-        jsPlumb.remove(id);
-        
-        // Update the components and links information in back-end
-        // To clear the current workflow information
-        delCmpt(id);
-        delConns(id);
+        jsPlumb.remove( $(this).attr('id') );
     });
     
     var xhr = new XMLHttpRequest();
@@ -223,8 +384,10 @@ $("button#import_workflow").click(function(event) {
       if (xhr.readyState == XMLHttpRequest.DONE) {
           // Load default workflow json from back-end
           default_workflow = JSON.parse( xhr.responseText );
+          startBatch();
           addDefaultCmpt(default_workflow);
           addDefaultLink(default_workflow);
+          fetchWorkflow(sendBatch);
       }
     }
     xhr.send();
@@ -283,15 +446,11 @@ function addDefaultLink(default_workflow) {
     
 function updateCmptLoc(id, ui_left, ui_top){
     // Update Location when Moving the Component's location
-    var data = new FormData();
-    data.append('id', id);
-    data.append('ui_left', ui_left);
-    data.append('ui_top', ui_top);
-    
-    // Update server side's saving state
-    var xhr = new XMLHttpRequest();
-    xhr.open("POST", "/create-project/update-component-location", true);
-    xhr.send(data);
+    sendChanges([{
+        'op': 'replace',
+        'path': cmptPath(id),
+        'value': {'ui_left': ui_left, 'ui_top': ui_top}
+    }]);
 }
 
 // ----------------------------------------
@@ -328,14 +487,12 @@ jsPlumb.bind("connection", function(conn, event) {
                     $('#windowSettingsModal').modal('hide');
                     // Get window span
                     var windowSpan = $('input[name="windowSpan"]').val();
-                    var data = new FormData();
-                    data.append("srcCmptId", srcCmptId);
-                    data.append("trgCmptId", trgCmptId);
-                    data.append("windowSpan", windowSpan);
                     // Save the window span in server side
-                    var xhr = new XMLHttpRequest();
-                    xhr.open("POST", "/create-project/save-link-settings", true);
-                    xhr.send(data);
+                    sendChanges([{
+                        'op': 'replace',
+                        'path': linkPath(srcCmptId, trgCmptId),
+                        'value': {'windowSpan': windowSpan}
+                    }]);
                 });
             } 
         } else {
@@ -544,7 +701,14 @@ $('button[name="saveCmptSettings"]').click(function(e){
     xhr.open("POST", "/create-project/save-component-settings", true);
     xhr.onreadystatechange = (event) => {
       if (xhr.readyState == XMLHttpRequest.DONE) {
-          $("#"+cmpt_id).addClass("saved");
+          if (xhr.status == 400) {
+              // A value does not match its setting, i.e. numTasks is not an integer
+              bootbox.alert(JSON.parse(xhr.responseText).error);
+          } else {
+              $("#"+cmpt_id).addClass("saved");
+              // Catch up with the revision of the saved settings
+              fetchWorkflow();
+          }
       }
     }
     xhr.send(data);
@@ -771,14 +935,16 @@ $("button[name='detachConns']").click(function(e){
     }
 });
 
-// Tell the server to delete links
+// Tell the server to delete the links going out of the component
 function delConns(srcCmptId){
-    var data = new FormData();
-    data.append('srcCmptId', srcCmptId);
-    
-    var xhr = new XMLHttpRequest();
-    xhr.open("POST", "/create-project/remove-link", true);
-    xhr.send(data);    
+    var links = currentWorkflow()['links'];
+    var changes = [];
+    for(var key in links){
+        if( links[key]['srcCmptId'] == srcCmptId ){
+            changes.push({'op': 'remove', 'path': linkPath(srcCmptId, links[key]['trgCmptId'])});
+        }
+    }
+    sendChanges(changes);
 }
 
 // Click "Delete Component" button to delete component
@@ -795,21 +961,21 @@ $('button[name="deleteCmpt"]').click(function(e){
 // delete all components
 $('#delete_all_workflow').click(function(e){
     e.preventDefault();
+    startBatch();
     $('#panel').find(".component").each(function(){
         var cmpt_id = $(this).attr("id");
         jsPlumb.remove(cmpt_id);
         delCmpt(cmpt_id);
     });
+    sendBatch();
 });
 
-// Tell the server to delete components
+// Tell the server to delete components, their links are deleted with them
 function delCmpt(cmpt_id){
-    var data = new FormData();
-    data.append('id', cmpt_id);
-    
-    var xhr = new XMLHttpRequest();
-    xhr.open("POST", "/create-project/remove-component", true);
-    xhr.send(data);    
+    // Skip the components the server doesn't know, i.e. whose adding failed
+    if( workflowRevision === null || cmpt_id in currentWorkflow()['cmpts'] ){
+        sendChanges([{'op': 'remove', 'path': cmptPath(cmpt_id)}]);
+    }
 }
     
 // ----------------------------------------
@@ -0,0 +1,7 @@
+""" Tests for the Waves Configurator
+
+Run them from the repository root:
+
+        $ python -m unittest discover tests
+
+"""
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+""" Check that BlobStore keeps each upload once, counts the files linked to it and frees it
+
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from services.utils.BlobStore import BlobStore
+
+DATA = b'2016-01-01T00:00:00Z,12.5\n' * 100
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = BlobStore(directory=self.directory + '/.blobs')
+        os.makedirs(self.directory + '/p1')
+        os.makedirs(self.directory + '/p2')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_same_upload_stored_once(self):
+        digest = self.store.put(io.BytesIO(DATA), self.directory + '/p1/data.csv')
+        self.assertEqual(hashlib.sha256(DATA).hexdigest(), digest)
+        self.assertEqual(digest, self.store.put(io.BytesIO(DATA), self.directory + '/p2/data.csv'))
+
+        self.assertEqual(2, self.store.refcount(digest))
+        self.assertEqual([digest[2:]], os.listdir(os.path.dirname(self.store.get_path(digest))))
+        with open(self.directory + '/p2/data.csv', 'rb') as file:
+            self.assertEqual(DATA, file.read())
+        # Shared by the projects, read-only
+        self.assertEqual(0, os.stat(self.store.get_path(digest)).st_mode & 0o222)
+
+    def test_replaced_file(self):
+        path = self.directory + '/p1/data.csv'
+        old = self.store.put(io.BytesIO(b'old'), path)
+        new = self.store.put(io.BytesIO(b'new'), path)
+        self.assertEqual(0, self.store.refcount(old))
+        self.assertEqual(1, self.store.refcount(new))
+        self.assertEqual(3, self.store.collect())
+        self.assertFalse(os.path.exists(self.store.get_path(old)))
+
+    def test_collect(self):
+        digest = self.store.put(io.BytesIO(DATA), self.directory + '/p1/data.csv')
+        self.store.put(io.BytesIO(DATA), self.directory + '/p2/data.csv')
+
+        shutil.rmtree(self.directory + '/p1')
+        self.assertEqual(0, self.store.collect())
+        self.assertEqual(1, self.store.refcount(digest))
+
+        shutil.rmtree(self.directory + '/p2')
+        self.assertEqual(len(DATA), self.store.collect())
+        self.assertEqual(0, self.store.refcount(digest))
+        self.assertFalse(os.path.exists(self.store.get_path(digest)))
+
+    def test_collect_without_store(self):
+        self.assertEqual(0, BlobStore(directory=self.directory + '/nope').collect())
+
+    def test_missing_project_folder(self):
+        """ The upload is not linked, its blob is freed by the next collect """
+        with self.assertRaises(FileNotFoundError):
+            self.store.put(io.BytesIO(DATA), self.directory + '/nope/data.csv')
+        self.assertEqual([], os.listdir(self.store.tmpDir))
+        self.assertEqual(0, self.store.refcount(hashlib.sha256(DATA).hexdigest()))
+        self.assertEqual(len(DATA), self.store.collect())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+""" Check the chunked uploads, resumed from their offset, and the errors of the chunks
+
+"""
+
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from services.utils.BlobStore import BlobStore, UploadOffsetError
+
+# services.utils exports the class with the name of the module
+BlobStoreModule = importlib.import_module('services.utils.BlobStore')
+
+DATA = b'0123456789'
+
+class TestChunkedUploads(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.client = create_app().test_client()
+        with _quiet():
+            self.assertEqual(200, self.client.get('/create-project').status_code)
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_upload_resumed(self):
+        upload = self.open('big.csv', len(DATA))
+        self.assertEqual(0, upload['offset'])
+        self.assertEqual(4, self.put(upload['id'], 0, DATA[:4])['offset'])
+
+        # The connection is lost, the client asks where to resume from
+        resp = self.client.get('/create-project/uploads/' + upload['id'])
+        self.assertEqual(4, _json(resp)['offset'])
+
+        info = self.put(upload['id'], 4, DATA[4:])
+        self.assertEqual(hashlib.sha256(DATA).hexdigest(), info['sha256'])
+        self.assertEqual([DATA], self.raw_sources('big.csv'))
+        self.assertEqual(404, self.client.get('/create-project/uploads/' + upload['id']).status_code)
+
+    def test_empty_upload(self):
+        upload = self.open('empty.csv', 0)
+        resp = self.client.put('/create-project/uploads/' + upload['id'], data=b'',
+                               headers={'Content-Range': 'bytes */0'})
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(hashlib.sha256(b'').hexdigest(), _json(resp)['sha256'])
+        self.assertEqual([b''], self.raw_sources('empty.csv'))
+
+    def test_chunk_errors(self):
+        upload = self.open('big.csv', len(DATA))
+        self.put(upload['id'], 0, DATA[:4])
+        url = '/create-project/uploads/' + upload['id']
+
+        # Not at the offset of the upload
+        resp = self.client.put(url, data=DATA[2:6], headers={'Content-Range': 'bytes 2-5/10'})
+        self.assertEqual(409, resp.status_code)
+        self.assertEqual(4, _json(resp)['offset'])
+        # Not the size of the upload, or after its end
+        for content_range in ['bytes 4-7/11', 'bytes 4-10/10']:
+            resp = self.client.put(url, data=DATA[4:8], headers={'Content-Range': content_range})
+            self.assertEqual(416, resp.status_code)
+            self.assertEqual(10, _json(resp)['size'])
+        # Without range, or with a body shorter than the range
+        self.assertEqual(400, self.client.put(url, data=DATA[4:8]).status_code)
+        resp = self.client.put(url, data=DATA[4:6], headers={'Content-Range': 'bytes 4-7/10'})
+        self.assertEqual(400, resp.status_code)
+        self.assertEqual(4, _json(resp)['offset'])
+
+        self.assertEqual(4, _json(self.client.get(url))['offset'])
+
+    def test_unknown_and_aborted_uploads(self):
+        for upload_id in ['0' * 32, '../../etc']:
+            resp = self.client.put('/create-project/uploads/' + upload_id, data=b'1',
+                                   headers={'Content-Range': 'bytes 0-0/1'})
+            self.assertEqual(404, resp.status_code)
+            self.assertEqual(404, self.client.get('/create-project/uploads/' + upload_id).status_code)
+
+        upload = self.open('big.csv', len(DATA))
+        self.put(upload['id'], 0, DATA[:4])
+        self.assertEqual(200, self.client.delete('/create-project/uploads/' + upload['id']).status_code)
+        self.assertEqual(404, self.client.get('/create-project/uploads/' + upload['id']).status_code)
+        self.assertEqual(404, self.client.delete('/create-project/uploads/' + upload['id']).status_code)
+        self.assertEqual([], self.raw_sources('big.csv'))
+
+    def test_invalid_upload(self):
+        for info in [{'filename': 'big.csv', 'kind': 'other', 'size': 10},
+                     {'filename': '..', 'kind': 'raw', 'size': 10},
+                     {'filename': 'big.csv', 'kind': 'raw', 'size': -1},
+                     {'filename': 'big.csv', 'kind': 'raw', 'size': 'ten'}]:
+            with self.subTest(info=info):
+                resp = self.client.post('/create-project/uploads', data=json.dumps(info),
+                                        content_type='application/json')
+                self.assertEqual(400, resp.status_code)
+
+    def open(self, filename, size):
+        resp = self.client.post('/create-project/uploads', content_type='application/json',
+                                data=json.dumps({'filename': filename, 'kind': 'raw', 'size': size}))
+        self.assertEqual(201, resp.status_code)
+        return _json(resp)
+
+    def put(self, upload_id, start, data):
+        content_range = 'bytes ' + str(start) + '-' + str(start + len(data) - 1) + '/' + str(len(DATA))
+        resp = self.client.put('/create-project/uploads/' + upload_id, data=data,
+                               headers={'Content-Range': content_range})
+        self.assertEqual(200, resp.status_code)
+        return _json(resp)
+
+    def raw_sources(self, filename):
+        """ Content of the file in the raw source folder of each workspace """
+        contents = []
+        for entry in os.scandir(self.home + '/Documents/waves_project_spaces/tmp'):
+            path = entry.path + '/instance/Data/RawSource/' + filename
+            if os.path.isfile(path):
+                with open(path, 'rb') as file:
+                    contents.append(file.read())
+        return contents
+
+
+class TestBlobStoreUploads(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = BlobStore(directory=self.directory + '/.blobs')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hash_after_restart(self):
+        """ The hash kept in memory is lost, it is computed again from the part file """
+        upload_id = self.store.open_upload(self.directory + '/data.csv', len(DATA))
+        self.store.write_upload(upload_id, 0, io.BytesIO(DATA[:4]))
+        BlobStoreModule._upload_hashes.pop(upload_id)
+        info = self.store.write_upload(upload_id, 4, io.BytesIO(DATA[4:]))
+        self.assertEqual(hashlib.sha256(DATA).hexdigest(), info['sha256'])
+        self.assertEqual(1, self.store.refcount(info['sha256']))
+
+    def test_offset_error(self):
+        upload_id = self.store.open_upload(self.directory + '/data.csv', len(DATA))
+        with self.assertRaises(UploadOffsetError) as cm:
+            self.store.write_upload(upload_id, 3, io.BytesIO(DATA[3:]))
+        self.assertEqual(0, cm.exception.offset)
+        with self.assertRaises(ValueError):
+            self.store.open_upload(self.directory + '/data.csv', -1)
+
+    def test_old_uploads_are_collected(self):
+        upload_id = self.store.open_upload(self.directory + '/data.csv', len(DATA))
+        self.store.write_upload(upload_id, 0, io.BytesIO(DATA[:4]))
+        self.assertEqual(0, self.store.collect())
+        past = os.stat(self.store._part_path(upload_id)).st_mtime - BlobStoreModule.UPLOAD_MAX_AGE - 10
+        os.utime(self.store._part_path(upload_id), (past, past))
+        self.assertEqual(4, self.store.collect())
+        with self.assertRaises(KeyError):
+            self.store.get_upload(upload_id)
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _json(resp):
+    return json.loads(resp.get_data(as_text=True))
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
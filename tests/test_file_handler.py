@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+""" Check the project folders written by FileHandler
+
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.synthetic import build_project
+from services.model import Project
+from services.utils.FileHandler import FileHandler
+
+# services.utils exports the class with the name of the module
+FileHandlerModule = importlib.import_module('services.utils.FileHandler')
+
+class TestPublishDir(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.handler = FileHandler()
+        os.makedirs(self.handler.directory)
+        self.project_dir = self.handler.directory + '/p1'
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_publish_new_project(self):
+        self.handler._publish_dir(self.stage('new'), self.project_dir)
+        self.assertEqual('new', self.content())
+        self.assertEqual(['p1'], os.listdir(self.handler.directory))
+
+    def test_publish_replaces_project(self):
+        self.handler._publish_dir(self.stage('old'), self.project_dir)
+        self.handler._publish_dir(self.stage('new'), self.project_dir)
+        self.assertEqual('new', self.content())
+        self.assertEqual(['p1'], os.listdir(self.handler.directory))
+
+    def test_publish_without_exchange(self):
+        self.handler._publish_dir(self.stage('old'), self.project_dir)
+        with mock.patch.object(FileHandlerModule, '_rename_exchange', return_value=False):
+            self.handler._publish_dir(self.stage('new'), self.project_dir)
+        self.assertEqual('new', self.content())
+        self.assertEqual(['p1'], os.listdir(self.handler.directory))
+
+    def test_orphan_trash_is_restored(self):
+        """ A crash between the two renames leaves the project only in the trash directory """
+        trash_dir = self.handler._sibling_dir('p1', 'trash')
+        os.rename(self.stage('old'), trash_dir)
+        self.handler._remove_stale_dirs()
+        self.assertEqual('old', self.content())
+        self.assertEqual(['p1'], os.listdir(self.handler.directory))
+
+    def test_stale_dirs_are_removed(self):
+        self.handler._publish_dir(self.stage('new'), self.project_dir)
+        fresh = self.stage('fresh')
+        for kind in ['staging', 'trash']:
+            stale = self.handler._sibling_dir('p1', kind)
+            os.rename(self.stage('stale'), stale)
+            past = time.time() - FileHandlerModule.STALE_AGE - 10
+            os.utime(stale, (past, past))
+        self.handler._remove_stale_dirs()
+        self.assertEqual(sorted(['p1', os.path.basename(fresh)]), sorted(os.listdir(self.handler.directory)))
+        self.assertEqual('new', self.content())
+
+    def stage(self, content):
+        stage_dir = self.handler._sibling_dir('p1', 'staging')
+        os.makedirs(stage_dir)
+        with open(stage_dir + '/content', 'w') as file:
+            file.write(content)
+        return stage_dir
+
+    def content(self):
+        with open(self.project_dir + '/content') as file:
+            return file.read()
+
+
+class TestSetupProjectFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.handler = FileHandler()
+        _quiet(self.handler.setup_project_space_folder)
+        self.project_dir = self.handler.directory + '/p1'
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_project_replaced(self):
+        self.upload('a.csv')
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name='p1'))
+        self.assertEqual(['a.csv'], os.listdir(self.project_dir + '/docker-standalone/instance/Data/RawSource'))
+        self.assertFalse(os.path.exists(self.handler.tmpDir))
+
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 1, name='p1'))
+        self.assertEqual(1, len(self.handler.get_project_as_dict('p1')['workflow']['cmpt_list']))
+        self.assertEqual(sorted(['.blobs', '.catalog.sqlite', '.template', 'p1', 'tmp']),
+                         sorted(os.listdir(self.handler.directory)))
+
+    def test_failed_setup_keeps_old_project(self):
+        """ The old project stays, the staging directory is removed and the uploads are given back """
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name='p1'))
+        _quiet(self.handler.setup_project_space_folder)
+        self.upload('a.csv')
+        with mock.patch.object(Project, 'write_trig', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                _quiet(self.handler.setup_project_folder, _quiet(build_project, 1, name='p1'))
+
+        self.assertEqual(6, len(self.handler.get_project_as_dict('p1')['workflow']['cmpt_list']))
+        self.assertFalse([name for name in os.listdir(self.handler.directory) if name.startswith('.p1.')])
+        self.assertEqual(['a.csv'], os.listdir(self.handler.tmpRawSourceDir))
+
+    def upload(self, filename):
+        storage = mock.Mock(filename=filename, stream=io.BytesIO(b'1,2\n'))
+        self.handler.save_raw_source_file(storage)
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
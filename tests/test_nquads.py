@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the N-Quads of a project are the statements of its TriG, and their download
+
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import ConjunctiveGraph, URIRef
+from rdflib.compare import isomorphic
+
+from benchmarks.synthetic import build_project
+from services.model import Project, ProjectInfo, ClusterInfo, Workflow, Component, Metrics, Clock
+from services.utils.FileHandler import FileHandler
+
+class TestNquads(unittest.TestCase):
+
+    def test_same_graph_as_trig(self):
+        for size in [1, 13]:
+            with self.subTest(size=size):
+                project = _quiet(build_project, size)
+                nquads = ''.join(_quiet(list, project.iter_nquads()))
+                self.assertTrue(isomorphic(_load(_quiet(project.parse_trig), 'trig'), _load(nquads, 'nquads')))
+                graph = _load(nquads, 'nquads')
+                self.assertEqual([URIRef('http://localhost:9091/waves/bench')],
+                                 [context.identifier for context in graph.contexts()])
+
+    def test_escaped_literals(self):
+        """ A label with quotes, a backslash and new lines stays on one line """
+        workflow = Workflow()
+        label = 'say "hi"\\\nbye\r'
+        _quiet(workflow.add_cmpt, Component(id='a', cmptType='Stream', settings={'id': '1', 'label': label}))
+        projectInfo = ProjectInfo(name='escapes', description='Escapes', license='MIT', version='1.0')
+        project = Project(projectInfo, ClusterInfo(), workflow, Metrics(), Clock())
+
+        lines = _quiet(list, project.iter_nquads())
+        self.assertTrue(all(line.endswith(' .\n') and line.count('\n') == 1 for line in lines))
+        graph = _load(''.join(lines), 'nquads')
+        labels = [str(o) for o in graph.objects(None, URIRef('http://www.w3.org/2000/01/rdf-schema#label'))]
+        self.assertIn(label, labels)
+
+
+class TestDownloadNquads(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.client = create_app().test_client()
+        self.handler = FileHandler()
+        project = _quiet(build_project, 6, name='p1')
+        _quiet(self.handler.setup_project_folder, project)
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_download_file(self):
+        resp = self.client.get('/project-space/p1/download-nquads')
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual('application/n-quads', resp.mimetype)
+        with open(self.handler.get_project_nquads_path('p1')) as file:
+            self.assertEqual(file.read(), resp.get_data(as_text=True))
+        resp.close()
+
+    def test_download_without_file(self):
+        """ A project created before the n-quads were written gets them generated from its json """
+        path = self.handler.get_project_nquads_path('p1')
+        with open(path) as file:
+            nquads = file.read()
+        os.remove(path)
+        resp = _quiet(self.client.get, '/project-space/p1/download-nquads')
+        self.assertEqual(200, resp.status_code)
+        self.assertIn('filename="p1.nq"', resp.headers['Content-Disposition'])
+        self.assertEqual(nquads, _quiet(resp.get_data, as_text=True))
+
+    def test_unknown_project(self):
+        resp = self.client.get('/project-space/nope/download-nquads')
+        self.assertEqual(404, resp.status_code)
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _load(data, format):
+    """ Parse a TriG or N-Quads string -> rdflib graph """
+    graph = ConjunctiveGraph()
+    graph.parse(data=data, format=format)
+    return graph
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+""" Check the page cache and the validators of the project details page
+
+"""
+
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import build_project
+from services.utils.FileHandler import FileHandler
+from services.utils.PageCache import PageCache
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PageCache(maxBytes=1000)
+        self.builds = []
+
+    def test_built_once_per_version(self):
+        body, gzipBody = self.cache.get('p1', 'v1', self.build(b'page 1'))
+        self.assertEqual(b'page 1', body)
+        self.assertEqual(b'page 1', gzip.decompress(gzipBody))
+        self.assertEqual((body, gzipBody), self.cache.get('p1', 'v1', self.build(b'other')))
+        self.assertEqual(b'page 2', self.cache.get('p1', 'v2', self.build(b'page 2'))[0])
+        self.assertEqual([b'page 1', b'page 2'], self.builds)
+        self.assertEqual((1, 2), (self.cache.hits, self.cache.misses))
+        self.assertEqual(1, len(self.cache))
+
+    def test_least_recently_used_dropped(self):
+        """ Random pages do not compress, 2 of them and their gzip copies fit in the cache """
+        self.cache = PageCache(maxBytes=1500)
+        page = os.urandom(300)
+        for key in ['a', 'b']:
+            self.cache.get(key, 'v1', self.build(page))
+        self.cache.get('a', 'v1', self.build(page))
+        self.cache.get('c', 'v1', self.build(page))
+        self.assertEqual(2, len(self.cache))
+        self.cache.get('a', 'v1', self.build(page))
+        self.assertEqual(3, len(self.builds))
+        self.cache.get('b', 'v1', self.build(page))
+        self.assertEqual(4, len(self.builds))
+
+    def test_page_larger_than_cache(self):
+        """ The last page is kept even if it is larger than maxBytes """
+        page = os.urandom(2000)
+        self.assertEqual(page, self.cache.get('a', 'v1', self.build(page))[0])
+        self.assertEqual(1, len(self.cache))
+
+    def test_build_error(self):
+        def build():
+            raise FileNotFoundError('p1')
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get('p1', 'v1', build)
+        self.assertEqual((0, 0, 0), (len(self.cache), self.cache.hits, self.cache.misses))
+
+    def build(self, body):
+        def build():
+            self.builds.append(body)
+            return body
+        return build
+
+
+class TestProjectDetails(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.handler = FileHandler()
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name='p1'))
+        self.pages = self.app.extensions['waves_pages']
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_gzip_and_not_modified(self):
+        resp = self.client.get('/project-space/p1/details', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual('gzip', resp.headers['Content-Encoding'])
+        self.assertIn(b'p1', gzip.decompress(resp.get_data()))
+        self.assertIn('Accept-Encoding', resp.headers['Vary'])
+        etag = resp.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        resp = self.client.get('/project-space/p1/details')
+        self.assertEqual(200, resp.status_code)
+        self.assertNotIn('Content-Encoding', resp.headers)
+        self.assertEqual(etag, resp.headers['ETag'])
+        self.assertEqual((1, 1), (self.pages.hits, self.pages.misses))
+
+        resp = self.client.get('/project-space/p1/details', headers={'If-None-Match': etag})
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(b'', resp.get_data())
+        self.assertEqual((1, 1), (self.pages.hits, self.pages.misses))
+
+    def test_changed_project(self):
+        etag = self.client.get('/project-space/p1/details').headers['ETag']
+        self.handler.save_workflow_ui('<div></div>', 'p1')
+        resp = self.client.get('/project-space/p1/details', headers={'If-None-Match': etag})
+        self.assertEqual(200, resp.status_code)
+        self.assertNotEqual(etag, resp.headers['ETag'])
+        self.assertEqual(2, self.pages.misses)
+
+    def test_unknown_project(self):
+        resp = self.client.get('/project-space/nope/details')
+        self.assertEqual(404, resp.status_code)
+        self.assertEqual(0, len(self.pages))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the project catalog follows the project folders, and the listing of the projects
+
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from services.utils.ProjectCatalog import ProjectCatalog
+
+class TestProjectCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = ProjectCatalog(directory=self.directory)
+        for name, version, cmpts in [('b', '2.0', 3), ('a', '1.0', 1), ('c', '1.5', 2)]:
+            self.write(name, version, cmpts)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_list(self):
+        total, projects = self.catalog.list()
+        self.assertEqual(3, total)
+        self.assertEqual(['a', 'b', 'c'], [project['name'] for project in projects])
+        self.assertEqual({'name': 'a', 'description': 'Project a', 'license': 'MIT', 'version': '1.0',
+                          'createdAt': '2020-01-01T00:00:00Z'}, projects[0]['projectInfo'])
+        self.assertEqual((1, 0), (projects[0]['cmpts'], projects[0]['links']))
+
+        total, projects = self.catalog.list(offset=1, limit=1, sort='cmpts', descending=True)
+        self.assertEqual(3, total)
+        self.assertEqual(['c'], [project['name'] for project in projects])
+
+    def test_sync_with_folders(self):
+        """ Projects edited, added and deleted by hand, and a deleted catalog """
+        self.assertEqual(3, self.catalog.sync())
+        self.assertEqual(0, self.catalog.sync())
+
+        self.write('a', '1.1', 5)
+        self.write('d', '1.0', 1)
+        shutil.rmtree(self.directory + '/b')
+        # Not projects
+        os.makedirs(self.directory + '/tmp/x')
+        os.makedirs(self.directory + '/empty')
+        self.assertEqual(3, self.catalog.sync())
+        total, projects = self.catalog.list()
+        self.assertEqual(['a', 'c', 'd'], [project['name'] for project in projects])
+        self.assertEqual('1.1', projects[0]['projectInfo']['version'])
+
+        os.remove(self.catalog.path)
+        self.assertEqual(3, self.catalog.list()[0])
+
+    def test_update_and_remove(self):
+        self.catalog.sync()
+        self.write('a', '3.0', 1)
+        with open(self.directory + '/a/a.json') as file:
+            self.catalog.update('a', json.load(file))
+        self.assertEqual(0, self.catalog.sync())
+        shutil.rmtree(self.directory + '/c')
+        self.catalog.update('c', {})
+        self.assertEqual(['a', 'b'], [project['name'] for project in self.catalog.list()[1]])
+
+    def test_invalid_json_is_skipped(self):
+        os.makedirs(self.directory + '/broken')
+        with open(self.directory + '/broken/broken.json', 'w') as file:
+            file.write('{')
+        with _quiet():
+            total, projects = self.catalog.list()
+        self.assertEqual(['a', 'b', 'c'], [project['name'] for project in projects])
+
+    def test_invalid_list_parameters(self):
+        for kwargs in [{'sort': 'description'}, {'sort': 'name; DROP TABLE projects'},
+                       {'offset': -1}, {'limit': -1}]:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    self.catalog.list(**kwargs)
+
+    def write(self, name, version, cmpts):
+        """ Write the json file of a project with cmpts components and no link """
+        os.makedirs(self.directory + '/' + name, exist_ok=True)
+        info = {'projectInfo': {'name': name, 'description': 'Project ' + name, 'license': 'MIT',
+                                'version': version, 'createdAt': '2020-01-01T00:00:00Z'},
+                'workflow': {'cmpt_list': [{}] * cmpts, 'link_list': []}}
+        with open(self.directory + '/' + name + '/' + name + '.json', 'w') as file:
+            json.dump(info, file)
+
+
+class TestListProjects(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.client = create_app().test_client()
+        from benchmarks.synthetic import build_project
+        from services.utils.FileHandler import FileHandler
+        handler = FileHandler()
+        for name, size in [('p1', 6), ('p2', 1)]:
+            with _quiet():
+                handler.setup_project_folder(build_project(size, name=name))
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_list_projects(self):
+        resp = self.client.get('/project-space/projects?sort=cmpts&order=desc&limit=1')
+        self.assertEqual(200, resp.status_code)
+        info = json.loads(resp.get_data(as_text=True))
+        self.assertEqual(2, info['total'])
+        self.assertEqual(['p1'], [project['name'] for project in info['projects']])
+        self.assertEqual(6, info['projects'][0]['cmpts'])
+
+        resp = self.client.get('/project-space/projects?offset=1')
+        self.assertEqual(['p2'], [project['name'] for project in json.loads(resp.get_data(as_text=True))['projects']])
+
+    def test_invalid_parameters(self):
+        for query in ['sort=description', 'order=up', 'offset=x', 'limit=-1']:
+            with self.subTest(query=query):
+                resp = self.client.get('/project-space/projects?' + query)
+                self.assertEqual(400, resp.status_code)
+                self.assertIn('error', json.loads(resp.get_data(as_text=True)))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the catalog and the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
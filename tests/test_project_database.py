@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+""" Check the SQLite storage of the projects, the "sqlite" backend of FileHandler and the
+migration of the project folders to the database
+
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import build_project
+from services.config import StorageSetting
+from services.utils.FileHandler import FileHandler
+from services.utils.ProjectDatabase import ProjectDatabase
+import migrate_projects
+
+INFO = {'projectInfo': {'name': 'p1', 'description': 'Project', 'license': 'MIT', 'version': '1.0',
+                        'createdAt': '2020-01-01T00:00:00Z'},
+        'workflow': {'cmpt_list': [{}, {}], 'link_list': [{}]}}
+
+class TestProjectDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = ProjectDatabase(self.directory + '/projects.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_get(self):
+        self.db.save_project('p1', INFO, json.dumps(INFO), '# trig', 'line 1\n\nline 2\n', modifiedAt=10.0)
+        self.assertTrue(self.db.contains('p1'))
+        self.assertEqual(INFO, json.loads(self.db.get_document('p1', 'json')))
+        self.assertEqual('# trig', self.db.get_document('p1', 'trig'))
+        self.assertEqual('line 1line 2', self.db.get_document('p1', 'workflow_ui_normalized'))
+        self.assertEqual(10.0, self.db.get_modified_at('p1'))
+
+        self.db.save_document('p1', 'workflow_ui', 'other')
+        self.assertEqual('other', self.db.get_document('p1', 'workflow_ui_normalized'))
+        self.assertLess(10.0, self.db.get_modified_at('p1'))
+
+        total, projects = self.db.list()
+        self.assertEqual(1, total)
+        self.assertEqual((2, 1, 'Project'), (projects[0]['cmpts'], projects[0]['links'],
+                                             projects[0]['projectInfo']['description']))
+
+        self.db.delete_project('p1')
+        self.assertEqual([], self.db.list_names())
+        with self.assertRaises(FileNotFoundError):
+            self.db.get_document('p1', 'json')
+
+    def test_save_replaces_documents(self):
+        self.db.save_project('p1', INFO, json.dumps(INFO), '# trig', 'ui')
+        self.db.save_project('p1', INFO, json.dumps(INFO), '# trig 2')
+        self.assertEqual('# trig 2', self.db.get_document('p1', 'trig'))
+        with self.assertRaises(FileNotFoundError):
+            self.db.get_document('p1', 'workflow_ui')
+
+    def test_failed_save_is_rolled_back(self):
+        self.db.save_project('p1', INFO, json.dumps(INFO), '# trig', modifiedAt=10.0)
+        with self.assertRaises(AttributeError):
+            self.db.save_project('p1', {}, '{}', None)
+        self.assertEqual('# trig', self.db.get_document('p1', 'trig'))
+        self.assertEqual(10.0, self.db.get_modified_at('p1'))
+        self.assertEqual(2, self.db.list()[1][0]['cmpts'])
+
+    def test_errors(self):
+        with self.assertRaises(FileNotFoundError):
+            self.db.save_document('nope', 'workflow_ui', 'ui')
+        with self.assertRaises(FileNotFoundError):
+            self.db.get_modified_at('nope')
+        with self.assertRaises(ValueError):
+            self.db.save_document('p1', 'other', '')
+        with self.assertRaises(ValueError):
+            self.db.list(sort='description')
+
+
+class TestSqliteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.backend = StorageSetting.backend
+        StorageSetting.backend = 'sqlite'
+        self.handler = FileHandler()
+        self.project = _quiet(build_project, 6, name='p1')
+
+    def tearDown(self):
+        StorageSetting.backend = self.backend
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_project_in_database(self):
+        _quiet(self.handler.setup_project_folder, self.project)
+        self.assertEqual(['docker-standalone'], os.listdir(self.handler.directory + '/p1'))
+        self.assertEqual(self.project.to_ref_dict(), self.handler.get_project_as_dict('p1'))
+        trig = self.handler.get_project_as_trig('p1')
+        with open(self.handler.get_project_trig_path('p1'), newline='') as file:
+            self.assertEqual(trig, file.read())
+        self.assertEqual(['p1'], self.handler.get_list_project())
+
+        self.handler.save_workflow_ui('<div>\n</div>\n', 'p1')
+        self.assertEqual('<div></div>', self.handler.get_workflow_ui('p1'))
+
+        self.handler.delete_project('p1')
+        self.assertEqual([], self.handler.get_list_project())
+        self.assertFalse(os.path.exists(self.handler.directory + '/p1'))
+
+    def test_unknown_project(self):
+        with self.assertRaises(FileNotFoundError):
+            self.handler.get_project_as_dict('nope')
+        with self.assertRaises(FileNotFoundError):
+            self.handler.save_workflow_ui('<div></div>', 'nope')
+
+    def test_unknown_backend(self):
+        StorageSetting.backend = 'other'
+        with self.assertRaises(ValueError):
+            FileHandler()
+
+
+class TestMigrateProjects(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.handler = FileHandler()
+        for name in ['p1', 'p2']:
+            _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name=name))
+        self.handler.save_workflow_ui('<div>\n</div>\n', 'p1')
+        self.db = ProjectDatabase(self.home + '/projects.db')
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_migrate(self):
+        trig = self.handler.get_project_as_trig('p1')
+        self.assertEqual(0, self.migrate())
+        self.assertEqual(['p1', 'p2'], self.db.list_names())
+        self.assertEqual(self.handler.get_project_as_dict('p1'), json.loads(self.db.get_document('p1', 'json')))
+        self.assertEqual(trig, self.db.get_document('p1', 'trig'))
+        self.assertEqual('<div>\n</div>\n', self.db.get_document('p1', 'workflow_ui'))
+
+        # Already migrated, unless forced
+        self.handler.save_workflow_ui('<p></p>', 'p1')
+        self.assertEqual(0, self.migrate())
+        self.assertEqual('<div>\n</div>\n', self.db.get_document('p1', 'workflow_ui'))
+        self.assertEqual(0, self.migrate('--force', 'p1'))
+        self.assertEqual('<p></p>', self.db.get_document('p1', 'workflow_ui'))
+
+    def test_migrate_without_trig_and_remove_files(self):
+        trig = self.handler.get_project_as_trig('p1')
+        os.remove(self.handler.get_project_trig_path('p1'))
+        self.assertEqual(0, self.migrate('--force', '--remove-files', 'p1'))
+        self.assertEqual(trig, self.db.get_document('p1', 'trig'))
+        self.assertEqual(['docker-standalone'], os.listdir(self.handler.directory + '/p1'))
+        self.assertEqual(['p1'], self.db.list_names())
+
+    def test_invalid_project(self):
+        with open(self.handler.directory + '/p2/p2.json', 'w') as file:
+            file.write('{')
+        self.assertEqual(1, self.migrate())
+        self.assertEqual(['p1'], self.db.list_names())
+        self.assertTrue(os.path.isfile(self.handler.directory + '/p2/p2.json'))
+
+    def migrate(self, *args):
+        return _quiet(migrate_projects.main, ['--db', self.db.path] + list(args))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods and the migration """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
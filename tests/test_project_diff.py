@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+""" Check the triples reported by ProjectDiff between two versions of a project, and the diff
+of the project being modified
+
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import build_project
+from services.model import Project, ProjectDiff
+from services.model.TrigReader import TrigSyntaxError
+from services.utils.FileHandler import FileHandler
+
+WAVES = 'http://www.waves-rsp.org/configuration#'
+
+class TestProjectDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.project = _quiet(build_project, 13)
+
+    def test_project_and_its_trig(self):
+        """ The blank nodes are matched whatever their labels """
+        trig = _quiet(self.project.parse_trig)
+        self.assertTrue(_quiet(ProjectDiff, io.StringIO(trig), self.project).is_empty())
+        self.assertTrue(_quiet(ProjectDiff, self.project, self.project).is_empty())
+        # Other blank node labels, the same content
+        relabeled = trig.replace('_:', '_:x')
+        self.assertNotEqual(trig, relabeled)
+        self.assertTrue(_quiet(ProjectDiff, io.StringIO(relabeled), io.StringIO(trig)).is_empty())
+
+    def test_changed_window_and_feed(self):
+        """ Only the settings that changed are reported, with the component they belong to """
+        edited = _copy(self.project)
+        _quiet(edited.workflow.save_link_settings_by_cmpt_ids, 'stream_0', 'filter_0', {'windowSpan': 'PT42S'})
+        edited.workflow.get_cmpt_by_id('sparqlfeed_0').settings['refreshInterval'] = 'PT10S'
+
+        diff = _quiet(ProjectDiff, self.project, edited)
+        self.assertEqual(2, len(diff.added))
+        self.assertEqual(2, len(diff.removed))
+        self.assertEqual(set([WAVES + 'windowSpan', WAVES + 'refreshInterval']),
+                         set(p for s, p, o in diff.added | diff.removed))
+
+        info = diff.to_dict()
+        self.assertEqual(2, info['added'])
+        self.assertEqual(['SparqlFeed "feed 1"', 'filter/2'], list(info['components']))
+        self.assertIn('"PT42S"', info['components']['filter/2']['added'][0])
+        self.assertIn('"PT5S"', info['components']['filter/2']['removed'][0])
+
+    def test_removed_component(self):
+        edited = _copy(self.project)
+        _quiet(edited.workflow.del_cmpt_by_id, 'sink_0')
+        groups = _quiet(ProjectDiff, self.project, edited).groups()
+        self.assertEqual([], groups['sink/5']['added'])
+        self.assertIn((WAVES + 'id'), [p for s, p, o in groups['sink/5']['removed']])
+
+    def test_invalid_trig(self):
+        with self.assertRaises(TrigSyntaxError):
+            _quiet(ProjectDiff, io.StringIO('<a> <b> .'), self.project)
+
+
+class TestDiffEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.client = create_app().test_client()
+        self.project = _quiet(build_project, 6, name='p1')
+        _quiet(FileHandler().setup_project_folder, self.project)
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_diff_of_modified_project(self):
+        """ The workflow of the project being modified is empty until the editor adds its components """
+        resp = _quiet(self.client.get, '/modify-project/p1')
+        self.assertEqual(200, resp.status_code)
+        info = self.diff('p1')
+        self.assertEqual(0, info['added'])
+        self.assertIn('stream/1', info['components'])
+        self.assertTrue(info['components']['stream/1']['removed'])
+
+    def test_unknown_project(self):
+        resp = _quiet(self.client.get, '/modify-project/nope/diff')
+        self.assertEqual(400, resp.status_code)
+        self.assertIn('error', json.loads(resp.get_data(as_text=True)))
+
+    def diff(self, name):
+        resp = _quiet(self.client.get, '/modify-project/' + name + '/diff')
+        self.assertEqual(200, resp.status_code)
+        return json.loads(resp.get_data(as_text=True))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _copy(project):
+    """ Copy of a project, through its json """
+    return _quiet(Project().parse_from_dict, json.loads(json.dumps(project.to_ref_dict())))
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
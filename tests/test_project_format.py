@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+""" Check the project json format, links referring to the components by id (v2), and the
+upgrade of the project files written with full component copies (v1)
+
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import build_project
+from services.model import Project, Workflow
+from services.model.Project import FORMAT_VERSION
+from services.utils.FileHandler import FileHandler
+
+class TestProjectFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.project = _quiet(build_project, 13)
+
+    def test_ref_dict_round_trip(self):
+        info = json.loads(json.dumps(self.project.to_ref_dict()))
+        self.assertEqual(FORMAT_VERSION, info['version'])
+        for link_dict in info['workflow']['link_list']:
+            self.assertEqual(['settings', 'srcCmptId', 'trgCmptId'], sorted(link_dict))
+
+        project = _quiet(Project().parse_from_dict, info)
+        self.assertEqual(self.project.to_ref_dict(), project.to_ref_dict())
+        # The links are bound to the components of the workflow, not to copies
+        for link in project.workflow.link_list:
+            self.assertIs(project.workflow.get_cmpt_by_id(link.srcCmpt.id), link.srcCmpt)
+            self.assertIs(project.workflow.get_cmpt_by_id(link.trgCmpt.id), link.trgCmpt)
+
+    def test_v1_dict_is_upgraded(self):
+        info = json.loads(json.dumps(self.project.to_dict()))
+        self.assertNotIn('version', info)
+        upgraded = Project().upgrade_dict(info)
+        self.assertEqual(self.project.to_ref_dict(), upgraded)
+        # The dictionary read is left as it is
+        self.assertIn('srcCmpt', info['workflow']['link_list'][0])
+        # Already in the current format
+        self.assertIs(upgraded, Project().upgrade_dict(upgraded))
+
+    def test_link_to_unknown_component(self):
+        info = self.project.to_ref_dict()
+        info['workflow']['link_list'][0]['trgCmptId'] = 'nope'
+        with self.assertRaises(KeyError):
+            _quiet(Workflow().parse_from_dict, info['workflow'])
+
+
+class TestProjectFile(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.handler = FileHandler()
+        os.makedirs(self.handler.directory)
+        self.project = _quiet(build_project, 13, name='p1')
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_project_file_is_v2(self):
+        _quiet(self.handler.setup_project_folder, self.project)
+        with open(self.handler.directory + '/p1/p1.json') as file:
+            info = json.load(file)
+        self.assertEqual(FORMAT_VERSION, info['version'])
+        self.assertEqual(self.project.to_ref_dict(), self.handler.get_project_as_dict('p1'))
+
+    def test_v1_project_file_is_read(self):
+        os.makedirs(self.handler.directory + '/p1')
+        with open(self.handler.directory + '/p1/p1.json', 'w') as file:
+            json.dump(self.project.to_dict(), file)
+        self.assertEqual(self.project.to_ref_dict(), self.handler.get_project_as_dict('p1'))
+        project = _quiet(self.handler.get_project, 'p1')
+        self.assertEqual(len(self.project.workflow.link_list), len(project.workflow.link_list))
+
+    def test_missing_project_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.handler.get_project_as_dict('p1')
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+""" Check the session stores, the eviction of the memory one, and the SQLite one with two stores
+sharing a database as two worker processes do
+
+"""
+
+import contextlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from services.config import SessionSetting
+from services.model import Component
+from services.utils.SessionStore import MemorySessionStore, create_session_store
+from services.utils.SqliteSessionStore import SqliteSessionStore
+
+class TestMemorySessionStore(unittest.TestCase):
+
+    def test_sessions_are_separate(self):
+        store = MemorySessionStore()
+        with _quiet():
+            _add(store, 'a', 'c1')
+            _add(store, 'b', 'c2')
+        self.assertEqual(['c1'], _cmpts(store, 'a'))
+        self.assertEqual(['c2'], _cmpts(store, 'b'))
+        self.assertEqual(2, len(store))
+
+    def test_max_sessions(self):
+        """ The least recently used session is evicted, and gets a new state """
+        store = MemorySessionStore(maxSessions=2)
+        with _quiet():
+            _add(store, 'a', 'c1')
+            _add(store, 'b', 'c2')
+            _cmpts(store, 'a')
+            _add(store, 'c', 'c3')
+        self.assertEqual(2, len(store))
+        self.assertEqual(['c1'], _cmpts(store, 'a'))
+        self.assertEqual([], _cmpts(store, 'b'))
+
+    def test_max_bytes(self):
+        store = MemorySessionStore(maxBytes=6 * 1024)
+        with _quiet():
+            for cmptId in ['c1', 'c2', 'c3']:
+                _add(store, 'a', cmptId)
+            _add(store, 'b', 'c4')
+        self.assertEqual([], _cmpts(store, 'a'))
+        self.assertEqual(['c4'], _cmpts(store, 'b'))
+
+    def test_session_in_use_is_kept(self):
+        store = MemorySessionStore(maxIdle=-1)
+        with _quiet():
+            with store.acquire('a') as state:
+                state.workflow.add_cmpt(Component(id='c1', cmptType='Stream'))
+                _add(store, 'b', 'c2')
+                self.assertEqual(1, len(store))
+        # Both idle for more than maxIdle once released
+        self.assertEqual(0, len(store))
+
+    def test_unknown_backend(self):
+        backend = SessionSetting.backend
+        SessionSetting.backend = 'other'
+        try:
+            with self.assertRaises(ValueError):
+                create_session_store()
+        finally:
+            SessionSetting.backend = backend
+        self.assertIsInstance(create_session_store(), MemorySessionStore)
+
+class TestSqliteSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'sessions.db')
+        self.a = SqliteSessionStore(self.path)
+        self.b = SqliteSessionStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_deltas_of_other_store(self):
+        with _quiet():
+            self.add(self.a, 'c1')
+            self.add(self.b, 'c2')
+            with self.a.acquire('s') as state:
+                state.workflow.add_link_with_cmpt_ids('c1', 'c2')
+        self.assertEqual((['c1', 'c2'], 1), self.cmpts_links(self.b))
+        self.assertEqual(self.cmpts_links(self.a), self.cmpts_links(self.b))
+
+    def test_duplicate_link_is_not_recorded(self):
+        with _quiet():
+            self.add(self.a, 'c1')
+            self.add(self.a, 'c2')
+            with self.b.acquire('s') as state:
+                state.workflow.add_link_with_cmpt_ids('c1', 'c2')
+            with self.assertRaises(ValueError), self.a.acquire('s') as state:
+                state.workflow.add_link_with_cmpt_ids('c1', 'c2')
+        self.assertEqual((['c1', 'c2'], 1), self.cmpts_links(self.b))
+        self.assertEqual((['c1', 'c2'], 1), self.cmpts_links(self.a))
+
+    def test_failed_request_is_not_cached(self):
+        with _quiet():
+            self.add(self.a, 'c1')
+            with self.assertRaises(RuntimeError), self.a.acquire('s') as state:
+                state.workflow.del_cmpt_by_id('c1')
+                raise RuntimeError()
+        self.assertEqual((['c1'], 0), self.cmpts_links(self.a))
+
+    def test_diverged_cache_is_rebuilt(self):
+        """ The deltas of another store do not apply on the cached state, it is built again """
+        with _quiet():
+            self.add(self.a, 'c1')
+            self.cmpts_links(self.b)
+            # The cached state of b has a component the database doesn't have
+            self.b._cache['s'][2].workflow.add_cmpt(Component(id='c2'))
+            self.add(self.a, 'c2')
+        self.assertEqual((['c1', 'c2'], 0), self.cmpts_links(self.b))
+
+    def test_invalid_deltas(self):
+        with _quiet():
+            self.add(self.a, 'c1')
+        conn = sqlite3.connect(self.path)
+        with conn:
+            conn.execute("INSERT INTO deltas (session_id, seq, delta) VALUES ('s', 99, ?)",
+                         ('{"changes": [{"op": "remove", "path": "/cmpts/nope"}], "revision": 9}',))
+        conn.close()
+        with self.assertRaises(ValueError), self.b.acquire('s'):
+            pass
+
+    def test_recreated_session(self):
+        with _quiet():
+            self.add(self.a, 'c1')
+            self.add(self.a, 'c2')
+            self.a.maxIdle = -1
+            self.assertEqual(1, self.a.evict_idle())
+            self.a.maxIdle = 3600
+            self.add(self.b, 'c3')
+        self.assertEqual((['c3'], 0), self.cmpts_links(self.a))
+
+    def add(self, store, cmptId):
+        with store.acquire('s') as state:
+            state.workflow.add_cmpt(Component(id=cmptId, cmptType='Stream'))
+
+    def cmpts_links(self, store):
+        with store.acquire('s') as state:
+            return [cmpt.id for cmpt in state.workflow.cmpt_list], len(state.workflow.link_list)
+
+
+def _add(store, session_id, cmptId):
+    with store.acquire(session_id) as state:
+        state.workflow.add_cmpt(Component(id=cmptId, cmptType='Stream'))
+
+def _cmpts(store, session_id):
+    with store.acquire(session_id) as state:
+        return [cmpt.id for cmpt in state.workflow.cmpt_list]
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the editor sessions have their own tmp workspace for the uploads
+
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from services.config import SessionSetting
+
+class TestSessionWorkspaces(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        app = create_app()
+        self.a = app.test_client()
+        self.b = app.test_client()
+        from services.utils import FileHandler
+        self.directory = FileHandler().directory
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_uploads_are_kept_per_session(self):
+        self.open_editor(self.a)
+        self.upload(self.a, 'a.csv')
+        self.open_editor(self.b)
+        self.upload(self.b, 'b.csv')
+        # Opening the editor again only resets the workspace of the session
+        self.open_editor(self.b)
+        self.assertEqual([[], ['a.csv']], sorted(sorted(files) for files in self.raw_sources()))
+
+    def test_project_gets_the_files_of_its_session(self):
+        self.open_editor(self.a)
+        self.open_editor(self.b)
+        self.upload(self.a, 'a.csv')
+        self.upload(self.b, 'b.csv')
+        with _quiet():
+            resp = self.a.post('/create-project', data={'name': 'pa', 'description': '', 'license': '',
+                                                        'version': '', 'frequency': 'PT15S',
+                                                        'reporters': 'console', 'workflow_ui': ''})
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(['a.csv'], os.listdir(self.directory + '/pa/docker-standalone/instance/Data/RawSource'))
+        self.assertEqual([['b.csv']], self.raw_sources())
+
+    def test_idle_workspaces_are_removed(self):
+        self.open_editor(self.a)
+        self.upload(self.a, 'a.csv')
+        maxIdle = SessionSetting.maxIdle
+        SessionSetting.maxIdle = -1
+        try:
+            self.open_editor(self.b)
+        finally:
+            SessionSetting.maxIdle = maxIdle
+        self.assertEqual([[]], self.raw_sources())
+
+    def open_editor(self, client):
+        with _quiet():
+            self.assertEqual(200, client.get('/create-project').status_code)
+
+    def upload(self, client, filename):
+        resp = client.post('/create-project/upload-multi-file',
+                           data={'location': (io.BytesIO(b'1,2\n'), filename)}, content_type='multipart/form-data')
+        self.assertEqual(200, resp.status_code)
+
+    def raw_sources(self):
+        """ Files of the raw source folder of each workspace """
+        workspaces = self.directory + '/tmp'
+        return [os.listdir(entry.path + '/instance/Data/RawSource') for entry in os.scandir(workspaces)]
+
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the requests """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
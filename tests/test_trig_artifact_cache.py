@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the TriG artifacts are keyed by the mapping they are generated with
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from services.model import ComponentSchema
+from services.utils.TrigArtifactCache import mapping_fingerprint, MAPPING_MODULES
+
+class TestMappingFingerprint(unittest.TestCase):
+
+    def test_same_sources(self):
+        self.assertEqual(mapping_fingerprint(), mapping_fingerprint())
+
+    def test_mapping_modules_changed(self):
+        """ A change of the source of any mapping module changes the fingerprint """
+        for name in MAPPING_MODULES:
+            with self.subTest(module=name):
+                self.assert_fingerprint_changes(name)
+
+    def test_component_schema_changed(self):
+        self.assertIn(ComponentSchema.__module__, MAPPING_MODULES)
+        self.assert_fingerprint_changes(ComponentSchema.__module__)
+
+    def assert_fingerprint_changes(self, name):
+        """ Point the module at a modified copy of its source and compute the fingerprint again """
+        module = sys.modules[name]
+        original = module.__file__
+        before = mapping_fingerprint()
+
+        folder = tempfile.mkdtemp()
+        try:
+            copy = os.path.join(folder, os.path.basename(original))
+            shutil.copyfile(original, copy)
+            with open(copy, 'a') as file:
+                file.write('\n# modified\n')
+            module.__file__ = copy
+            self.assertNotEqual(before, mapping_fingerprint())
+        finally:
+            module.__file__ = original
+            shutil.rmtree(folder)
+
+        self.assertEqual(before, mapping_fingerprint())
+
+
+if __name__ == '__main__':
+    unittest.main()
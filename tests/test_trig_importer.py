@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+""" Check that a TriG imported with TrigImporter is written back as it was read
+
+The shipped TriG files are hand-written: the written TriG must have all their triples, with the
+same uris and datatypes, and may only add the fields of the project they do not give, i.e. the
+description of the installation or the rdf:type of <source/1i>. The blank nodes are named by the
+node and predicate that refer to them, or by their statements when nothing refers to them.
+
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import BNode, ConjunctiveGraph, Literal, RDF, URIRef
+from rdflib.compare import isomorphic
+
+from benchmarks.synthetic import build_project
+from services.model import Project, TrigImporter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_TOPOLOGY = os.path.join(ROOT, 'services', 'utils', 'docker', 'storm-nimbus', 'test-topology.trig')
+
+WAVES = 'http://www.waves-rsp.org/configuration#'
+XSD   = 'http://www.w3.org/2001/XMLSchema#'
+BASE  = 'http://localhost:9091/waves/versailles/'
+
+class TestTrigImporter(unittest.TestCase):
+
+    def test_shipped_trig_files(self):
+        paths = sorted(glob.glob(os.path.join(ROOT, 'services', '**', '*.trig'), recursive=True))
+        self.assertIn(TEST_TOPOLOGY, paths)
+        for path in paths:
+            with self.subTest(path=os.path.relpath(path, ROOT)):
+                with open(path, 'r', newline='') as file:
+                    trig = file.read()
+                project = _import(trig)
+                original = _triples(_load(trig))
+                written  = _triples(_load(_quiet(project.parse_trig, engine='native')))
+
+                self.assertEqual(set(), original - written)
+                installation = URIRef(BASE + 'installation')
+                for s, p, o in written - original:
+                    # Only the fields of the project, the clock and the metrics, and the type of
+                    # the components without rdf:type
+                    self.assertTrue(s == installation or s[1:2] == (installation,) or p == RDF.type, (s, p, o))
+
+                rdflib = _load(_quiet(project.parse_trig, engine='rdflib'))
+                self.assertTrue(isomorphic(rdflib, _load(_quiet(project.parse_trig, engine='native'))))
+
+    def test_uris_ids_and_datatypes_are_kept(self):
+        with open(TEST_TOPOLOGY, 'r', newline='') as file:
+            project = _import(file.read())
+        graph = _load(_quiet(project.parse_trig))
+
+        stream = URIRef(BASE + 'stream/1i')
+        self.assertIn((stream, URIRef(WAVES + 'id'), Literal('54', datatype=URIRef(XSD + 'integer'))), graph)
+        self.assertNotIn(URIRef(BASE + 'stream/54'), set(graph.subjects()))
+        # <source/1i> has no waves:id, none is made up from its uri
+        self.assertEqual([], list(graph.objects(URIRef(BASE + 'source/1i'), URIRef(WAVES + 'id'))))
+        # The window is written with the predicate it was read with, without waves:consumesStreams
+        filter = URIRef(BASE + 'filter/3f')
+        self.assertEqual([], list(graph.objects(filter, URIRef(WAVES + 'consumesStreams'))))
+        window = next(graph.objects(filter, URIRef(WAVES + 'consumesStream')))
+        self.assertEqual(Literal('PT8S', datatype=URIRef(XSD + 'duration')),
+                         graph.value(window, URIRef(WAVES + 'windowSpan')))
+
+    def test_written_project_round_trip(self):
+        """ A TriG written by the editor is written back as the same graph """
+        project = _quiet(build_project, 13)
+        trig = _quiet(project.parse_trig, engine='native')
+        self.assertTrue(isomorphic(_load(trig), _load(_quiet(_import(trig).parse_trig, engine='native'))))
+
+    def test_statements_of_no_component(self):
+        """ A blank node no component refers to and an unknown property of the clock """
+        trig = _trig('<installation> waves:clock [ waves:local.timezone "false" ] .'
+                     '_:note rdfs:comment "kept" ; waves:stream <stream/1> .'
+                     '<stream/1> a waves:Stream ; waves:id "1"^^xsd:integer .')
+        project = _import(trig)
+        self.assertEqual(3, len(project.projectInfo.trig))
+        self.assertEqual(set(), _triples(_load(trig)) - _triples(_load(_quiet(project.parse_trig))))
+
+    def test_rejected_literals(self):
+        for statement in ['<stream/1> a waves:Stream ; rdfs:label "flux"@fr .',
+                          '<stream/1> a waves:Stream ; waves:id "1"^^<http://example.org/int> .',
+                          '<installation> waves:name "other" .']:
+            with self.subTest(statement=statement):
+                with self.assertRaises(ValueError):
+                    TrigImporter().load(io.StringIO(_trig(statement)))
+
+    def test_import_and_save_settings(self):
+        """ The settings of an imported component without waves id are saved with its uri """
+        home = tempfile.mkdtemp()
+        previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = home
+        try:
+            from main import create_app
+            client = create_app().test_client()
+            with open(TEST_TOPOLOGY, 'rb') as file:
+                resp = _quiet(client.post, '/create-project/import-trig', data={'trig': (file, 'test-topology.trig')})
+            self.assertEqual(200, resp.status_code)
+            sink = [cmpt for cmpt in resp.get_json()['workflow']['cmpt_list'] if cmpt['cmptType'] == 'Sink'][0]
+            resp = _quiet(client.post, '/create-project/save-component-settings',
+                          data={'cmpt_id': sink['id'], 'cmpt_type': 'Sink', 'numTasks': '3', 'outputFile': 'out.txt'})
+            self.assertEqual(200, resp.status_code)
+            settings = json.loads(resp.get_data(as_text=True))['settings']
+            self.assertEqual('sink/3f', settings['trig']['node'])
+            self.assertNotIn('id', settings)
+        finally:
+            os.environ['HOME'] = previousHome
+            shutil.rmtree(home)
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _trig(statements):
+    """ TriG of an installation with more statements """
+    return ('@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n'
+            '@prefix waves: <' + WAVES + '> .\n'
+            '@prefix xsd: <' + XSD + '> .\n'
+            '@base <' + BASE + '> .\n'
+            '<http://localhost:9091/waves/tests> {\n'
+            '<installation> a waves:Installation ; waves:name "tests" .\n' + statements + '\n}\n')
+
+def _import(trig):
+    importer = TrigImporter().load(io.StringIO(trig))
+    return Project(importer.projectInfo, importer.clusterInfo, importer.workflow, importer.metrics, importer.clock)
+
+def _triples(graph):
+    """ Triples of a graph, each blank node is named by the only node and predicate that refer to
+    it, or by its statements """
+    refs = {}
+    for s, p, o in graph.triples((None, None, None)):
+        if isinstance(o, BNode):
+            refs.setdefault(o, []).append( (s, p) )
+
+    def name(node):
+        if not isinstance(node, BNode):
+            return node
+        if len(refs.get(node, [])) == 1 and not isinstance(refs[node][0][0], BNode):
+            return ('ref',) + refs[node][0]
+        return ('bnode', frozenset((p, o) for p, o in graph.predicate_objects(node) if not isinstance(o, BNode)))
+
+    return set((name(s), p, name(o)) for s, p, o in graph.triples((None, None, None)))
+
+def _load(trig):
+    """ Parse a TriG string -> rdflib graph """
+    graph = ConjunctiveGraph()
+    graph.parse(data=trig, format='trig')
+    return graph
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
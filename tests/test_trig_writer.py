@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the native TriG engine writes the same graph as the rdflib engine
+
+The graphs are compared with rdflib.compare.isomorphic, i.e. the blank nodes of the feeds, the
+stores, the windows, the metrics and the clock are matched by their triples and not by their labels.
+
+"""
+
+import contextlib
+import io
+import os
+import unittest
+
+from rdflib import ConjunctiveGraph
+from rdflib.compare import isomorphic
+
+from benchmarks.synthetic import build_project
+from services.config import TrigSetting
+from services.model import Project, ProjectInfo, ClusterInfo, Workflow, Component, Metrics, Clock
+
+class TestTrigWriter(unittest.TestCase):
+
+    def test_synthetic_projects(self):
+        """ SparqlFeed, RdfStore and windowed Stream links, up to 5 groups of components """
+        for size in [1, 6, 13, 30]:
+            with self.subTest(size=size):
+                self.assert_same_graph(_quiet(build_project, size))
+
+    def test_metrics_and_clock(self):
+        """ Metrics and clock blank nodes, with the clock in both time zone modes """
+        for localTimeZone in ["True", "False"]:
+            with self.subTest(localTimeZone=localTimeZone):
+                project = _quiet(build_project, 6)
+                project.metrics = Metrics(frequency="PT30S", reporters="console,csv")
+                project.clock   = Clock(startDate="2016-01-01T00:00:00Z", endDate="2016-01-02T00:00:00Z",
+                                        duration="PT12H", localTimeZone=localTimeZone, acceleration="2.5")
+                self.assert_same_graph(project)
+
+    def test_windows_without_waves_ids(self):
+        """ Window blank nodes labeled by the component ids when the components have no waves id """
+        project = _quiet(_windowed_project)
+        self.assert_same_graph(project)
+
+    def test_rdflib_engine_setting(self):
+        """ The rdflib engine chosen by TrigSetting writes text, whatever the version of rdflib """
+        project = _quiet(build_project, 6)
+        engine = TrigSetting.engine
+        TrigSetting.engine = 'rdflib'
+        try:
+            trig = _quiet(project.parse_trig)
+            stream = io.StringIO()
+            _quiet(project.write_trig, stream)
+        finally:
+            TrigSetting.engine = engine
+        self.assertIsInstance(trig, str)
+        self.assertEqual(trig, stream.getvalue())
+        self.assertTrue(isomorphic(_load(trig), _load(_quiet(project.parse_trig, engine='native'))))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            _quiet(build_project, 1).write_trig(io.StringIO(), engine='other')
+
+    def assert_same_graph(self, project):
+        graph_rdflib = _load(_quiet(project.parse_trig, engine='rdflib'))
+        graph_native = _load(_quiet(project.parse_trig, engine='native'))
+        self.assertEqual(len(graph_rdflib), len(graph_native))
+        self.assertTrue(isomorphic(graph_rdflib, graph_native))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _windowed_project():
+    """ Two streams without waves id consumed by a filter and a strider, each link with a window """
+    workflow = Workflow()
+    workflow.add_cmpt(Component(id='stream_a', cmptType='Stream', settings={'label': 'a', 'stepRate': 'PT1S'}))
+    workflow.add_cmpt(Component(id='stream_b', cmptType='Stream', settings={'label': 'b'}))
+    workflow.add_cmpt(Component(id='filter', cmptType='Filter', settings={'id': '3', 'label': 'filter'}))
+    workflow.add_cmpt(Component(id='strider', cmptType='Strider', settings={'label': 'strider'}))
+    for src, trg, span in [('stream_a', 'filter', 'PT5S'), ('stream_b', 'filter', 'PT10S'),
+                           ('stream_a', 'strider', 'PT15S'), ('stream_b', 'strider', 'PT20S')]:
+        workflow.add_link_with_cmpt_ids(src, trg)
+        workflow.save_link_settings_by_cmpt_ids(src, trg, {'windowSpan': span})
+
+    projectInfo = ProjectInfo(name='windows', description='Windows', license='MIT', version='1.0')
+    projectInfo.createdAt = '2020-01-01T00:00:00Z'
+    return Project(projectInfo=projectInfo, clusterInfo=ClusterInfo(), workflow=workflow,
+                   metrics=Metrics(), clock=Clock())
+
+def _load(trig):
+    """ Parse a TriG string -> rdflib graph """
+    graph = ConjunctiveGraph()
+    graph.parse(data=trig, format='trig')
+    return graph
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+""" Check the indexes, the changes and the duplicates of the workflow
+
+"""
+
+import contextlib
+import os
+import unittest
+
+from services.model import Workflow, Component, Link
+
+class TestWorkflow(unittest.TestCase):
+
+    def setUp(self):
+        self.workflow = Workflow()
+        with _quiet():
+            self.workflow.add_cmpt(Component(id='a', cmptType='Stream', settings={'id': '1'}))
+            self.workflow.add_cmpt(Component(id='b', cmptType='Filter', settings={'id': '2'}))
+            self.workflow.add_link_with_cmpt_ids('a', 'b')
+
+    def test_duplicate_component(self):
+        revision = self.workflow.revision
+        with _quiet(), self.assertRaises(ValueError):
+            self.workflow.add_cmpt(Component(id='a', cmptType='Filter'))
+        self.assertEqual(revision, self.workflow.revision)
+        self.assertEqual('Stream', self.workflow.get_cmpt_by_id('a').cmptType)
+        self.assertIs(self.workflow.get_cmpt_by_id('a'), self.workflow.get_links_from('a')[0].srcCmpt)
+
+    def test_duplicate_link(self):
+        revision = self.workflow.revision
+        with _quiet(), self.assertRaises(ValueError):
+            self.workflow.add_link_with_cmpt_ids('a', 'b')
+        with _quiet(), self.assertRaises(ValueError):
+            self.workflow.add_link(Link(self.workflow.get_cmpt_by_id('a'), self.workflow.get_cmpt_by_id('b')))
+        self.assertEqual(revision, self.workflow.revision)
+        self.assertEqual(1, len(self.workflow.link_list))
+
+    def test_changes_replayed_on_copy(self):
+        copy = Workflow().parse_from_dict(self.workflow.to_dict())
+        copy.revision = self.workflow.revision
+        with _quiet():
+            self.workflow.add_cmpt(Component(id='c', cmptType='Sink'))
+            self.workflow.add_link_with_cmpt_ids('b', 'c')
+            self.workflow.del_cmpt_by_id('a')
+            copy.apply_patch(self.workflow.get_changes_since(copy.revision))
+        self.assertEqual(self.workflow.to_ref_dict(), copy.to_ref_dict())
+        self.assertEqual(self.workflow.revision, copy.revision)
+
+    def test_patch_duplicate_add(self):
+        with _quiet(), self.assertRaises(ValueError):
+            self.workflow.apply_patch([{'op': 'add', 'path': '/cmpts/a', 'value': Component(cmptType='Sink').to_dict()}])
+        with _quiet(), self.assertRaises(ValueError):
+            self.workflow.apply_patch([{'op': 'add', 'path': '/links/a/b', 'value': {}}])
+        with _quiet(), self.assertRaises(KeyError):
+            self.workflow.apply_patch([{'op': 'remove', 'path': '/cmpts/nope'}])
+
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+""" Check the workflow revisions endpoints, GET and PATCH /create-project/workflow
+
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+class TestWorkflowApi(unittest.TestCase):
+
+    def setUp(self):
+        # The project space folder is in the home folder
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        from main import create_app
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_patch_and_changes_since(self):
+        revision = self.get()['revision']
+        resp = self.patch(revision, [_add('a', 'Stream'), _add('b', 'Filter'), _add_link('a', 'b')])
+        self.assertEqual(200, resp.status_code)
+        info = resp.get_json()
+        self.assertEqual(revision + 3, info['revision'])
+        self.assertEqual(str(info['revision']), resp.headers['ETag'].strip('"'))
+        self.assertEqual(['add', 'add', 'add'], [change['op'] for change in info['changes']])
+        self.assertEqual(info['changes'], self.get(since=revision)['changes'])
+
+    def test_patch_is_atomic(self):
+        """ A batch with a duplicate or an unknown id is rejected as a whole """
+        revision = self.get()['revision']
+        for changes in ([_add('a', 'Stream'), _add('a', 'Filter')],
+                        [_add('a', 'Stream'), _add_link('a', 'nope')],
+                        [_add('a', 'Stream'), {'op': 'remove', 'path': '/cmpts/nope'}]):
+            with self.subTest(changes=changes):
+                resp = self.patch(revision, changes)
+                self.assertEqual(400, resp.status_code)
+                self.assertIn('error', resp.get_json())
+                self.assertEqual(revision, self.get()['revision'])
+        self.assertEqual([], self.get()['workflow']['cmpt_list'])
+
+    def test_patch_revision_required(self):
+        revision = self.get()['revision']
+        resp = self.patch(revision, [_add('a', 'Stream')], etag=False)
+        self.assertEqual(428, resp.status_code)
+        resp = self.patch(revision + 1, [_add('a', 'Stream')])
+        self.assertEqual(409, resp.status_code)
+        self.assertEqual(revision, resp.get_json()['revision'])
+        self.assertEqual(str(revision), resp.headers['ETag'].strip('"'))
+        self.assertEqual(revision, self.get()['revision'])
+
+    def test_not_modified(self):
+        revision = self.get()['revision']
+        with _quiet():
+            resp = self.client.get('/create-project/workflow', headers={'If-None-Match': '"' + str(revision) + '"'})
+        self.assertEqual(304, resp.status_code)
+
+    def test_component_counter(self):
+        """ The explicit numeric ids move the counter of add-component and of the patch """
+        revision = self.get()['revision']
+        info = self.patch(revision, [_add('a', 'Stream'), _add('b', 'Filter', {'id': '7'}),
+                                     _add('c', 'Sink', {'id': 'sink'})]).get_json()
+        self.assertEqual(['1', '7', 'sink'], [change['value']['settings']['id'] for change in info['changes']])
+
+        info = self.patch(info['revision'], [_add('d', 'Stream')]).get_json()
+        self.assertEqual('8', info['changes'][0]['value']['settings']['id'])
+
+        with _quiet():
+            resp = self.client.post('/create-project/add-component',
+                                    data={'cmptType': 'Filter', 'id': 'e', 'ui_left': '0px', 'ui_top': '0px'})
+        self.assertEqual('9', json.loads(resp.get_data(as_text=True))['settings']['id'])
+
+    def get(self, since=None):
+        with _quiet():
+            resp = self.client.get('/create-project/workflow' + ('' if since is None else '?since=' + str(since)))
+        self.assertEqual(200, resp.status_code)
+        return resp.get_json()
+
+    def patch(self, revision, changes, etag=True):
+        headers = {'If-Match': '"' + str(revision) + '"'} if etag else {}
+        with _quiet():
+            return self.client.patch('/create-project/workflow', data=json.dumps(changes),
+                                     content_type='application/json', headers=headers)
+
+
+def _add(cmptId, cmptType, settings=None):
+    value = {'cmptType': cmptType, 'ui_left': '0px', 'ui_top': '0px', 'settings': settings or {}}
+    return {'op': 'add', 'path': '/cmpts/' + cmptId, 'value': value}
+
+def _add_link(srcCmptId, trgCmptId):
+    return {'op': 'add', 'path': '/links/' + srcCmptId + '/' + trgCmptId, 'value': {}}
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+""" Check that the workflow UI is stored compressed and sent as it is stored
+
+"""
+
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from benchmarks.synthetic import build_project
+from services.config import StorageSetting
+from services.utils import WorkflowUI
+from services.utils.FileHandler import FileHandler
+
+WORKFLOW_UI = '<div class="cmpt">\r\n  <span>Stream</span>\n\n</div>\n'
+NORMALIZED  = '<div class="cmpt">  <span>Stream</span></div>'
+
+class TestWorkflowUI(unittest.TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(NORMALIZED, WorkflowUI.normalize(WORKFLOW_UI))
+        self.assertEqual('', WorkflowUI.normalize('\n \r\n'))
+
+    def test_compress(self):
+        """ The same text always gives the same bytes, so the etag does not change """
+        data = WorkflowUI.compress(WORKFLOW_UI)
+        self.assertEqual(data, WorkflowUI.compress(WORKFLOW_UI))
+        self.assertEqual(WORKFLOW_UI, WorkflowUI.decompress(data))
+        with self.assertRaises(OSError):
+            WorkflowUI.decompress(b'not gzip')
+
+
+class TestLoadWorkflowUI(unittest.TestCase):
+
+    backend = 'files'
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.previousBackend = StorageSetting.backend
+        StorageSetting.backend = self.backend
+        from main import create_app
+        self.client = create_app().test_client()
+        self.handler = FileHandler()
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name='p1'))
+        self.handler.save_workflow_ui(WORKFLOW_UI, 'p1')
+
+    def tearDown(self):
+        StorageSetting.backend = self.previousBackend
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_sent_as_stored(self):
+        data, encoding = self.handler.get_workflow_ui_compressed('p1')
+        resp = self.client.get('/project-space/p1/workflow-ui', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(encoding, resp.headers['Content-Encoding'])
+        self.assertEqual(data, resp.get_data())
+        self.assertEqual(NORMALIZED, _decompress(data, encoding))
+        etag = resp.headers['ETag']
+
+        resp = self.client.get('/project-space/p1/workflow-ui', headers={'If-None-Match': etag})
+        self.assertEqual(304, resp.status_code)
+
+    def test_decompressed_without_encoding(self):
+        resp = self.client.get('/project-space/p1/workflow-ui', headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(200, resp.status_code)
+        self.assertNotIn('Content-Encoding', resp.headers)
+        self.assertEqual(NORMALIZED, resp.get_data(as_text=True))
+        self.assertEqual(NORMALIZED, self.handler.get_workflow_ui('p1'))
+
+    def test_no_workflow_ui(self):
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 1, name='p2'))
+        resp = self.client.get('/project-space/p2/workflow-ui')
+        self.assertEqual(404, resp.status_code)
+        self.assertEqual(404, self.client.get('/project-space/nope/workflow-ui').status_code)
+
+
+class TestLoadWorkflowUISqlite(TestLoadWorkflowUI):
+
+    backend = 'sqlite'
+
+
+class TestWorkflowUIFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.previousHome = os.environ.get('HOME')
+        os.environ['HOME'] = self.home
+        self.handler = FileHandler()
+        _quiet(self.handler.setup_project_folder, _quiet(build_project, 6, name='p1'))
+        self.project_dir = self.handler.directory + '/p1'
+
+    def tearDown(self):
+        os.environ['HOME'] = self.previousHome
+        shutil.rmtree(self.home)
+
+    def test_saved_compressed(self):
+        self.handler.save_workflow_ui(WORKFLOW_UI, 'p1')
+        with open(self.project_dir + '/workflow.txt.gz', 'rb') as file:
+            self.assertEqual(WORKFLOW_UI, WorkflowUI.decompress(file.read()))
+        with open(self.project_dir + '/workflow.html.gz', 'rb') as file:
+            self.assertEqual(NORMALIZED, WorkflowUI.decompress(file.read()))
+
+    def test_saved_as_text_by_older_version(self):
+        with open(self.project_dir + '/workflow.txt', 'w') as file:
+            file.write(WORKFLOW_UI)
+        self.assertEqual((WorkflowUI.compress(NORMALIZED), 'gzip'), self.handler.get_workflow_ui_compressed('p1'))
+        # Saved again compressed, the text file is removed
+        self.handler.save_workflow_ui(WORKFLOW_UI, 'p1')
+        self.assertFalse(os.path.exists(self.project_dir + '/workflow.txt'))
+
+
+# ====================================
+# Private functions
+# ====================================
+
+def _decompress(data, encoding):
+    return (gzip.decompress(data) if encoding == 'gzip' else zlib.decompress(data)).decode('utf-8')
+
+def _quiet(function, *args, **kwargs):
+    """ Call a function without the lines printed by the Workflow methods """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()